@@ -4,14 +4,24 @@ import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import numpy as np
+import pyarrow.compute as pc
 from datetime import datetime, timedelta
 import io
-from src.data_loader import BigQueryCONN
-from src.image_loader import image_reader
+import uuid
+from src.data_loader import BigQueryCONN, DASHBOARD_COLUMNS
+from src.image_loader import get_image_service
 from src.prompt_classifier import classify_prompt
 from src.llm import LMMConnectors
-from src.updates import Update
-from src.predictor import Prediction
+from src.streaming import StreamTimer
+from src.onboarding import get_onboarding_engine
+from src.snapshot import SNAPSHOT_TTL_SECONDS, get_snapshot
+from src.job_executor import get_job_executor
+from src.analytics_cube import SupplierCube, BUCKET
+from src.filter_engine import FilterIndex
+from src.compact_table import CompactSupplierTable
+from src.simulation import SimulationEngine, uniform_scenarios
+from src.predictor import SUBSCORE_COLUMNS
+from src.answer_cache import get_answer_cache
 
 st.set_page_config(
     page_title="EcoChain AI Dashboard",
@@ -137,18 +147,71 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
-@st.cache_data()
+# One shared compact frame rather than a pickled copy per call; the app never mutates it in place
+@st.cache_resource(ttl=SNAPSHOT_TTL_SECONDS)
 def load_supplier_data():
     try:
         conn = BigQueryCONN()
-        suppliers = conn.bigquery_loader()
-        df = pd.DataFrame(suppliers)
-        df = df.dropna()
+        suppliers = conn.bigquery_loader(columns=DASHBOARD_COLUMNS, as_arrow=True)
+        # Only rows the dashboard cannot render are dropped (e.g. suppliers still being scored), still in Arrow
+        renderable = None
+        for col in ['country', 'region', 'product_category', 'recommendation', 'total_eco_score', 'risk_level']:
+            valid = suppliers.column(col).is_valid()
+            renderable = valid if renderable is None else pc.and_(renderable, valid)
+        # Categoricals for the low-cardinality columns and float32 scores, converted straight from Arrow
+        df = CompactSupplierTable.from_arrow(suppliers.filter(renderable)).frame
+        df.attrs['data_version'] = get_snapshot().version()
+        # Unique per loaded frame: caches built from this frame's row positions are keyed on it
+        df.attrs['build_id'] = uuid.uuid4().hex
         return df
     except Exception as e:
         st.error(f"Error connecting to database: {str(e)}")
         return pd.DataFrame()
 
+# Streamlit does not hash _df, so the key must identify the frame itself, not just the snapshot version
+@st.cache_resource(max_entries=2)
+def get_filter_index(_df, build_id, rows):
+    return FilterIndex(_df)
+
+@st.cache_resource
+def get_supplier_cube():
+    return SupplierCube()
+
+@st.cache_resource
+def get_simulation_engine():
+    return SimulationEngine()
+
+def simulate(suppliers, scenarios):
+    ''' Runs the ecoscore model over a suppliers x scenarios grid, or the subscore average if the model fails '''
+    engine = get_simulation_engine()
+    try:
+        return engine.run(suppliers, scenarios)
+    except Exception as e:
+        st.caption(f"Ecoscore model unavailable ({e}); projecting with the subscore average")
+        return engine.run(suppliers, scenarios, use_model=False)
+
+# Keyed on the loaded frame and the sidebar selection, so reruns from other widgets reuse the sweep
+@st.cache_data(max_entries=16, show_spinner="Simulating the portfolio...")
+def portfolio_sweep(_suppliers, build_id, filters, min_score):
+    return simulate(_suppliers, uniform_scenarios(range(0, 51, 5)))
+
+@st.cache_data(ttl=SNAPSHOT_TTL_SECONDS)
+def load_supplier_details(supplier_id, columns):
+    try:
+        conn = BigQueryCONN()
+        details = conn.bigquery_loader(columns=list(columns), filters={'supplier_id': [supplier_id]})
+        return details.iloc[0] if details is not None and len(details) else None
+    except Exception as e:
+        st.error(f"Error connecting to database: {str(e)}")
+        return None
+
+# Background onboarding jobs started from this session
+if "onboarding_jobs" not in st.session_state:
+    st.session_state.onboarding_jobs = []
+    st.session_state.onboarded = set()
+if "import_jobs" not in st.session_state:
+    st.session_state.import_jobs = []
+
 # Initialize supplier database in session state
 if "suppliers_db" not in st.session_state:
     st.session_state.suppliers_db = pd.DataFrame(columns=[
@@ -158,31 +221,96 @@ if "suppliers_db" not in st.session_state:
         'audit_summary', 'recommendation', 'uploaded_images'
     ])
 
-def run_ai_query(user_query: str):
+def route_query(user_query: str):
+    """ Classify the prompt while the supplier snapshot both routes read from is brought up to date """
+    AI = LMMConnectors(user_query)
+    executor = get_job_executor()
+    # Classification may ask the LLM through BigQuery; neither side waits on the other
+    classified = executor.call(classify_prompt, user_query)
+    snapshot_ready = executor.call(get_snapshot().load, AI.client)
+    classifier = classified.result()
+    snapshot_ready.result()
+    return classifier, AI
+
+def stream_ai_query(user_query: str, timer: StreamTimer):
+    """ Generator yielding the assistant answer chunk by chunk; cached answers come back in one chunk """
     try:
-        classifier = classify_prompt(user_query)
-        AI = LMMConnectors(user_query)
-        if classifier == "VECTOR_SEARCH":
-            response = AI.Vector_Search()
-            return response
-        else:
-            response = AI.AI_Generate()
-            return response
+        cache = get_answer_cache()
+        cached = cache.get(user_query)
+        if cached is not None:
+            yield from timer.wrap([cached])
+            return
+
+        classifier, AI = route_query(user_query)
+        chunks = []
+        for chunk in timer.wrap(AI.stream(classifier)):
+            chunks.append(chunk)
+            yield chunk
+        if chunks:
+            cache.put(user_query, "".join(chunks))
     except Exception as e:
-        return f"Sorry, I couldn't process your query. Error: {str(e)}"
+        yield f"Sorry, I couldn't process your query. Error: {str(e)}"
 
-def update_supplier(supplier):
+def submit_supplier(supplier):
+    """ Queue the new supplier on the background onboarding engine; returns the job id or None """
     try:
-        update = Update(supplier)
-        bqsupplier_id = update.supplier_update()
-        update.embed_supplier(bqsupplier_id)
-        scores = Prediction()
-        update.update_ecoscores(scores)
-        update.update_recommendations(bqsupplier_id)
-        return True
+        return get_onboarding_engine().submit(supplier)
     except Exception as e:
         st.error(f"Error updating supplier: {str(e)}")
-        return False
+        return None
+
+@st.fragment(run_every=3)
+def onboarding_progress():
+    """ Poll the onboarding jobs started in this session and show their progress """
+    engine = get_onboarding_engine()
+    for job_id in list(reversed(st.session_state.get("onboarding_jobs", []))):
+        job = engine.status(job_id)
+        if job is None:
+            # Finished jobs are evicted from the engine after a while
+            st.session_state.onboarding_jobs.remove(job_id)
+            continue
+        steps = " → ".join(f"{name} ({state['status']})" for name, state in job["steps"].items())
+        label = f"{job['supplier_name']} · job {job_id} · {job['status']}"
+        st.progress(job["progress"], text=label)
+        st.caption(steps)
+        if job["status"] == "failed":
+            st.error(f"Onboarding failed: {job['error']}")
+        elif job["status"] == "succeeded" and job_id not in st.session_state.onboarded:
+            # Reload the dashboard data once the supplier is fully onboarded
+            st.session_state.onboarded.add(job_id)
+            load_supplier_data.clear()
+            st.success(f"✅ Supplier \"{job['supplier_name']}\" onboarded as {job['supplier_id']}")
+
+@st.fragment(run_every=3)
+def import_progress():
+    """ Poll the bulk imports started in this session and show their reports """
+    engine = get_onboarding_engine()
+    for job_id in list(reversed(st.session_state.get("import_jobs", []))):
+        job = engine.status(job_id)
+        if job is None:
+            st.session_state.import_jobs.remove(job_id)
+            continue
+        summary = job["report"].summary()
+        if job["finished_at"] is None:
+            st.info(f"⏳ Import job {job_id} {job['status']}: {summary['rows']:,} rows read, "
+                    f"{summary['loaded']:,} loaded, {summary['scored']:,} scored")
+            continue
+        if job["status"] == "failed":
+            st.error(f"Import job {job_id} failed: {job['error']}")
+        metric_cols = st.columns(4)
+        metric_cols[0].metric("Rows", f"{summary['rows']:,}")
+        metric_cols[1].metric("Loaded", f"{summary['loaded']:,}")
+        metric_cols[2].metric("Rejected", f"{summary['rejected']:,}")
+        metric_cols[3].metric("Scored", f"{summary['scored']:,}")
+        errors = job["report"].errors
+        if len(errors):
+            st.dataframe(errors, use_container_width=True, hide_index=True)
+            st.download_button("Download Error Report", errors.to_csv(index=False),
+                               file_name="supplier_import_errors.csv", mime="text/csv", key=f"import_errors_{job_id}")
+        if summary['loaded'] and job_id not in st.session_state.onboarded:
+            # Reload the dashboard data once the imported rows are in
+            st.session_state.onboarded.add(job_id)
+            load_supplier_data.clear()
 
 # Load data
 try:
@@ -216,21 +344,24 @@ if mode == "Dashboard":
         st.error(f"Missing required columns: {missing_columns}")
         st.stop()
 
+    # Sidebar filters are answered from a categorical/bitmap index built once per loaded frame
+    filter_index = get_filter_index(df, df.attrs.get('build_id'), len(df))
+
     # Multi-select filters
     countries = st.sidebar.multiselect("🌏 Countries",
-                                    options=sorted(df["country"].unique()),
+                                    options=filter_index.options("country"),
                                     default=[])
 
     regions = st.sidebar.multiselect("🗺️ Regions",
-                                    options=sorted(df["region"].unique()),
+                                    options=filter_index.options("region"),
                                     default=[])
 
     categories = st.sidebar.multiselect("📦 Product Categories",
-                                    options=sorted(df["product_category"].unique()),
+                                    options=filter_index.options("product_category"),
                                     default=[])
 
     recommendations = st.sidebar.multiselect("⭐ Recommendations",
-                                            options=sorted(df["recommendation"].unique()),
+                                            options=filter_index.options("recommendation"),
                                             default=[])
 
     # Score threshold slider
@@ -241,7 +372,7 @@ if mode == "Dashboard":
 
     # Risk level filter
     risk_levels = st.sidebar.multiselect("⚠️ Risk Levels",
-                                        options=sorted(df["risk_level"].unique()),
+                                        options=filter_index.options("risk_level"),
                                         default=[])
 
     st.sidebar.markdown("---")
@@ -250,20 +381,16 @@ if mode == "Dashboard":
     show_financial_metrics = st.sidebar.checkbox("Show Financial Metrics", value=True)
 
     # Apply filters
-    filtered_df = df.copy()
+    sidebar_filters = {'country': countries, 'region': regions, 'product_category': categories,
+                       'recommendation': recommendations, 'risk_level': risk_levels}
+    filtered_df = filter_index.filter(df, sidebar_filters, min_score)
 
-    if countries:
-        filtered_df = filtered_df[filtered_df["country"].isin(countries)]
-    if regions:
-        filtered_df = filtered_df[filtered_df["region"].isin(regions)]
-    if categories:
-        filtered_df = filtered_df[filtered_df["product_category"].isin(categories)]
-    if recommendations:
-        filtered_df = filtered_df[filtered_df["recommendation"].isin(recommendations)]
-    if risk_levels:
-        filtered_df = filtered_df[filtered_df["risk_level"].isin(risk_levels)]
-
-    filtered_df = filtered_df[filtered_df["total_eco_score"] >= min_score]
+    # KPIs and aggregate charts come from the pre-aggregated cube instead of rescanning rows
+    cube = get_supplier_cube()
+    # Skips re-syncing while the loaded frame is unchanged
+    cube.sync(df, df.attrs.get('build_id'))
+    kpis = cube.kpis(sidebar_filters, min_score)
+    overall = cube.kpis()
 
     # KPI Dashboard
     st.markdown("## 📈 Key Performance Indicators")
@@ -272,27 +399,27 @@ if mode == "Dashboard":
 
     with col1:
         st.metric("🏢 Total Suppliers",
-                len(filtered_df),
-                delta=f"{len(filtered_df) - len(df)} from total")
+                kpis['suppliers'],
+                delta=f"{kpis['suppliers'] - overall['suppliers']} from total")
 
     with col2:
-        preferred_pct = (filtered_df['recommendation'].eq('Preferred').mean() * 100) if len(filtered_df) > 0 else 0
+        preferred_pct = kpis['preferred_pct']
         st.metric("⭐ Preferred (%)",
                 f"{preferred_pct:.1f}%")
 
     with col3:
-        avg_score = filtered_df['total_eco_score'].mean() if len(filtered_df) > 0 else 0
+        avg_score = kpis['avg_score']
         st.metric("🎯 Avg Eco Score",
                 f"{avg_score:.1f}",
-                delta=f"{avg_score - df['total_eco_score'].mean():.1f}")
+                delta=f"{avg_score - overall['avg_score']:.1f}")
 
     with col4:
-        total_volume = filtered_df['annual_volume'].sum() if len(filtered_df) > 0 else 0
+        total_volume = kpis['total_volume']
         st.metric("📦 Annual Volume",
                 f"${total_volume/1000000:.1f}M")
 
     with col5:
-        avg_premium = filtered_df['cost_premium'].mean() if len(filtered_df) > 0 else 0
+        avg_premium = kpis['avg_premium']
         st.metric("💰 Avg Premium",
                 f"{avg_premium:.1f}%")
 
@@ -375,8 +502,10 @@ if mode == "Dashboard":
             with col1:
                 # Eco Score Distribution
                 st.markdown("#### 📈 Eco Score Distribution")
-                fig_hist = px.histogram(filtered_df, x="total_eco_score", nbins=15,
+                score_buckets = cube.group([BUCKET, 'recommendation'], sidebar_filters, min_score)
+                fig_hist = px.histogram(score_buckets, x=BUCKET, y="count", histfunc="sum", nbins=15,
                                     color="recommendation",
+                                    labels={BUCKET: "total_eco_score", "count": "count"},
                                     title="Distribution of Sustainability Scores",
                                     color_discrete_map={
                                         'Preferred': '#28a745',
@@ -390,7 +519,7 @@ if mode == "Dashboard":
 
                 # Geographic Distribution
                 st.markdown("#### 🗺️ Suppliers by Region")
-                region_data = filtered_df['region'].value_counts().reset_index()
+                region_data = cube.group('region', sidebar_filters, min_score)[['region', 'count']]
                 region_data.columns = ['Region', 'Count']
                 fig_pie = px.pie(region_data, values='Count', names='Region',
                             title="Supplier Distribution by Region")
@@ -400,7 +529,7 @@ if mode == "Dashboard":
             with col2:
                 # Category Performance
                 st.markdown("#### 📊 Performance by Category")
-                category_avg = filtered_df.groupby('product_category')['total_eco_score'].mean().reset_index()
+                category_avg = cube.group('product_category', sidebar_filters, min_score)[['product_category', 'total_eco_score']]
                 fig_bar = px.bar(category_avg, x='product_category', y='total_eco_score',
                             title="Average Eco Score by Product Category",
                             color='total_eco_score',
@@ -425,10 +554,8 @@ if mode == "Dashboard":
             # Sub-category Analysis
             if 'sub_category' in filtered_df.columns:
                 st.markdown("#### 📊 Sub-Category Performance")
-                subcategory_performance = filtered_df.groupby('sub_category').agg({
-                    'total_eco_score': 'mean',
-                    'supplier_name': 'count'
-                }).round(2).reset_index()
+                subcategory_performance = cube.group('sub_category', sidebar_filters, min_score).dropna(subset=['sub_category'])
+                subcategory_performance = subcategory_performance[['sub_category', 'total_eco_score', 'count']].round(2)
                 subcategory_performance.columns = ['Sub Category', 'Avg Score', 'Count']
                 subcategory_performance = subcategory_performance.sort_values('Avg Score', ascending=False)
 
@@ -546,11 +673,18 @@ if mode == "Dashboard":
                         st.markdown("#### 📸 Product Image")
                         try:
                             with st.spinner("🔄 Retrieving Product Image..."):
-                                image = image_reader(supplier_data['image_url'])
-                                st.image(image,width=200)
+                                images = get_image_service().thumbnails(supplier_data['image_url'])
+                                if not images:
+                                    raise ValueError("No image could be loaded")
+                                st.image(images,width=200)
                         except Exception as e:
                             st.info("Product image not available. Please check your Internet Connection")
 
+                    # Warm the image cache for the suppliers listed after this one, once this one is on screen
+                    if 'image_url' in filtered_df.columns:
+                        position = supplier_names.index(selected_supplier)
+                        get_image_service().prefetch(filtered_df['image_url'].iloc[position + 1:position + 6].dropna())
+
                     st.markdown("#### Key Information")
 
                     info_items = [
@@ -582,10 +716,11 @@ if mode == "Dashboard":
                     }
                     st.markdown(f"### {color_map.get(rec, '⚪')} Recommendation: **{rec}**")
 
-                    # Show audit summary if available
-                    if 'audit_summary' in supplier_data and pd.notna(supplier_data['audit_summary']):
+                    # Show audit summary if available (fetched only for the selected supplier)
+                    details = load_supplier_details(supplier_data['supplier_id'], ('audit_summary',))
+                    if details is not None and pd.notna(details['audit_summary']):
                         st.markdown("#### 📋 Latest Audit Summary")
-                        st.text_area("", value=supplier_data['audit_summary'], height=100, disabled=True)
+                        st.text_area("", value=details['audit_summary'], height=100, disabled=True)
 
         else:
             st.warning("No suppliers available for detailed analysis.")
@@ -685,13 +820,12 @@ if mode == "Dashboard":
 
                     # Calculate new scores (only if detailed scores exist)
                     detailed_score_cols = ["carbon_score", "water_score", "waste_score", "social_score"]
-                    if all(col in base_data.index for col in detailed_score_cols):
-                        new_carbon = min(100, base_data['carbon_score'] * (1 + carbon_improvement/100))
-                        new_water = min(100, base_data['water_score'] * (1 + water_improvement/100))
-                        new_waste = min(100, base_data['waste_score'] * (1 + waste_improvement/100))
-                        new_social = min(100, base_data['social_score'] * (1 + social_improvement/100))
-
-                        new_total_score = (new_carbon + new_water + new_waste + new_social) / 4
+                    if all(col in base_data.index for col in detailed_score_cols) and base_data[detailed_score_cols].notna().all():
+                        scenario = [[carbon_improvement, water_improvement, waste_improvement, social_improvement]]
+                        result = simulate(base_data.to_frame().T, scenario)
+                        new_carbon, new_water, new_waste, new_social = result.subscores[0, 0]
+                        # The model's change is applied to the stored score, so Current and Projected stay comparable
+                        new_total_score = min(100, base_data['total_eco_score'] + result.delta()[0, 0])
                     else:
                         # Use base score with average improvement if detailed scores not available
                         avg_improvement = (carbon_improvement + water_improvement + waste_improvement + social_improvement) / 4
@@ -708,7 +842,7 @@ if mode == "Dashboard":
                     st.markdown("#### Simulation Results")
 
                     # Before vs After comparison
-                    if all(col in base_data.index for col in detailed_score_cols):
+                    if all(col in base_data.index for col in detailed_score_cols) and base_data[detailed_score_cols].notna().all():
                         comparison_data = pd.DataFrame({
                             'Metric': ['Carbon', 'Water', 'Waste', 'Social', 'Overall'],
                             'Current': [base_data['carbon_score'], base_data['water_score'],
@@ -749,6 +883,29 @@ if mode == "Dashboard":
                             st.metric("💰 Estimated ROI", f"{roi_value:.1f}x")
                     else:
                         st.warning("No improvement projected with current settings.")
+
+            # Portfolio sweep: every filtered supplier under every uniform improvement level in one batch
+            if all(col in filtered_df.columns for col in SUBSCORE_COLUMNS):
+                st.markdown("#### Portfolio What-If Sweep")
+                sweep_threshold = st.slider("Target Eco Score", 50, 100, 80)
+                sweep = portfolio_sweep(filtered_df, df.attrs.get('build_id'), sidebar_filters, min_score)
+                sweep_summary = sweep.summary(sweep_threshold)
+                sweep_summary['Improvement (%)'] = sweep_summary['carbon_score_improvement']
+                if sweep_summary.empty:
+                    st.info("None of the filtered suppliers has all four subscores to simulate.")
+                else:
+                    sweep_col1, sweep_col2 = st.columns(2)
+                    with sweep_col1:
+                        fig_sweep = px.line(sweep_summary, x='Improvement (%)', y='mean_delta', markers=True,
+                                            title="Average Eco Score Change Across The Portfolio",
+                                            labels={'mean_delta': 'Average score change'})
+                        st.plotly_chart(fig_sweep, use_container_width=True)
+                    with sweep_col2:
+                        fig_target = px.bar(sweep_summary, x='Improvement (%)', y='suppliers_at_threshold',
+                                            title=f"Suppliers Reaching {sweep_threshold}",
+                                            labels={'suppliers_at_threshold': 'Suppliers'})
+                        st.plotly_chart(fig_target, use_container_width=True)
+                    st.caption(f"{sweep.shape[0]:,} suppliers x {sweep.shape[1]} scenarios scored by {sweep.scored_by}")
         else:
             st.info("Select suppliers using the filters to run simulations.")
 
@@ -818,14 +975,7 @@ elif mode == "AI Assistant":
         if user_query.strip() == "":
             st.warning("⚠️ Please enter a query before running.")
         else:
-            with st.spinner("🔄 AI is Thinking..."):
-                st.session_state["messages"].append({"role": "user", "content": user_query})
-                response = run_ai_query(user_query)
-                if response is None:
-                    response = "Oops Assistant Can't Answer At The Moment, Check Internet Connection and Retry"
-
-                # Store the response and enable copy button
-                st.session_state.last_response = response
+            st.session_state["messages"].append({"role": "user", "content": user_query})
 
             # Display AI response
             st.markdown("""
@@ -833,7 +983,16 @@ elif mode == "AI Assistant":
                 <h3>🤖 AI Response</h3>
             </div>
             """, unsafe_allow_html=True)
-            st.write(response)
+            timer = StreamTimer("AI Assistant")
+            response = st.write_stream(stream_ai_query(user_query, timer))
+            if not response:
+                response = "Oops Assistant Can't Answer At The Moment, Check Internet Connection and Retry"
+                st.write(response)
+            elif timer.ttft is not None:
+                st.caption(f"⏱️ First token in {timer.ttft:.2f}s · full answer in {timer.total:.2f}s")
+
+            # Store the response and enable copy button
+            st.session_state.last_response = response
             st.session_state["messages"].append({"role": "assistant", "content": response})
 
 elif mode == "Add New Supplier":
@@ -919,31 +1078,47 @@ elif mode == "Add New Supplier":
                     'uploaded_images': uploaded_images if uploaded_images else []
                 }
 
-                with st.spinner("🔄 Adding Supplier, This may take a while..."):
-                    condition = update_supplier(new_supplier)
-                    if condition is False:
-                        st.error("Oops You Currently Don't Have Access To Database, Contact Developer")
-                    else:
-                        # Clear cache to reload data
-                        load_supplier_data.clear()
-
-                        # Success message
-                        st.markdown(f'''
-                        <div class="success-message">
-                            ✅ Supplier "{supplier_name}" added successfully!<br>
-                        </div>
-                        ''', unsafe_allow_html=True)
-
-                        st.balloons()
-
-                        # Show summary
-                        st.markdown("### 📊 Supplier Summary")
-                        summary_data = pd.DataFrame([{
-                            'Field': k.replace('_', ' ').title(),
-                            'Value': str(v) if not isinstance(v, list) else ', '.join(v) if v else 'None'
-                        } for k, v in new_supplier.items() if k not in ['uploaded_images']])
-
-                        st.dataframe(summary_data, use_container_width=True, hide_index=True)
+                job_id = submit_supplier(new_supplier)
+                if job_id is None:
+                    st.error("Oops You Currently Don't Have Access To Database, Contact Developer")
+                else:
+                    st.session_state.onboarding_jobs.append(job_id)
+
+                    # Success message
+                    st.markdown(f'''
+                    <div class="success-message">
+                        ✅ Supplier "{supplier_name}" queued for onboarding (job {job_id})!<br>
+                    </div>
+                    ''', unsafe_allow_html=True)
+
+                    st.balloons()
+
+                    # Show summary
+                    st.markdown("### 📊 Supplier Summary")
+                    summary_data = pd.DataFrame([{
+                        'Field': k.replace('_', ' ').title(),
+                        'Value': str(v) if not isinstance(v, list) else ', '.join(v) if v else 'None'
+                    } for k, v in new_supplier.items() if k not in ['uploaded_images']])
+
+                    st.dataframe(summary_data, use_container_width=True, hide_index=True)
+
+    if st.session_state.onboarding_jobs:
+        st.markdown("### ⏳ Onboarding Progress")
+        onboarding_progress()
+
+    with st.expander("📥 Bulk Import From CSV / Parquet"):
+        st.caption("One row per supplier with the same fields as the form above; certification as text, "
+                   "last_audit as YYYY-MM-DD. Rows are validated, loaded in chunks, then embedded and scored.")
+        bulk_file = st.file_uploader("Supplier file", type=["csv", "parquet"], key="bulk_import_file")
+        dry_run = st.checkbox("Validate only", value=True)
+        if bulk_file is not None and st.button("📥 Import Suppliers"):
+            # The import runs on the background engine; the fragment below follows it
+            try:
+                st.session_state.import_jobs.append(get_onboarding_engine().submit_import(bulk_file, dry_run=dry_run))
+            except Exception as e:
+                st.error(f"Import failed: {e}")
+        if st.session_state.import_jobs:
+            import_progress()
 
 
 # Footer
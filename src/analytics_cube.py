@@ -0,0 +1,222 @@
+import logging
+import threading
+import time
+import numpy as np
+import pandas as pd
+
+logging.basicConfig(level = logging.INFO)
+
+DIMENSIONS = ['country', 'region', 'product_category', 'sub_category', 'risk_level', 'recommendation']
+MEASURES = ['total_eco_score', 'carbon_score', 'water_score', 'waste_score', 'social_score',
+            'annual_volume', 'cost_premium']
+SCORE_COLUMN = 'total_eco_score'
+BUCKET = 'score_bucket'
+BUCKET_WIDTH = 1.0
+
+# Per-cell values: row count, then the sum and the non-null count of every measure
+VALUE_COLUMNS = ['n'] + [f'{m}_sum' for m in MEASURES] + [f'{m}_count' for m in MEASURES]
+KEYS = DIMENSIONS + [BUCKET]
+
+
+class SupplierCube:
+    ''' Class To Answer Dashboard Aggregates From A Pre-Aggregated Cube
+
+    Rows are rolled up into cells keyed by DIMENSIONS plus a total_eco_score
+    bucket, each cell holding the row count and the sum and non-null count of
+    every measure. A filter combination is answered by adding up the matching
+    cells; a minimum score only needs the rows of the one bucket it falls inside.
+    Because cells are sums, new or changed suppliers are applied as a delta
+    (subtract their old rows, add the new ones) rather than rebuilding.
+    '''
+    def __init__(self, bucket_width = BUCKET_WIDTH):
+        self.bucket_width = bucket_width
+        self.cells = None
+        self.rows = None
+        self.version = None
+        self._lock = threading.RLock()
+
+    def _prepare(self, df):
+        ''' Function To Keep The Columns The Cube Needs, Plus The Score Bucket And A Row Hash, By supplier_id '''
+        rows = pd.DataFrame({col: df[col].to_numpy() if col in df.columns else np.nan for col in DIMENSIONS + MEASURES},
+                            index=df['supplier_id'].astype(str).to_numpy())
+        rows = rows[~rows.index.duplicated(keep='last')]
+        rows[BUCKET] = np.floor(rows[SCORE_COLUMN] / self.bucket_width) * self.bucket_width
+        rows['_hash'] = pd.util.hash_pandas_object(rows[DIMENSIONS + MEASURES], index=False).to_numpy()
+        return rows
+
+    def _aggregate(self, rows):
+        ''' Function To Roll Rows Up Into Cells '''
+        grouped = rows.groupby(KEYS, dropna=False, observed=True, sort=False)
+        cells = pd.concat([grouped.size().rename('n'),
+                           grouped[MEASURES].sum(min_count=1).fillna(0.0).add_suffix('_sum'),
+                           grouped[MEASURES].count().add_suffix('_count')], axis=1)
+        return cells.reset_index()
+
+    def _index(self):
+        ''' Function To Encode The Cells As Integer Codes And A Value Matrix For Fast Selection '''
+        self._codes, self._labels = {}, {}
+        for key in KEYS:
+            codes, labels = pd.factorize(self.cells[key], use_na_sentinel=False)
+            self._codes[key], self._labels[key] = codes, pd.Index(labels)
+        self._values = self.cells[VALUE_COLUMNS].to_numpy(dtype=np.float64)
+        self._bucket = self.cells[BUCKET].to_numpy(dtype=np.float64)
+        self._bucket_positions = self.rows.groupby(BUCKET, dropna=True).indices
+
+    def build(self, df, version = None):
+        ''' Function To Build The Cube From Supplier Rows '''
+        start = time.perf_counter()
+        with self._lock:
+            self.rows = self._prepare(df)
+            self.cells = self._aggregate(self.rows)
+            self.version = version
+            self._index()
+        logging.info(f" Analytics cube built: {len(self.rows)} rows -> {len(self.cells)} cells "
+                     f"in {(time.perf_counter() - start) * 1000:.1f}ms")
+
+    def _apply_delta(self, removed, added):
+        ''' Function To Subtract Removed Rows And Add New Rows To The Cells '''
+        parts = [self.cells]
+        if len(removed):
+            negative = self._aggregate(removed)
+            negative[VALUE_COLUMNS] = -negative[VALUE_COLUMNS]
+            parts.append(negative)
+        if len(added):
+            parts.append(self._aggregate(added))
+        if len(parts) == 1:
+            return
+        merged = pd.concat(parts, ignore_index=True).groupby(KEYS, dropna=False, observed=True, sort=False).sum()
+        self.cells = merged[merged['n'] > 0].reset_index()
+
+    def add(self, df):
+        ''' Function To Add New Suppliers To The Cube '''
+        with self._lock:
+            added = self._prepare(df)
+            self.rows = pd.concat([self.rows, added])
+            self._apply_delta(added.iloc[:0], added)
+            self._index()
+
+    def sync(self, df, version = None):
+        ''' Function To Bring The Cube Up To Date With The Latest Supplier Rows
+        Nothing is done when version matches the last sync; otherwise only new,
+        changed and removed suppliers (found by row hash) are applied to the cells.
+        Returns:
+            bool: whether the cube changed
+        '''
+        with self._lock:
+            if self.rows is None:
+                self.build(df, version)
+                return True
+            if version is not None and version == self.version:
+                return False
+
+            start = time.perf_counter()
+            fresh, old = self._prepare(df), self.rows
+            old_hash = pd.Series(old['_hash'].to_numpy(), index=old.index)
+            previous = old_hash.reindex(fresh.index).to_numpy()
+            changed = ~(previous == fresh['_hash'].to_numpy())
+
+            added = fresh[changed]
+            removed = old.loc[old.index.difference(fresh.index[~changed])]
+            self._apply_delta(removed, added)
+            self.rows = fresh
+            self.version = version
+            self._index()
+            logging.info(f" Analytics cube synced: -{len(removed)} +{len(added)} rows "
+                         f"in {(time.perf_counter() - start) * 1000:.1f}ms")
+            return bool(len(removed) or len(added))
+
+    def _cell_mask(self, filters):
+        mask = np.ones(len(self._values), dtype=bool)
+        for col, values in (filters or {}).items():
+            if values:
+                if col not in DIMENSIONS:
+                    raise ValueError(f"Unsupported cube filter: {col}")
+                allowed = np.flatnonzero(self._labels[col].isin(values))
+                mask &= np.isin(self._codes[col], allowed)
+        return mask
+
+    def _selection(self, filters, min_score):
+        ''' Function To Return (codes by key, values) For The Cells Matching A Filter Combination '''
+        mask = self._cell_mask(filters)
+        if min_score is None:
+            return {key: codes[mask] for key, codes in self._codes.items()}, self._values[mask]
+
+        edge = np.floor(min_score / self.bucket_width) * self.bucket_width
+        if min_score == edge:
+            mask &= self._bucket >= edge
+            return {key: codes[mask] for key, codes in self._codes.items()}, self._values[mask]
+
+        # Cells above the bucket holding min_score pass whole; that bucket is rebuilt from its rows
+        mask &= self._bucket > edge
+        positions = self._bucket_positions.get(edge)
+        boundary = self.rows.iloc[positions] if positions is not None else self.rows.iloc[:0]
+        keep = boundary[SCORE_COLUMN].to_numpy(dtype=np.float64) >= min_score
+        for col, values in (filters or {}).items():
+            if values:
+                keep &= boundary[col].isin(values).to_numpy()
+        partial = self._aggregate(boundary[keep])
+
+        codes = {key: np.concatenate([codes[mask], self._labels[key].get_indexer(partial[key])])
+                 for key, codes in self._codes.items()}
+        values = np.vstack([self._values[mask], partial[VALUE_COLUMNS].to_numpy(dtype=np.float64)])
+        return codes, values
+
+    def select(self, filters = None, min_score = None):
+        ''' Function To Return The Cells Matching A Filter Combination
+        Args:
+            filters: dict of dimension -> allowed values; empty lists are ignored
+            min_score: keep suppliers with total_eco_score >= min_score
+        Returns:
+            DataFrame of cells (DIMENSIONS, score_bucket, n, <measure>_sum, <measure>_count)
+        '''
+        with self._lock:
+            codes, values = self._selection(filters, min_score)
+            cells = pd.DataFrame({key: self._labels[key].take(codes[key]) for key in KEYS})
+            cells[VALUE_COLUMNS] = values
+            return cells
+
+    def kpis(self, filters = None, min_score = None):
+        ''' Function To Compute The Dashboard KPIs For A Filter Combination
+        Returns:
+            dict with suppliers, preferred_pct, avg_score, total_volume and avg_premium
+        '''
+        with self._lock:
+            codes, values = self._selection(filters, min_score)
+            preferred_code = self._labels['recommendation'].get_indexer(['Preferred'])[0]
+        totals = dict(zip(VALUE_COLUMNS, values.sum(axis=0)))
+        n = totals['n']
+        def mean(measure):
+            count = totals[f'{measure}_count']
+            return float(totals[f'{measure}_sum'] / count) if count else 0.0
+        preferred = values[codes['recommendation'] == preferred_code, 0].sum() if preferred_code >= 0 else 0
+        return {
+            'suppliers': int(n),
+            'preferred_pct': float(preferred / n * 100) if n else 0.0,
+            'avg_score': mean(SCORE_COLUMN),
+            'total_volume': float(totals['annual_volume_sum']),
+            'avg_premium': mean('cost_premium'),
+        }
+
+    def group(self, by, filters = None, min_score = None, measures = (SCORE_COLUMN,)):
+        ''' Function To Aggregate A Filter Combination By One Or More Dimensions (or score_bucket)
+        Returns:
+            DataFrame with the by columns, count and the mean of each measure
+        '''
+        by = [by] if isinstance(by, str) else list(by)
+        with self._lock:
+            codes, values = self._selection(filters, min_score)
+            labels = {key: self._labels[key] for key in by}
+        if len(values) == 0:
+            return pd.DataFrame(columns=by + ['count'] + list(measures))
+
+        combined = np.ravel_multi_index([codes[key] for key in by], [len(labels[key]) for key in by])
+        groups, inverse = np.unique(combined, return_inverse=True)
+        result = pd.DataFrame({key: labels[key].take(level)
+                               for key, level in zip(by, np.unravel_index(groups, [len(labels[k]) for k in by]))})
+        result['count'] = np.bincount(inverse, weights=values[:, 0]).astype(int)
+        for measure in measures:
+            sums = np.bincount(inverse, weights=values[:, VALUE_COLUMNS.index(f'{measure}_sum')])
+            counts = np.bincount(inverse, weights=values[:, VALUE_COLUMNS.index(f'{measure}_count')])
+            with np.errstate(invalid='ignore', divide='ignore'):
+                result[measure] = np.where(counts > 0, sums / counts, np.nan)
+        return result[result['count'] > 0].reset_index(drop=True)
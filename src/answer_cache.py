@@ -0,0 +1,167 @@
+from collections import OrderedDict
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import numpy as np
+
+logging.basicConfig(level = logging.INFO)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BASE_DIR)
+ANSWER_CACHE_PATH = os.path.join(PROJECT_ROOT, 'cache', 'answers.sqlite')
+
+MAX_MEMORY_ENTRIES = 256
+MAX_STORED_ENTRIES = 5000
+ANSWER_TTL_SECONDS = 24 * 60 * 60
+SIMILARITY_THRESHOLD = 0.95
+
+
+def normalize_prompt(prompt):
+    ''' Function To Normalise A Prompt So Trivially Different Phrasings Share A Key '''
+    prompt = re.sub(r'\s+', ' ', prompt.strip().lower())
+    return prompt.rstrip(' .?!')
+
+
+class AnswerCache:
+    ''' Class To Cache AI Assistant Answers Per Normalised Prompt And Supplier Data Version
+
+    Entries live in an in-memory LRU backed by a SQLite file, expire after ttl
+    seconds, and are keyed on the data version so any write through Update
+    (which calls invalidate()) makes older answers unreachable. When embed_fn is
+    given, a miss falls back to the most similar cached prompt above threshold.
+    '''
+    def __init__(self, path = ANSWER_CACHE_PATH, ttl = ANSWER_TTL_SECONDS,
+                 max_memory = MAX_MEMORY_ENTRIES, max_stored = MAX_STORED_ENTRIES,
+                 embed_fn = None, threshold = SIMILARITY_THRESHOLD):
+        self.path = path
+        self.ttl = ttl
+        self.max_memory = max_memory
+        self.max_stored = max_stored
+        self.embed_fn = embed_fn
+        self.threshold = threshold
+        self._memory = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute('''CREATE TABLE IF NOT EXISTS answers (
+            key TEXT PRIMARY KEY, prompt TEXT, version INTEGER, response TEXT,
+            embedding BLOB, created_at REAL, last_used REAL)''')
+        self._db.execute('CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER)')
+        self._db.execute("INSERT OR IGNORE INTO meta VALUES ('data_version', 0)")
+        self._db.commit()
+
+    def data_version(self):
+        ''' Function To Return The Supplier Data Version Shared Through The Backing Store '''
+        with self._lock:
+            return self._db.execute("SELECT value FROM meta WHERE name = 'data_version'").fetchone()[0]
+
+    def _key(self, prompt, version):
+        return hashlib.sha256(f"{version}:{normalize_prompt(prompt)}".encode()).hexdigest()
+
+    def _embed(self, prompt):
+        vector = np.asarray(self.embed_fn(normalize_prompt(prompt)), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory:
+            self._memory.popitem(last=False)
+
+    def _similar(self, prompt, version, now):
+        ''' Function To Find The Closest Cached Prompt Of The Same Version By Cosine Similarity '''
+        rows = self._db.execute(
+            'SELECT key, response, embedding, created_at FROM answers '
+            'WHERE version = ? AND embedding IS NOT NULL AND created_at > ?',
+            (version, now - self.ttl)).fetchall()
+        if not rows:
+            return None
+        query = self._embed(prompt)
+        matrix = np.vstack([np.frombuffer(row[2], dtype=np.float32) for row in rows])
+        scores = matrix @ query
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            return None
+        logging.info(f"Answer cache near-duplicate hit (similarity {scores[best]:.3f})")
+        return rows[best]
+
+    def get(self, prompt):
+        ''' Function To Return A Cached Answer For The Prompt Or None '''
+        now = time.time()
+        with self._lock:
+            version = self.data_version()
+            key = self._key(prompt, version)
+
+            entry = self._memory.get(key)
+            if entry is None:
+                row = self._db.execute('SELECT response, created_at FROM answers WHERE key = ?', (key,)).fetchone()
+                if row is None and self.embed_fn is not None:
+                    similar = self._similar(prompt, version, now)
+                    if similar is not None:
+                        key, row = similar[0], (similar[1], similar[3])
+                if row is not None:
+                    entry = {'response': row[0], 'created_at': row[1]}
+
+            if entry is None or now - entry['created_at'] > self.ttl:
+                self.misses += 1
+                return None
+
+            self._remember(key, entry)
+            self._db.execute('UPDATE answers SET last_used = ? WHERE key = ?', (now, key))
+            self._db.commit()
+            self.hits += 1
+            return entry['response']
+
+    def put(self, prompt, response):
+        ''' Function To Store An Answer For The Prompt Under The Current Data Version '''
+        now = time.time()
+        with self._lock:
+            version = self.data_version()
+            key = self._key(prompt, version)
+            embedding = self._embed(prompt).tobytes() if self.embed_fn is not None else None
+            self._db.execute('INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?, ?, ?, ?)',
+                             (key, normalize_prompt(prompt), version, response, embedding, now, now))
+            # Evict the least recently used rows beyond the store limit
+            self._db.execute('DELETE FROM answers WHERE key IN (SELECT key FROM answers '
+                             'ORDER BY last_used DESC LIMIT -1 OFFSET ?)', (self.max_stored,))
+            self._db.commit()
+            self._remember(key, {'response': response, 'created_at': now})
+
+    def invalidate(self):
+        ''' Function To Bump The Data Version So Every Cached Answer Is Bypassed '''
+        with self._lock:
+            self._db.execute("UPDATE meta SET value = value + 1 WHERE name = 'data_version'")
+            self._db.execute('DELETE FROM answers WHERE version < (SELECT value FROM meta WHERE name = ?)',
+                             ('data_version',))
+            self._db.commit()
+            self._memory.clear()
+            logging.info("Answer cache invalidated")
+
+    def stats(self):
+        ''' Function To Report Hit And Miss Counts '''
+        with self._lock:
+            stored = self._db.execute('SELECT COUNT(*) FROM answers').fetchone()[0]
+            return {'hits': self.hits, 'misses': self.misses, 'memory_entries': len(self._memory),
+                    'stored_entries': stored, 'data_version': self.data_version()}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_answer_cache():
+    ''' Function To Return The Process-Wide Answer Cache '''
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = AnswerCache()
+    return _cache
@@ -0,0 +1,276 @@
+from google.cloud import bigquery
+from google.cloud.bigquery_storage import types
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import logging
+import queue
+import threading
+import time
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+from src.clients import get_provider
+from src.features import EMBEDDING_COLUMN, EMBEDDING_DIM, embedding_matrix
+
+logging.basicConfig(level = logging.INFO)
+
+DEFAULT_STREAMS = 8
+# Record batches buffered between the stream readers and the consumer
+QUEUE_BATCHES = 32
+SUPPLIER_TABLE = 'ecochain123.supplychain.suppliers_with_images'
+
+
+def fixed_size_embeddings(column, dim = EMBEDDING_DIM):
+    ''' Function To Convert A REPEATED FLOAT Column Into fixed_size_list<float32, dim>
+    The values buffer is cast once in Arrow, never through Python floats. BigQuery
+    returns an empty list for a supplier without an embedding; those rows become null.
+    Args:
+        column: Arrow list, large list or fixed-size list array, or a chunked array of them
+    Returns:
+        array or chunked array of the same length with type fixed_size_list<float32, dim>
+    '''
+    if isinstance(column, pa.ChunkedArray):
+        return pa.chunked_array([fixed_size_embeddings(chunk, dim) for chunk in column.chunks],
+                                type=pa.list_(pa.float32(), dim))
+    if pa.types.is_fixed_size_list(column.type):
+        if column.type.list_size != dim:
+            raise ValueError(f"Expected {dim}-dim embeddings, got {column.type.list_size}")
+        return column if column.type.value_type == pa.float32() else column.cast(pa.list_(pa.float32(), dim))
+    if not (pa.types.is_list(column.type) or pa.types.is_large_list(column.type)):
+        raise ValueError(f"{EMBEDDING_COLUMN} must be a list column, got {column.type}")
+
+    lengths = pc.list_value_length(column).fill_null(0).to_numpy(zero_copy_only=False)
+    present = lengths != 0
+    if (lengths[present] != dim).any():
+        raise ValueError(f"Expected {dim}-dim embeddings in every row")
+    # list_flatten skips null lists and empty ones contribute nothing, leaving present rows in order
+    values = pc.list_flatten(column).cast(pa.float32())
+    if present.all():
+        return pa.FixedSizeListArray.from_arrays(values, dim)
+    padded = np.zeros((len(column), dim), dtype=np.float32)
+    padded[present] = values.to_numpy(zero_copy_only=False).reshape(-1, dim)
+    return pa.FixedSizeListArray.from_arrays(pa.array(padded.ravel()), dim, mask=pa.array(~present))
+
+
+def normalize_embeddings(data, dim = EMBEDDING_DIM):
+    ''' Function To Return A Table Or RecordBatch With text_embedding As fixed_size_list<float32, dim> '''
+    if EMBEDDING_COLUMN not in data.schema.names:
+        return data
+    i = data.schema.get_field_index(EMBEDDING_COLUMN)
+    column = fixed_size_embeddings(data.column(i), dim)
+    return data.set_column(i, pa.field(EMBEDDING_COLUMN, column.type), column)
+
+
+def _table_path(table):
+    ''' Function To Return The Storage API Path Of A Table Reference Or project.dataset.table String '''
+    if isinstance(table, str):
+        table = bigquery.TableReference.from_string(table.strip('`'))
+    return f"projects/{table.project}/datasets/{table.dataset_id}/tables/{table.table_id}"
+
+
+class ArrowFetcher:
+    ''' Class To Read BigQuery Tables And Query Results As Arrow Through The Storage Read API
+
+    A read session is split into up to max_streams streams that are read side by
+    side, each yielding LZ4-compressed Arrow record batches, so nothing goes
+    through JSON pages or pandas. Batches come back in the order streams deliver
+    them, not in table order, with text_embedding as fixed_size_list<float32>.
+    '''
+    def __init__(self, client = None, read_client = None, max_streams = DEFAULT_STREAMS):
+        self._client = client
+        self._read_client = read_client
+        self.max_streams = max_streams
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = get_provider().bigquery_client()
+        return self._client
+
+    @property
+    def read_client(self):
+        if self._read_client is None:
+            self._read_client = get_provider().bigquery_read_client()
+        return self._read_client
+
+    def _session(self, table, columns, row_restriction, max_streams):
+        session = types.ReadSession(table=_table_path(table), data_format=types.DataFormat.ARROW)
+        if columns:
+            session.read_options.selected_fields = list(columns)
+        if row_restriction:
+            session.read_options.row_restriction = row_restriction
+        session.read_options.arrow_serialization_options.buffer_compression = \
+            types.ArrowSerializationOptions.CompressionCodec.LZ4_FRAME
+        return self.read_client.create_read_session(parent=f"projects/{self.client.project}",
+                                                    read_session=session,
+                                                    max_stream_count=max_streams or self.max_streams)
+
+    def _schema(self, session):
+        schema = pa.ipc.read_schema(pa.py_buffer(session.arrow_schema.serialized_schema))
+        return normalize_embeddings(schema.empty_table()).schema
+
+    def _read(self, session):
+        if not session.streams:
+            return
+        batches = queue.Queue(maxsize=QUEUE_BATCHES)
+        stop = threading.Event()
+        done = object()
+
+        def put(item):
+            while not stop.is_set():
+                try:
+                    batches.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def read(stream):
+            try:
+                for page in self.read_client.read_rows(stream.name).rows(session).pages:
+                    if not put(normalize_embeddings(page.to_arrow())):
+                        return
+                put(done)
+            except BaseException as e:
+                put(e)
+
+        with ThreadPoolExecutor(max_workers=len(session.streams), thread_name_prefix='bigquery-read') as pool:
+            for stream in session.streams:
+                pool.submit(read, stream)
+            try:
+                remaining = len(session.streams)
+                while remaining:
+                    item = batches.get()
+                    if item is done:
+                        remaining -= 1
+                    elif isinstance(item, BaseException):
+                        raise item
+                    else:
+                        yield item
+            finally:
+                # Lets the readers exit if the consumer stopped early or a stream failed
+                stop.set()
+
+    def iter_batches(self, table, columns = None, row_restriction = None, max_streams = None):
+        ''' Function To Stream A Table As Arrow Record Batches From Parallel Read Streams
+        Args:
+            table: TableReference or 'project.dataset.table'
+            columns: columns to read, every column when None
+            row_restriction: SQL filter applied server-side, e.g. "total_eco_score IS NULL"
+        Yields:
+            pyarrow.RecordBatch with text_embedding normalized by fixed_size_embeddings
+        '''
+        yield from self._read(self._session(table, columns, row_restriction, max_streams))
+
+    def read_table(self, table, columns = None, row_restriction = None, max_streams = None):
+        ''' Function To Read A Whole Table (Or Its Filtered Projection) Into One Arrow Table '''
+        session = self._session(table, columns, row_restriction, max_streams)
+        return pa.Table.from_batches(list(self._read(session)), schema=self._schema(session))
+
+    def query(self, query, parameters = None, job_config = None, max_streams = None):
+        ''' Function To Run A Query And Read Its Result Table Through Parallel Read Streams
+        Args:
+            parameters: query parameters, or a ready job_config
+        Returns:
+            pyarrow.Table; row order is only kept for results read through one stream
+        '''
+        if job_config is None and parameters:
+            job_config = bigquery.QueryJobConfig(query_parameters=list(parameters))
+        job = self.client.query(query, job_config=job_config)
+        job.result()
+        return self.read_result(job, max_streams)
+
+    def read_result(self, job, max_streams = None):
+        ''' Function To Read The Result Table Of A Finished Query Job Through Parallel Read Streams '''
+        destination = getattr(job, 'destination', None)
+        if destination is None:
+            # Scripts and DDL have no result table to open a read session on
+            return normalize_embeddings(job.to_arrow())
+        return self.read_table(destination, max_streams=max_streams)
+
+
+_fetcher = None
+_fetcher_lock = threading.Lock()
+
+
+def get_arrow_fetcher():
+    ''' Function To Return The Process-Wide Arrow Fetcher On The Shared Clients '''
+    global _fetcher
+    if _fetcher is None:
+        with _fetcher_lock:
+            if _fetcher is None:
+                _fetcher = ArrowFetcher()
+    return _fetcher
+
+
+def _synthetic_batches(rows, batch_rows, dim = EMBEDDING_DIM, empty_every = 50, seed = 0):
+    ''' Function To Build Record Batches Shaped Like A Read Stream: supplier_id Plus REPEATED FLOAT64 Embeddings '''
+    rng = np.random.default_rng(seed)
+    batches = []
+    for start in range(0, rows, batch_rows):
+        n = min(batch_rows, rows - start)
+        lengths = np.full(n, dim, dtype=np.int32)
+        lengths[::empty_every] = 0
+        offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int32)
+        embeddings = pa.ListArray.from_arrays(pa.array(offsets), pa.array(rng.standard_normal(offsets[-1])))
+        ids = pa.array([f"SUP{i}" for i in range(start, start + n)])
+        batches.append(pa.RecordBatch.from_arrays([ids, embeddings], names=['supplier_id', EMBEDDING_COLUMN]))
+    return batches
+
+
+def benchmark(rows = 200_000, batch_rows = 10_000, dim = EMBEDDING_DIM):
+    ''' Function To Compare Turning Read Batches Into An Embedding Matrix Via pandas And Via Arrow
+    The pandas path is what to_dataframe() gives consumers: a column of per-row
+    arrays stacked afterwards. The Arrow path casts each batch to fixed-size
+    float32 and hands the buffer to embedding_matrix.
+    Returns:
+        dict of rows/sec for each path
+    '''
+    batches = _synthetic_batches(rows, batch_rows, dim)
+
+    start = time.perf_counter()
+    frame = pa.Table.from_batches(batches).to_pandas()
+    embedded = frame[EMBEDDING_COLUMN].map(len) > 0
+    np.stack(frame.loc[embedded, EMBEDDING_COLUMN].to_numpy()).astype(np.float32)
+    pandas_seconds = time.perf_counter() - start
+    del frame
+
+    start = time.perf_counter()
+    table = pa.Table.from_batches([normalize_embeddings(batch, dim) for batch in batches])
+    table = table.filter(table.column(EMBEDDING_COLUMN).is_valid())
+    embedding_matrix(table.column(EMBEDDING_COLUMN), dim)
+    arrow_seconds = time.perf_counter() - start
+
+    result = {'rows': rows, 'pandas_rows_per_sec': rows / pandas_seconds, 'arrow_rows_per_sec': rows / arrow_seconds}
+    logging.info(f"{rows} rows: pandas {result['pandas_rows_per_sec']:,.0f} rows/s, "
+                 f"arrow {result['arrow_rows_per_sec']:,.0f} rows/s "
+                 f"({pandas_seconds / arrow_seconds:.1f}x)")
+    return result
+
+
+def benchmark_live(table = SUPPLIER_TABLE, streams = (1, DEFAULT_STREAMS)):
+    ''' Function To Measure Read Throughput Of A BigQuery Table Through The Storage Read API
+    Returns:
+        list of dicts with streams, rows and rows/sec
+    '''
+    fetcher = get_arrow_fetcher()
+    results = []
+    for max_streams in streams:
+        start = time.perf_counter()
+        rows = sum(batch.num_rows for batch in fetcher.iter_batches(table, max_streams=max_streams))
+        seconds = time.perf_counter() - start
+        results.append({'streams': max_streams, 'rows': rows, 'rows_per_sec': rows / seconds})
+        logging.info(f"{max_streams} streams: {rows} rows in {seconds:.2f}s, {rows / seconds:,.0f} rows/s")
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the Arrow fetch path in rows/sec')
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--batch-rows', type=int, default=10_000)
+    parser.add_argument('--live', action='store_true', help='also read the supplier table from BigQuery')
+    parser.add_argument('--streams', type=int, nargs='+', default=[1, DEFAULT_STREAMS])
+    args = parser.parse_args()
+    benchmark(args.rows, args.batch_rows)
+    if args.live:
+        benchmark_live(streams=args.streams)
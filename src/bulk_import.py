@@ -0,0 +1,240 @@
+import argparse
+import logging
+import os
+import time
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from src.updates import Update
+from src.predictor import BatchPrediction
+
+logging.basicConfig(level = logging.INFO)
+
+DEFAULT_CHUNK_SIZE = 5000
+
+REQUIRED_COLUMNS = ['supplier_name', 'country', 'region', 'product_category', 'sub_category', 'certification',
+                    'partnership_status', 'annual_volume', 'cost_premium', 'risk_level', 'audit_summary']
+OPTIONAL_COLUMNS = ['last_audit', 'image_url']
+TEXT_COLUMNS = [col for col in REQUIRED_COLUMNS + OPTIONAL_COLUMNS if col not in ('annual_volume', 'cost_premium')]
+
+# The same choices the Add New Supplier form offers
+ALLOWED_VALUES = {
+    'region': ['Africa', 'Asia', 'Europe', 'North America', 'South America', 'Oceania'],
+    'product_category': ['Electronics', 'Textiles', 'Agriculture', 'Manufacturing', 'Energy', 'Healthcare',
+                         'Automotive', 'Food & Beverage'],
+    'partnership_status': ['Active', 'Under Review', 'Pending', 'Inactive'],
+    'risk_level': ['Low', 'Medium', 'High'],
+}
+COST_PREMIUM_RANGE = (-20.0, 50.0)
+
+ERROR_COLUMNS = ['row', 'supplier_name', 'stage', 'column', 'error', 'value']
+
+
+def read_chunks(source, chunk_size = DEFAULT_CHUNK_SIZE, file_format = None):
+    ''' Function To Stream A CSV Or Parquet File As DataFrames Of At Most chunk_size Rows
+    Args:
+        source: path or binary file object
+        file_format: 'csv' or 'parquet'; taken from the file name when None
+    Yields:
+        DataFrames with every column as read (CSV cells as strings)
+    '''
+    if file_format is None:
+        name = source if isinstance(source, str) else getattr(source, 'name', '')
+        file_format = 'parquet' if name.lower().endswith(('.parquet', '.pq')) else 'csv'
+    if file_format == 'parquet':
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    elif file_format == 'csv':
+        yield from pd.read_csv(source, chunksize=chunk_size, dtype=str, skipinitialspace=True)
+    else:
+        raise ValueError(f"Unsupported file format: {file_format}")
+
+
+def validate_chunk(chunk, first_row = 1):
+    ''' Function To Check A Chunk Of Supplier Rows With Column-Wide Checks
+    Args:
+        chunk: DataFrame as read from the file
+        first_row: 1-based data row number of the chunk's first row, used in the report
+    Returns:
+        (valid, errors): valid rows typed for loading, with a row column; and one
+        error record per failed check
+    '''
+    rows = pd.Series(np.arange(first_row, first_row + len(chunk)), index=chunk.index)
+    missing_columns = [col for col in REQUIRED_COLUMNS if col not in chunk.columns]
+    frame = chunk.reindex(columns=REQUIRED_COLUMNS + OPTIONAL_COLUMNS)
+
+    text = {col: frame[col].astype('string').str.strip() for col in TEXT_COLUMNS}
+    checks = []
+    for col in REQUIRED_COLUMNS:
+        if col in missing_columns:
+            checks.append((col, pd.Series(True, index=frame.index), 'column missing from file'))
+        elif col in text:
+            checks.append((col, text[col].isna() | (text[col] == ''), 'required'))
+        else:
+            checks.append((col, frame[col].isna(), 'required'))
+    for col, allowed in ALLOWED_VALUES.items():
+        checks.append((col, text[col].notna() & (text[col] != '') & ~text[col].isin(allowed),
+                       f"must be one of {', '.join(allowed)}"))
+
+    annual_volume = pd.to_numeric(frame['annual_volume'], errors='coerce')
+    present = frame['annual_volume'].notna()
+    checks.append(('annual_volume', present & (annual_volume.isna() | (annual_volume < 0)
+                                               | (annual_volume != np.floor(annual_volume))),
+                   'must be a non-negative whole number'))
+    cost_premium = pd.to_numeric(frame['cost_premium'], errors='coerce')
+    low, high = COST_PREMIUM_RANGE
+    checks.append(('cost_premium', frame['cost_premium'].notna() & ~cost_premium.between(low, high),
+                   f'must be a number between {low:g} and {high:g}'))
+    audit_dates = pd.to_datetime(text['last_audit'], format='%Y-%m-%d', errors='coerce')
+    checks.append(('last_audit', text['last_audit'].notna() & (text['last_audit'] != '') & audit_dates.isna(),
+                   'must be a YYYY-MM-DD date'))
+
+    failed = pd.Series(False, index=frame.index)
+    errors = []
+    for col, mask, message in checks:
+        mask = mask.fillna(False).astype(bool)
+        if not mask.any():
+            continue
+        failed |= mask
+        errors.append(pd.DataFrame({
+            'row': rows[mask].to_numpy(),
+            'supplier_name': text['supplier_name'][mask].to_numpy(dtype=object),
+            'stage': 'validate',
+            'column': col,
+            'error': message,
+            'value': frame.loc[mask, col].astype(object).to_numpy() if col not in missing_columns else None,
+        }))
+
+    ok = ~failed
+    valid = pd.DataFrame({col: text[col][ok].to_numpy(dtype=object) for col in TEXT_COLUMNS})
+    valid['annual_volume'] = annual_volume[ok].to_numpy().astype(np.int64)
+    valid['cost_premium'] = cost_premium[ok].to_numpy(dtype=np.float64)
+    valid['last_audit'] = audit_dates[ok].dt.strftime('%Y-%m-%d').to_numpy(dtype=object)
+    for col in OPTIONAL_COLUMNS:
+        valid[col] = valid[col].where(valid[col].notna() & (valid[col] != ''), None)
+    valid['row'] = rows[ok].to_numpy()
+    errors = pd.concat(errors, ignore_index=True) if errors else pd.DataFrame(columns=ERROR_COLUMNS)
+    return valid, errors
+
+
+class ImportReport:
+    ''' Class Collecting The Outcome Of A Bulk Import '''
+    def __init__(self):
+        self.rows = 0
+        self.loaded = 0
+        self.embedded = 0
+        self.scored = 0
+        self.chunks = 0
+        self.supplier_ids = []
+        self.seconds = 0.0
+        self._errors = []
+
+    def add_errors(self, errors):
+        if len(errors):
+            self._errors.append(errors[ERROR_COLUMNS])
+
+    def stage_failed(self, chunk, stage, error):
+        ''' Function To Record One Error Per Row Of A Chunk Whose stage Failed As A Whole '''
+        self.add_errors(pd.DataFrame({'row': chunk['row'].to_numpy(), 'supplier_name': chunk['supplier_name'].to_numpy(),
+                                      'stage': stage, 'column': None, 'error': str(error), 'value': None}))
+
+    @property
+    def errors(self):
+        ''' Per-row errors: row, supplier_name, stage (validate / load / embed / score), column, error, value '''
+        if not self._errors:
+            return pd.DataFrame(columns=ERROR_COLUMNS)
+        return pd.concat(self._errors, ignore_index=True).sort_values(['row', 'stage'], kind='stable',
+                                                                       ignore_index=True)
+
+    @property
+    def rejected(self):
+        ''' Number Of Rows That Failed Validation Or Loading And Were Not Imported '''
+        errors = self.errors
+        return int(errors.loc[errors['stage'].isin(['validate', 'load']), 'row'].nunique())
+
+    def summary(self):
+        return {'rows': self.rows, 'loaded': self.loaded, 'rejected': self.rejected, 'embedded': self.embedded,
+                'scored': self.scored, 'chunks': self.chunks, 'seconds': round(self.seconds, 2)}
+
+
+def import_suppliers(source, update = None, chunk_size = DEFAULT_CHUNK_SIZE, file_format = None,
+                     embed = True, score = True, dry_run = False, score_fn = BatchPrediction, report = None):
+    ''' Function To Import Suppliers From A CSV Or Parquet File
+    Each chunk is validated, given ids from one block reservation and appended with
+    a single load job; its rows are then embedded and scored in batches (one MERGE
+    per few hundred rows). A failing stage is recorded for the rows of that chunk
+    and the import carries on with the next one.
+    Args:
+        source: path or binary file object
+        update: Update instance to write through, a default one when None
+        dry_run: only validate
+        score_fn: callable(supplier_ids) returning scores for Update.update_ecoscores
+        report: ImportReport to fill in as chunks finish, so another thread can follow progress
+    Returns:
+        ImportReport
+    '''
+    start = time.perf_counter()
+    report = ImportReport() if report is None else report
+    if update is None and not dry_run:
+        update = Update()
+
+    for chunk in read_chunks(source, chunk_size, file_format):
+        valid, errors = validate_chunk(chunk, first_row=report.rows + 1)
+        report.rows += len(chunk)
+        report.chunks += 1
+        report.add_errors(errors)
+        if dry_run or valid.empty:
+            continue
+
+        try:
+            valid['supplier_id'] = update.id_allocator.allocate(len(valid))
+            report.loaded += update.load_suppliers(valid)
+        except Exception as e:
+            logging.error(f"Loading chunk {report.chunks} failed: {e}")
+            report.stage_failed(valid, 'load', e)
+            continue
+        supplier_ids = valid['supplier_id'].tolist()
+        report.supplier_ids.extend(supplier_ids)
+
+        if embed:
+            try:
+                update.embed_suppliers(supplier_ids)
+                report.embedded += len(supplier_ids)
+            except Exception as e:
+                logging.error(f"Embedding chunk {report.chunks} failed: {e}")
+                report.stage_failed(valid, 'embed', e)
+                continue
+        if score:
+            try:
+                update.update_ecoscores(score_fn(supplier_ids))
+                report.scored += len(supplier_ids)
+            except Exception as e:
+                logging.error(f"Scoring chunk {report.chunks} failed: {e}")
+                report.stage_failed(valid, 'score', e)
+        logging.info(f"Imported chunk {report.chunks}: {len(valid)} of {len(chunk)} rows")
+
+    report.seconds = time.perf_counter() - start
+    logging.info(f"Bulk import finished: {report.summary()}")
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Import suppliers from a CSV or Parquet file')
+    parser.add_argument('path')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--format', choices=['csv', 'parquet'], default=None)
+    parser.add_argument('--errors', help='write the per-row error report to this CSV file')
+    parser.add_argument('--dry-run', action='store_true', help='validate only, write nothing')
+    parser.add_argument('--no-embed', action='store_true', help='skip embedding (implies --no-score)')
+    parser.add_argument('--no-score', action='store_true')
+    args = parser.parse_args()
+
+    report = import_suppliers(args.path, chunk_size=args.chunk_size, file_format=args.format,
+                              embed=not args.no_embed, score=not (args.no_score or args.no_embed),
+                              dry_run=args.dry_run)
+    print(report.summary())
+    if args.errors:
+        report.errors.to_csv(args.errors, index=False)
+        print(f"{len(report.errors)} errors written to {os.path.abspath(args.errors)}")
+    elif len(report.errors):
+        print(report.errors.head(20).to_string(index=False))
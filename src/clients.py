@@ -0,0 +1,117 @@
+from google.cloud import bigquery
+from google.cloud import storage
+from google.cloud import bigquery_storage
+from google.auth.transport.requests import AuthorizedSession
+import google.auth
+import requests
+import atexit
+import logging
+import os
+import threading
+import src.config
+
+logging.basicConfig(level = logging.INFO)
+
+SCOPES = ['https://www.googleapis.com/auth/cloud-platform']
+DEFAULT_POOL_SIZE = 32
+
+
+class ClientProvider:
+    ''' Class To Hand Out Shared, Lazily Created Google Cloud Clients
+
+    Each client kind is created once per process on first use and backed by its
+    own authorized HTTP session with a connection pool of pool_size, so every
+    thread reuses the same connections and token refreshes.
+    '''
+    def __init__(self, pool_size = DEFAULT_POOL_SIZE):
+        self.pool_size = pool_size
+        self._lock = threading.RLock()
+        self._credentials = None
+        self._clients = {}
+        self._sessions = {}
+        self.created = {'clients': 0, 'sessions': 0}
+
+    def _get_credentials(self):
+        if self._credentials is None:
+            # Authenticate with service account
+            os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = src.config.file_path
+            self._credentials, _ = google.auth.default(scopes=SCOPES)
+        return self._credentials
+
+    def session(self, kind):
+        ''' Function To Return The Pooled Authorized Session Used By One Client Kind '''
+        with self._lock:
+            if kind not in self._sessions:
+                session = AuthorizedSession(self._get_credentials())
+                adapter = requests.adapters.HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+                session.mount('https://', adapter)
+                self._sessions[kind] = session
+                self.created['sessions'] += 1
+            return self._sessions[kind]
+
+    def _client(self, kind, factory, http = True):
+        with self._lock:
+            if kind not in self._clients:
+                logging.info(f" Creating shared {kind} client")
+                self._clients[kind] = factory(self.session(kind) if http else None)
+                self.created['clients'] += 1
+            return self._clients[kind]
+
+    def bigquery_client(self):
+        ''' Function To Return The Shared BigQuery Client '''
+        return self._client('bigquery', lambda http: bigquery.Client(
+            project = src.config.project_id, credentials = self._get_credentials(), _http = http))
+
+    def bigquery_read_client(self):
+        ''' Function To Return The Shared BigQuery Storage Read API Client (gRPC, so no HTTP session) '''
+        return self._client('bigquery_read', lambda _: bigquery_storage.BigQueryReadClient(
+            credentials = self._get_credentials()), http = False)
+
+    def storage_client(self):
+        ''' Function To Return The Shared Cloud Storage Client '''
+        return self._client('storage', lambda http: storage.Client(
+            project = src.config.project_id, credentials = self._get_credentials(), _http = http))
+
+    def stats(self):
+        ''' Function To Report How Many Clients And Sessions Exist
+        Returns:
+            dict with live and total created counts
+        '''
+        with self._lock:
+            return {
+                'live_clients': len(self._clients),
+                'live_sessions': len(self._sessions),
+                'created_clients': self.created['clients'],
+                'created_sessions': self.created['sessions'],
+                'pool_size': self.pool_size,
+            }
+
+    def shutdown(self):
+        ''' Function To Close Every Client And Session '''
+        with self._lock:
+            for kind, client in self._clients.items():
+                close = getattr(client, 'close', None)
+                if close is not None:
+                    try:
+                        close()
+                    except Exception as e:
+                        logging.warning(f"Failed to close {kind} client: {e}")
+            for session in self._sessions.values():
+                session.close()
+            self._clients.clear()
+            self._sessions.clear()
+
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_provider():
+    ''' Function To Return The Process-Wide Client Provider '''
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                _provider = ClientProvider()
+                atexit.register(_provider.shutdown)
+    return _provider
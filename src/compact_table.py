@@ -0,0 +1,176 @@
+import argparse
+import logging
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from src.features import EMBEDDING_COLUMN, EMBEDDING_DIM, embedding_matrix
+
+logging.basicConfig(level = logging.INFO)
+
+# Low-cardinality text columns, stored as pandas categoricals
+CATEGORICAL_COLUMNS = ['country', 'region', 'product_category', 'sub_category', 'certification',
+                       'partnership_status', 'risk_level', 'recommendation']
+# Scores are 0-100 with a couple of decimals, well inside float32 precision
+FLOAT32_COLUMNS = ['total_eco_score', 'carbon_score', 'water_score', 'waste_score', 'social_score', 'cost_premium']
+
+
+def compact_frame(df):
+    ''' Function To Return A Compact Copy Of A Supplier Frame
+    Categorical columns become pandas categoricals and scores float32; other
+    columns (ids, names, annual_volume, dates, URLs) are kept as they are, and
+    text_embedding is dropped, see CompactSupplierTable for keeping it.
+    Returns:
+        DataFrame with the same columns (minus text_embedding), index and attrs
+    '''
+    columns = {}
+    for col in df.columns:
+        if col == EMBEDDING_COLUMN:
+            continue
+        series = df[col]
+        if col in CATEGORICAL_COLUMNS and not isinstance(series.dtype, pd.CategoricalDtype):
+            series = series.astype('category')
+        elif col in FLOAT32_COLUMNS and series.dtype != np.float32:
+            series = pd.to_numeric(series, errors='coerce').astype(np.float32)
+        columns[col] = series
+    compact = pd.DataFrame(columns, index=df.index)
+    compact.attrs = dict(df.attrs)
+    return compact
+
+
+def memory_usage(df, embeddings = None):
+    ''' Function To Return The Deep Memory Use Of A Frame, Plus An Optional Embedding Matrix, In Bytes By Column '''
+    usage = df.memory_usage(deep=True, index=True)
+    if embeddings is not None:
+        usage[EMBEDDING_COLUMN] = embeddings.nbytes
+    return usage
+
+
+def memory_report(before, after, after_embeddings = None):
+    ''' Function To Compare Bytes Per Supplier Of The Raw And Compact Representations
+    Args:
+        before: raw supplier frame (as BigQuery returns it, text_embedding as per-row lists)
+        after: compact frame
+        after_embeddings: the compact embedding matrix, when text_embedding was split out
+    Returns:
+        DataFrame indexed by column (plus a total row) with before/after bytes per supplier and the ratio
+    '''
+    rows = max(len(before), 1)
+    old = memory_usage(before)
+    if EMBEDDING_COLUMN in before.columns:
+        # memory_usage(deep=True) counts each list (header and pointers) but not the floats it points to
+        old[EMBEDDING_COLUMN] += sum(_deep_size(value) for value in before[EMBEDDING_COLUMN])
+    new = memory_usage(after, after_embeddings)
+    report = pd.DataFrame({'before': old, 'after': new}).fillna(0) / rows
+    report.loc['total'] = report.sum()
+    report['ratio'] = report['before'] / report['after'].replace(0, np.nan)
+    return report.round(1)
+
+
+def _deep_size(value):
+    ''' Function To Return The Bytes Of The Python Floats Inside One text_embedding List '''
+    if isinstance(value, (list, tuple)):
+        return 24 * len(value)
+    return 0
+
+
+class CompactSupplierTable:
+    ''' Class Holding Suppliers As A Compact Frame Plus A Contiguous Embedding Matrix
+
+    frame holds the scalar columns (categoricals, float32 scores) and embeddings
+    the (rows, dim) float32 text embeddings in the same row order, so a supplier's
+    vector is embeddings[row_of(supplier_id)] rather than a Python list per row.
+    '''
+    def __init__(self, frame, embeddings = None):
+        self.frame = frame
+        self.embeddings = embeddings
+        self._rows = None
+
+    @classmethod
+    def from_frame(cls, df, dim = EMBEDDING_DIM):
+        ''' Function To Build The Table From A Supplier DataFrame '''
+        frame = compact_frame(df).reset_index(drop=True)
+        embeddings = None
+        if EMBEDDING_COLUMN in df.columns:
+            embeddings = _embeddings_or_nan(df[EMBEDDING_COLUMN], dim)
+        return cls(frame, embeddings)
+
+    @classmethod
+    def from_arrow(cls, table, dim = EMBEDDING_DIM):
+        ''' Function To Build The Table From An Arrow Table, Without Materialising Per-Row Embedding Lists '''
+        embeddings = None
+        if EMBEDDING_COLUMN in table.column_names:
+            column = table.column(EMBEDDING_COLUMN)
+            embeddings = (embedding_matrix(column, dim) if column.null_count == 0
+                          else _embeddings_or_nan(column.to_pandas(), dim))
+            table = table.drop_columns([EMBEDDING_COLUMN])
+        # Arrow dictionary-encodes the categorical columns, which to_pandas turns into categoricals directly
+        table = pa.table({name: (table.column(name).dictionary_encode() if name in CATEGORICAL_COLUMNS
+                                 else table.column(name)) for name in table.column_names})
+        return cls(compact_frame(table.to_pandas()), embeddings)
+
+    def __len__(self):
+        return len(self.frame)
+
+    def row_of(self, supplier_id):
+        ''' Function To Return The Row Position Of A supplier_id, Raising KeyError When Absent '''
+        if self._rows is None:
+            ids = self.frame['supplier_id'].astype(str)
+            self._rows = pd.Series(np.arange(len(ids)), index=ids.to_numpy())
+            self._rows = self._rows[~self._rows.index.duplicated(keep='last')]
+        return int(self._rows[str(supplier_id)])
+
+    def embedding(self, supplier_id):
+        ''' Function To Return One Supplier's Embedding As A float32 View '''
+        if self.embeddings is None:
+            raise ValueError(f"Table was built without {EMBEDDING_COLUMN}")
+        return self.embeddings[self.row_of(supplier_id)]
+
+    def memory_report(self, before):
+        ''' Function To Compare This Table With The Raw Frame It Was Built From '''
+        return memory_report(before, self.frame, self.embeddings)
+
+
+def _embeddings_or_nan(column, dim):
+    ''' Function To Stack A Series Of Per-Row Vectors, Leaving Rows Without One As NaN '''
+    present = column.notna().to_numpy()
+    if present.all():
+        return embedding_matrix(column, dim)
+    out = np.full((len(column), dim), np.nan, dtype=np.float32)
+    if present.any():
+        out[present] = embedding_matrix(column[present], dim)
+    return out
+
+
+def _synthetic_raw_suppliers(n, dim = EMBEDDING_DIM, seed = 0):
+    ''' Function To Build A Frame Shaped Like The Raw BigQuery Result, For The Memory Report '''
+    rng = np.random.default_rng(seed)
+    pick = lambda values: np.array(values, dtype=object)[rng.integers(0, len(values), n)]
+    return pd.DataFrame({
+        'supplier_id': [f'SUP{i:05d}' for i in range(n)],
+        'supplier_name': [f'Supplier {i}' for i in range(n)],
+        'country': pick([f'Country {i}' for i in range(60)]),
+        'region': pick(['Africa', 'Asia', 'Europe', 'North America', 'South America', 'Oceania']),
+        'product_category': pick(['Textiles', 'Electronics', 'Food', 'Packaging', 'Chemicals']),
+        'sub_category': pick([f'Sub {i}' for i in range(40)]),
+        'total_eco_score': rng.random(n) * 100,
+        'carbon_score': rng.random(n) * 100,
+        'water_score': rng.random(n) * 100,
+        'waste_score': rng.random(n) * 100,
+        'social_score': rng.random(n) * 100,
+        'certification': pick(['ISO 14001', 'Fair Trade', 'B Corp', 'None']),
+        'partnership_status': pick(['Active', 'Probation', 'Prospective']),
+        'annual_volume': rng.integers(1_000, 5_000_000, n).astype(np.float64),
+        'cost_premium': rng.random(n) * 20,
+        'risk_level': pick(['Low', 'Medium', 'High']),
+        'recommendation': pick(['Preferred', 'Neutral', 'Avoid']),
+        EMBEDDING_COLUMN: [list(map(float, row)) for row in rng.standard_normal((n, dim))],
+    })
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Report bytes per supplier before and after compaction')
+    parser.add_argument('--rows', type=int, default=10_000)
+    args = parser.parse_args()
+    raw = _synthetic_raw_suppliers(args.rows)
+    table = CompactSupplierTable.from_frame(raw)
+    print(table.memory_report(raw).to_string())
@@ -0,0 +1,136 @@
+import json
+import logging
+import re
+import numpy as np
+import pandas as pd
+
+logging.basicConfig(level=logging.INFO)
+
+DEFAULT_TOKEN_BUDGET = 8000
+CHARS_PER_TOKEN = 4
+AUDIT_SUMMARY_CHARS = 200
+
+# Fields sent to the model for each supplier row
+CONTEXT_COLUMNS = [
+    'supplier_id', 'supplier_name', 'country', 'region', 'product_category', 'sub_category',
+    'total_eco_score', 'carbon_score', 'water_score', 'waste_score', 'social_score',
+    'certification', 'partnership_status', 'annual_volume', 'cost_premium', 'risk_level',
+    'last_audit', 'recommendation', 'audit_summary'
+]
+
+# Columns whose values are matched against the prompt to narrow the rows
+MATCH_COLUMNS = ['country', 'region', 'product_category', 'sub_category', 'risk_level', 'recommendation', 'partnership_status']
+
+SCORE_KEYWORDS = {
+    'carbon': 'carbon_score',
+    'water': 'water_score',
+    'waste': 'waste_score',
+    'social': 'social_score',
+}
+SCORE_PATTERNS = {re.compile(r'\b' + word + r'\b'): col for word, col in SCORE_KEYWORDS.items()}
+# Low / Medium / High only name a risk level next to the word risk ("low risk", "risk level: high"),
+# not in phrases like "low carbon"
+RISK_PATTERN = r'\b{value}[\s-]+risk\b|\brisk(?:[\s-]+level)?\s*(?:is|of|:|=)?\s*{value}\b'
+ASCENDING_KEYWORDS = re.compile(r"\b(worst|lowest|poor\w*|weakest|bottom|least|avoid)\b")
+
+
+def estimate_tokens(text):
+    ''' Function To Estimate The Token Count Of A Prompt Fragment '''
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def extract_filters(prompt, suppliers):
+    ''' Function To Find Column Values Mentioned In The Prompt
+    Returns:
+        dict of column -> list of matched values
+    '''
+    text = prompt.lower()
+    filters = {}
+    for col in MATCH_COLUMNS:
+        if col not in suppliers.columns:
+            continue
+        values = [v for v in suppliers[col].dropna().unique() if isinstance(v, str) and len(v) > 2]
+        pattern = RISK_PATTERN if col == 'risk_level' else r'\b{value}\b'
+        matched = [v for v in values if re.search(pattern.format(value=re.escape(v.lower())), text)]
+        if matched:
+            filters[col] = matched
+    return filters
+
+
+def _sort_key(prompt):
+    ''' Function To Pick The Ranking Column And Direction From The Prompt '''
+    text = prompt.lower()
+    column = next((col for pattern, col in SCORE_PATTERNS.items() if pattern.search(text)), 'total_eco_score')
+    return column, bool(ASCENDING_KEYWORDS.search(text))
+
+
+def _aggregates(rows):
+    ''' Function To Pre-Aggregate Scores By Country And Category For The Selected Rows '''
+    summary = {'suppliers': int(len(rows))}
+    if len(rows) == 0:
+        return summary
+    summary['avg_total_eco_score'] = round(float(rows['total_eco_score'].mean()), 2)
+    for col in ('country', 'product_category', 'recommendation'):
+        grouped = rows.groupby(col, observed=True)['total_eco_score'].agg(['count', 'mean']).round(2)
+        summary[f'by_{col}'] = {str(k): {'count': int(v['count']), 'avg_score': float(v['mean'])}
+                                for k, v in grouped.iterrows()}
+    return summary
+
+
+def build_context(prompt, suppliers, token_budget = DEFAULT_TOKEN_BUDGET):
+    ''' Function To Build A Compact Supplier Context For An LLM Prompt
+    Rows are narrowed to values mentioned in the prompt, ranked by the relevant score,
+    and added until the token budget is used, after a small aggregate summary. When
+    the mentioned values match no supplier together, the context says so rather than
+    falling back to unrelated rows.
+
+    Args:
+        prompt (str): The raw user query.
+        suppliers: supplier DataFrame (CONTEXT_COLUMNS)
+        token_budget: approximate number of tokens the context may use
+    Returns:
+        dict with context text, row counts, filters and approximate tokens
+    '''
+    filters = extract_filters(prompt, suppliers)
+    mask = np.ones(len(suppliers), dtype=bool)
+    for col, values in filters.items():
+        mask &= suppliers[col].isin(values).to_numpy()
+    rows = suppliers[mask]
+
+    sort_column, ascending = _sort_key(prompt)
+    if sort_column in rows.columns:
+        rows = rows.sort_values(sort_column, ascending=ascending, na_position='last')
+
+    columns = [col for col in CONTEXT_COLUMNS if col in rows.columns]
+    rows = rows[columns]
+    summary = json.dumps(_aggregates(rows), default=str)
+
+    sample = rows.copy()
+    if 'audit_summary' in sample.columns:
+        sample['audit_summary'] = sample['audit_summary'].astype('string').str.slice(0, AUDIT_SUMMARY_CHARS)
+    lines = sample.to_json(orient='records', lines=True, date_format='iso').splitlines() if len(sample) else []
+
+    remaining = (token_budget - estimate_tokens(summary)) * CHARS_PER_TOKEN
+    lengths = np.fromiter((len(line) + 1 for line in lines), dtype=np.int64, count=len(lines))
+    included = int(np.searchsorted(np.cumsum(lengths), remaining, side='right'))
+
+    if filters and len(rows) == 0:
+        wanted = '; '.join(f"{col} in {', '.join(values)}" for col, values in filters.items())
+        context = f'No suppliers match the query ({wanted}). Summary: {summary}\nRows: none'
+    else:
+        context = 'Summary: ' + summary + '\nRows:\n' + '\n'.join(lines[:included])
+    result = {
+        'context': context,
+        'rows_included': included,
+        'rows_matched': int(len(rows)),
+        'rows_total': int(len(suppliers)),
+        'filters': filters,
+        'sort': f"{sort_column} {'ASC' if ascending else 'DESC'}",
+        'approx_tokens': estimate_tokens(context),
+        # What shipping every row would have cost, at the average row size
+        'approx_full_table_tokens': int(lengths.mean() * len(suppliers) / CHARS_PER_TOKEN) if len(lengths) else 0,
+    }
+    logging.info(f"Context built: {included}/{len(rows)} matched rows of {len(suppliers)}, "
+                 f"~{result['approx_tokens']} tokens vs ~{result['approx_full_table_tokens']} for the full table "
+                 f"(budget {token_budget}), filters {filters}")
+    return result
@@ -1,40 +1,114 @@
 from google.cloud import bigquery
-import os
 import logging
-import src.config
-from google.cloud import storage
+from src.clients import get_provider
+from src.snapshot import get_snapshot
+from src.arrow_fetch import ArrowFetcher
+import pyarrow.dataset as ds
 
 logging.basicConfig(level = logging.INFO)
 
+SUPPLIER_COLUMNS = [
+    'supplier_id', 'supplier_name', 'country', 'region', 'product_category', 'sub_category',
+    'total_eco_score', 'carbon_score', 'water_score', 'waste_score', 'social_score',
+    'certification', 'partnership_status', 'annual_volume', 'cost_premium', 'risk_level',
+    'last_audit', 'audit_summary', 'image_url', 'recommendation', 'text_embedding'
+]
+
+# Scalar columns the dashboard renders; embeddings and audit text are fetched on demand
+DASHBOARD_COLUMNS = [col for col in SUPPLIER_COLUMNS if col not in ('text_embedding', 'audit_summary')]
+
+# Filters that match a column against a list of values; min_score filters total_eco_score
+LIST_FILTERS = ['supplier_id', 'country', 'region', 'product_category', 'risk_level', 'recommendation']
+
+
+def _check_request(columns, filters):
+    ''' Function To Reject Unknown Columns Or Filters Before They Reach A Query '''
+    unknown = [col for col in columns or [] if col not in SUPPLIER_COLUMNS]
+    unknown += [key for key in filters or {} if key not in LIST_FILTERS + ['min_score']]
+    if unknown:
+        raise ValueError(f"Unknown supplier columns or filters: {unknown}")
+
+
+def build_supplier_query(columns = None, filters = None):
+    ''' Function To Build A Minimal Parameterized Supplier Query
+    Args:
+        columns: columns to select, every column when None
+        filters: dict of LIST_FILTERS column -> list of values, plus optional min_score
+    Returns:
+        (query, query_parameters)
+    '''
+    _check_request(columns, filters)
+    select = ', '.join(columns) if columns else '*'
+    conditions, parameters = [], []
+    for key, value in (filters or {}).items():
+        if value is None or (key != 'min_score' and not len(value)):
+            continue
+        if key == 'min_score':
+            conditions.append('total_eco_score >= @min_score')
+            parameters.append(bigquery.ScalarQueryParameter('min_score', 'FLOAT64', float(value)))
+        else:
+            conditions.append(f'{key} IN UNNEST(@{key})')
+            parameters.append(bigquery.ArrayQueryParameter(key, 'STRING', [str(v) for v in value]))
+
+    query = f'''
+            SELECT {select} FROM `ecochain123.supplychain.suppliers_with_images`
+            '''
+    if conditions:
+        query += 'WHERE ' + '\n              AND '.join(conditions)
+    return query, parameters
+
+
+def _filter_expression(filters):
+    ''' Function To Turn Loader Filters Into An Arrow Expression For The Local Snapshot '''
+    expression = None
+    for key, value in (filters or {}).items():
+        if value is None or (key != 'min_score' and not len(value)):
+            continue
+        if key == 'min_score':
+            condition = ds.field('total_eco_score') >= float(value)
+        else:
+            condition = ds.field(key).isin([str(v) for v in value])
+        expression = condition if expression is None else expression & condition
+    return expression
+
 class BigQueryCONN:
     ''' Class To Handle All BigQuery Connections '''
     def __init__(self):
         try:
             logging.info(" Connecting To BigQuery")
-            # Authenticate with service account
-            os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = src.config.file_path
-
-            # Initialize client
-            self.client = bigquery.Client(project = src.config.project_id)
+            # Shared, pooled client; created once per process on first use
+            self.client = get_provider().bigquery_client()
 
         except Exception as e:
             print(f"Failed to Connect To BigQuery: {e}")
 
 
-    def bigquery_loader(self):
+    def bigquery_loader(self, columns = None, filters = None, use_snapshot = True, as_arrow = False):
         ''' Function For Connnecting to BigQuery
+        Args:
+            columns: columns to return, every column when None
+            filters: dict of column -> allowed values (country, region, product_category,
+                risk_level, recommendation, supplier_id) and min_score
+            use_snapshot: serve from the local snapshot (src.snapshot), refreshing it incrementally;
+                otherwise the projection and filters are pushed down into the BigQuery query
+            as_arrow: return the pyarrow.Table instead of converting it to pandas
         Returns:
-            df: dataframe
+            df: dataframe, or pyarrow.Table when as_arrow
         '''
+        query, parameters = build_supplier_query(columns, filters)
         try:
             logging.info(" Retrieving Dataset From BigQuery")
-            query = '''
-            SELECT * FROM `ecochain123.supplychain.suppliers_with_images`
-            '''
-            df = self.client.query(query).to_dataframe()
-            logging.info(" Dataset Retrieved Successfully")
-
-            return df
+            if use_snapshot:
+                table = get_snapshot().load(self.client)
+                expression = _filter_expression(filters)
+                if expression is not None:
+                    table = table.filter(expression)
+                if columns:
+                    table = table.select(columns)
+            else:
+                table = ArrowFetcher(self.client).query(query, parameters)
+            logging.info(f" Dataset Retrieved Successfully: {table.num_rows} rows")
+            return table if as_arrow else table.to_pandas()
 
         except Exception as e:
             print(f"Failed to Connect To The Dataset: {e}")
@@ -48,7 +122,7 @@ class BigQueryCONN:
         returns: GCS Connection
         '''
         try:
-            gcs_client = storage.Client()
+            gcs_client = get_provider().storage_client()
             BUCKET_NAME = "ecochain-product-images"
             bucket = gcs_client.bucket(BUCKET_NAME)
             return bucket
@@ -0,0 +1,200 @@
+from collections import OrderedDict
+from google.cloud import bigquery
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import numpy as np
+from src.clients import get_provider
+from src.features import EMBEDDING_DIM
+
+logging.basicConfig(level = logging.INFO)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BASE_DIR)
+EMBEDDING_CACHE_PATH = os.path.join(PROJECT_ROOT, 'cache', 'embeddings.sqlite')
+
+EMBEDDING_MODEL = 'ecochain123.supplychain.embedding_model'
+EMBEDDING_BATCH_SIZE = 250
+MAX_MEMORY_ENTRIES = 2048
+
+# Columns that make up the text a supplier is embedded from
+SUPPLIER_TEXT_COLUMNS = ['product_category', 'sub_category', 'certification', 'audit_summary']
+
+
+def supplier_text(row):
+    ''' Function To Build The Text A Supplier Is Embedded From, Matching The Original SQL CONCAT '''
+    return (f"Category: {row['product_category']}; Sub-category: {row['sub_category']}; "
+            f"Certification: {row['certification']}; Audit: {row['audit_summary']}")
+
+
+class BigQueryEmbeddingBackend:
+    ''' Class To Embed Texts With ML.GENERATE_EMBEDDING, Many Texts Per Query '''
+    def __init__(self, client, model = EMBEDDING_MODEL, dim = EMBEDDING_DIM):
+        self.client = client
+        self.model = model
+        self.dim = dim
+        self.name = f'bigquery:{model}:{dim}'
+
+    def embed(self, texts):
+        query = f'''
+            SELECT
+                content,
+                ml_generate_embedding_result AS embedding
+            FROM ML.GENERATE_EMBEDDING(
+                MODEL `{self.model}`,
+                (SELECT text AS content FROM UNNEST(@texts) AS text),
+                STRUCT(TRUE AS flatten_json_output, {self.dim} AS output_dimensionality)
+            )
+            '''
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[bigquery.ArrayQueryParameter("texts", "STRING", list(texts))]
+        )
+        # Rows come back unordered, so they are matched to the input by content
+        embeddings = {row['content']: row['embedding'] for row in self.client.query(query, job_config=job_config).result()}
+        missing = [text for text in texts if text not in embeddings]
+        if missing:
+            raise ValueError(f"ML.GENERATE_EMBEDDING returned no embedding for {len(missing)} texts")
+        return np.asarray([embeddings[text] for text in texts], dtype=np.float32)
+
+
+class HashEmbeddingBackend:
+    ''' Class To Embed Texts Offline With Hashed Word Features
+
+    Deterministic and dependency free, so tests and local runs need no BigQuery.
+    Vectors are only comparable with each other, not with the BigQuery model.
+    '''
+    def __init__(self, dim = EMBEDDING_DIM):
+        self.dim = dim
+        self.name = f'hash:{dim}'
+
+    def embed(self, texts):
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for word in re.findall(r"[a-z0-9]+", text.lower()):
+                digest = hashlib.md5(word.encode()).digest()
+                index = int.from_bytes(digest[:4], 'little') % self.dim
+                out[i, index] += 1.0 if digest[4] & 1 else -1.0
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return out / norms
+
+
+class EmbeddingService:
+    ''' Class To Embed Texts In Batches Behind A Content-Hash Cache
+
+    Identical texts are embedded once: vectors are cached in memory and in a
+    SQLite file keyed on the sha256 of the backend name and the text, and only
+    cache misses are sent to the backend, batch_size texts per request.
+    '''
+    def __init__(self, backend, path = EMBEDDING_CACHE_PATH, batch_size = EMBEDDING_BATCH_SIZE,
+                 max_memory = MAX_MEMORY_ENTRIES):
+        self.backend = backend
+        self.dim = backend.dim
+        self.batch_size = batch_size
+        self.max_memory = max_memory
+        self._memory = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.requests = 0
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute('CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, embedding BLOB)')
+        self._db.commit()
+
+    def _key(self, text):
+        return hashlib.sha256(f"{self.backend.name}:{text}".encode()).hexdigest()
+
+    def _remember(self, key, vector):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory:
+            self._memory.popitem(last=False)
+
+    def _lookup(self, keys):
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._memory:
+                    found[key] = self._memory[key]
+                    self._memory.move_to_end(key)
+            missing = [key for key in keys if key not in found]
+            for start in range(0, len(missing), 500):
+                batch = missing[start:start + 500]
+                rows = self._db.execute(
+                    f"SELECT key, embedding FROM embeddings WHERE key IN ({','.join('?' * len(batch))})", batch)
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+                    self._remember(key, found[key])
+        return found
+
+    def embed(self, texts):
+        ''' Function To Embed A List Of Texts
+        Returns:
+            ndarray (len(texts), dim) float32, in input order
+        '''
+        texts = [str(text) for text in texts]
+        keys = [self._key(text) for text in texts]
+        found = self._lookup(set(keys))
+
+        pending = {}
+        for key, text in zip(keys, texts):
+            if key not in found:
+                pending[key] = text
+        self.hits += sum(1 for key in keys if key in found)
+        self.misses += len(pending)
+
+        pending_keys = list(pending)
+        for start in range(0, len(pending_keys), self.batch_size):
+            batch = pending_keys[start:start + self.batch_size]
+            vectors = np.asarray(self.backend.embed([pending[key] for key in batch]), dtype=np.float32)
+            self.requests += 1
+            with self._lock:
+                self._db.executemany('INSERT OR REPLACE INTO embeddings VALUES (?, ?)',
+                                     [(key, vector.tobytes()) for key, vector in zip(batch, vectors)])
+                self._db.commit()
+                for key, vector in zip(batch, vectors):
+                    found[key] = vector
+                    self._remember(key, vector)
+        if pending:
+            logging.info(f"Embedded {len(pending)} new texts in {-(-len(pending) // self.batch_size)} requests, "
+                         f"{len(texts) - len(pending)} cached or repeated")
+
+        out = np.empty((len(texts), self.dim), dtype=np.float32)
+        for i, key in enumerate(keys):
+            out[i] = found[key]
+        return out
+
+    def embed_one(self, text):
+        ''' Function To Embed A Single Text '''
+        return self.embed([text])[0]
+
+    def stats(self):
+        ''' Function To Report Cache Hits, Misses And Backend Requests '''
+        with self._lock:
+            stored = self._db.execute('SELECT COUNT(*) FROM embeddings').fetchone()[0]
+            return {'hits': self.hits, 'misses': self.misses, 'requests': self.requests,
+                    'memory_entries': len(self._memory), 'stored_entries': stored, 'backend': self.backend.name}
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_embedding_service(backend = None):
+    ''' Function To Return The Process-Wide Embedding Service
+    Args:
+        backend: used when the service is first created; BigQuery via the shared client by default
+    '''
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                if backend is None:
+                    backend = BigQueryEmbeddingBackend(get_provider().bigquery_client())
+                _service = EmbeddingService(backend)
+    return _service
@@ -0,0 +1,210 @@
+import argparse
+import logging
+import time
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+logging.basicConfig(level = logging.INFO)
+
+# Column order the subscore model was trained on, followed by the text embedding
+ENCODED_COLUMNS = ['country','region','partnership_status','risk_level']
+FEATURE_COLUMNS = ['country','region','partnership_status','annual_volume','cost_premium','risk_level','last_audit']
+EMBEDDING_COLUMN = 'text_embedding'
+EMBEDDING_DIM = 384
+N_FEATURES = len(FEATURE_COLUMNS) + EMBEDDING_DIM
+
+
+def _check_columns(columns):
+    ''' Function To Check Every Feature Column Is Present '''
+    missing = [col for col in FEATURE_COLUMNS + [EMBEDDING_COLUMN] if col not in columns]
+    if missing:
+        raise ValueError(f"Missing feature columns: {missing}")
+
+
+def _split_input(data):
+    ''' Function To Split The Input Into An Arrow Table Of Scalar Features And The Embedding Column '''
+    if isinstance(data, pd.DataFrame):
+        _check_columns(data.columns)
+        # Embeddings stay in pandas; converting a column of per-row arrays to Arrow would copy it twice
+        return pa.Table.from_pandas(data[FEATURE_COLUMNS], preserve_index=False), data[EMBEDDING_COLUMN]
+    if isinstance(data, pa.RecordBatch):
+        data = pa.Table.from_batches([data])
+    if isinstance(data, pa.Table):
+        _check_columns(data.column_names)
+        embeddings = data.column(EMBEDDING_COLUMN)
+        embedding_type = embeddings.type
+        if not (pa.types.is_list(embedding_type) or pa.types.is_large_list(embedding_type)
+                or pa.types.is_fixed_size_list(embedding_type)):
+            raise ValueError(f"{EMBEDDING_COLUMN} must be a list column, got {embedding_type}")
+        return data, embeddings
+    raise TypeError(f"Unsupported input type for features: {type(data).__name__}")
+
+
+def _embedding_values(chunk, dim):
+    ''' Function To Return The Flat float32 Values Of One List Chunk, Zero-Copy When Already float32 '''
+    if pa.types.is_fixed_size_list(chunk.type):
+        if chunk.type.list_size != dim:
+            raise ValueError(f"Expected {dim}-dim embeddings, got {chunk.type.list_size}")
+    elif len(chunk):
+        lengths = pc.list_value_length(chunk)
+        if pc.min(lengths).as_py() != dim or pc.max(lengths).as_py() != dim:
+            raise ValueError(f"Expected {dim}-dim embeddings in every row")
+    values = pc.list_flatten(chunk)
+    if values.type != pa.float32():
+        values = values.cast(pa.float32())
+    return values.to_numpy(zero_copy_only=False).reshape(len(chunk), dim)
+
+
+def embedding_matrix(column, dim = EMBEDDING_DIM, dtype = np.float32, out = None):
+    ''' Function To Turn An Arrow List Column Into A (rows, dim) Matrix With One Buffer Copy
+    Args:
+        column: Arrow list / fixed-size list array or chunked array, or a pandas Series of arrays
+        out: optional preallocated (rows, dim) array to write into
+    Returns:
+        ndarray, C-contiguous unless out is a view
+    '''
+    if out is None:
+        out = np.empty((len(column), dim), dtype=dtype)
+    nulls = column.isna().sum() if isinstance(column, pd.Series) else column.null_count
+    if nulls:
+        raise ValueError(f"{EMBEDDING_COLUMN} has {nulls} null rows")
+
+    if isinstance(column, pd.Series):
+        # A column of per-row arrays (as BigQuery returns REPEATED FLOAT) is copied once into out
+        if len(column):
+            try:
+                np.stack(column.to_numpy(), out=out)
+            except ValueError as e:
+                raise ValueError(f"Expected {dim}-dim embeddings in every row: {e}")
+        return out
+
+    chunks = column.chunks if isinstance(column, pa.ChunkedArray) else [column]
+    offset = 0
+    for chunk in chunks:
+        out[offset:offset + len(chunk)] = _embedding_values(chunk, dim)
+        offset += len(chunk)
+    return out
+
+
+def _encoded(column, categories):
+    ''' Function To Ordinal-Encode A Column Against The Encoder Categories, Unknowns As NaN '''
+    codes = pc.index_in(column.cast(pa.string()), value_set=pa.array(categories, type=pa.string()))
+    unknown = codes.null_count - column.null_count
+    if unknown:
+        logging.warning(f"{unknown} unknown category values encoded as missing")
+    return codes.to_numpy(zero_copy_only=False)
+
+
+def _audit_dates(column):
+    ''' Function To Encode last_audit As The YYYYMMDD Number Used In Training '''
+    if pa.types.is_string(column.type) or pa.types.is_large_string(column.type):
+        column = pc.strptime(column, format='%Y-%m-%d', unit='s', error_is_null=True)
+    encoded = pc.add(pc.add(pc.multiply(pc.year(column), 10000), pc.multiply(pc.month(column), 100)), pc.day(column))
+    return encoded.to_numpy(zero_copy_only=False)
+
+
+def build_features(data, encoder):
+    ''' Function To Build The Model Feature Matrix From A Supplier Frame Or Arrow Table
+    The matrix is float64: last_audit (YYYYMMDD) is past float32's exact integer
+    range, so np.float32(20240115) would come back as 20240116. The embedding block
+    holds float32-rounded values as in training; callers that only need embeddings
+    take them as float32 from embedding_matrix.
+    Args:
+        data: pandas DataFrame, Arrow Table or RecordBatch with FEATURE_COLUMNS and text_embedding
+        encoder: the fitted OrdinalEncoder (Encoder_V1)
+    Returns:
+        X: C-contiguous float64 array of shape (rows, 7 + 384) in FEATURE_COLUMNS order
+    '''
+    table, embeddings = _split_input(data)
+
+    X = np.empty((table.num_rows, N_FEATURES), dtype=np.float64)
+    for i, col in enumerate(FEATURE_COLUMNS):
+        column = table.column(col)
+        if col in ENCODED_COLUMNS:
+            X[:, i] = _encoded(column, encoder.categories_[ENCODED_COLUMNS.index(col)])
+        elif col == 'last_audit':
+            X[:, i] = _audit_dates(column)
+        else:
+            X[:, i] = column.cast(pa.float64()).to_numpy(zero_copy_only=False)
+
+    embedding_matrix(embeddings, out=X[:, len(FEATURE_COLUMNS):])
+    return X
+
+
+def _legacy_features(df, encoder):
+    ''' The Original Per-Row Path From Prediction(), Kept For Benchmarking '''
+    supplier = df.copy()
+    supplier[ENCODED_COLUMNS] = encoder.transform(supplier[ENCODED_COLUMNS])
+    supplier['last_audit'] = supplier['last_audit'].str.replace("-", "", regex=False)
+    supplier['last_audit'] = pd.to_numeric(supplier['last_audit'], errors='coerce')
+    supplier['text_embedding'] = supplier['text_embedding'].apply(lambda e: list(map(float, e)))
+    embeddings = np.vstack(supplier['text_embedding'].values).astype(np.float32)
+    supplier_num = supplier.drop(columns=['text_embedding']).reset_index(drop=True)
+    return np.hstack([supplier_num.values, embeddings])
+
+
+def _synthetic_table(n, encoder, seed = 0):
+    ''' Function To Build A Synthetic Supplier Table With n Rows '''
+    rng = np.random.default_rng(seed)
+    columns = {col: pa.array(encoder.categories_[i][rng.integers(0, len(encoder.categories_[i]), n)].astype(str))
+               for i, col in enumerate(ENCODED_COLUMNS)}
+    days = rng.integers(0, 2000, n).astype('timedelta64[D]') + np.datetime64('2020-01-01')
+    columns['annual_volume'] = pa.array(rng.integers(10_000, 1_000_000, n))
+    columns['cost_premium'] = pa.array(rng.random(n) * 20)
+    columns['last_audit'] = pa.array(np.datetime_as_string(days, unit='D'))
+    values = pa.array(rng.standard_normal(n * EMBEDDING_DIM, dtype=np.float32))
+    columns[EMBEDDING_COLUMN] = pa.ListArray.from_arrays(pa.array(np.arange(0, n * EMBEDDING_DIM + 1, EMBEDDING_DIM, dtype=np.int32)), values)
+    return pa.table({col: columns[col] for col in FEATURE_COLUMNS + [EMBEDDING_COLUMN]})
+
+
+def benchmark(sizes = (1_000, 100_000, 1_000_000), legacy_max_rows = 100_000):
+    ''' Function To Compare build_features With The Original Path At Several Row Counts
+    Each path's matrix is checked to be identical to the Arrow one before its time counts.
+    The legacy path materialises every embedding value as a Python float, so it is
+    skipped above legacy_max_rows where it would need tens of GB of memory.
+    Returns:
+        list of dicts with rows and timings in seconds
+    '''
+    from src.model_registry import get_registry
+    encoder = get_registry().get('encoder')
+    results = []
+    for n in sizes:
+        table = _synthetic_table(n, encoder)
+
+        start = time.perf_counter()
+        X = build_features(table, encoder)
+        arrow_seconds = time.perf_counter() - start
+
+        df = table.to_pandas()
+        del table
+        start = time.perf_counter()
+        X_frame = build_features(df, encoder)
+        frame_seconds = time.perf_counter() - start
+        # Timings only mean something if every path produces the same matrix
+        np.testing.assert_array_equal(X_frame, X)
+        del X_frame
+
+        legacy_seconds = None
+        if n <= legacy_max_rows:
+            start = time.perf_counter()
+            X_legacy = _legacy_features(df, encoder)
+            legacy_seconds = time.perf_counter() - start
+            np.testing.assert_array_equal(X_legacy.astype(np.float64), X)
+            del X_legacy
+        del df, X
+
+        results.append({'rows': n, 'arrow_seconds': arrow_seconds,
+                        'dataframe_seconds': frame_seconds, 'legacy_seconds': legacy_seconds})
+        legacy = f"{legacy_seconds:.3f}s" if legacy_seconds is not None else "skipped"
+        logging.info(f"{n} rows: arrow {arrow_seconds:.3f}s, dataframe {frame_seconds:.3f}s, legacy {legacy}")
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark feature preparation')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 100_000, 1_000_000])
+    parser.add_argument('--legacy-max-rows', type=int, default=100_000)
+    args = parser.parse_args()
+    benchmark(args.sizes, args.legacy_max_rows)
@@ -0,0 +1,175 @@
+import argparse
+import logging
+import time
+import numpy as np
+import pandas as pd
+
+logging.basicConfig(level = logging.INFO)
+
+# Sidebar filter columns, each indexed as categorical codes with one bitmap per value
+INDEXED_COLUMNS = ['country', 'region', 'product_category', 'recommendation', 'risk_level']
+SCORE_COLUMN = 'total_eco_score'
+
+
+class FilterIndex:
+    ''' Class To Evaluate The Dashboard Sidebar Filters Without Copying The Frame
+
+    Each indexed column is factorised into integer codes with a packed bitmap
+    per distinct value, and the score column is argsorted once. A selection ORs
+    the bitmaps of the chosen values within a column, ANDs across columns,
+    applies the score threshold through a binary search on the sorted scores and
+    returns one array of row positions, so the frame is only copied by the final
+    take().
+    '''
+    def __init__(self, df, columns = INDEXED_COLUMNS, score_column = SCORE_COLUMN):
+        start = time.perf_counter()
+        self.n = len(df)
+        self.columns = [col for col in columns if col in df.columns]
+        self.labels = {}
+        self.bitmaps = {}
+        for col in self.columns:
+            codes, labels = pd.factorize(df[col], sort=True)
+            self.labels[col] = pd.Index(labels)
+            self.bitmaps[col] = np.packbits(codes[None, :] == np.arange(len(labels))[:, None], axis=1)
+
+        self.score_column = score_column
+        scores = df[score_column].to_numpy(dtype=np.float64)
+        # NaN scores sort last and never pass a threshold
+        self.order = np.argsort(scores, kind='stable')
+        self.sorted_scores = scores[self.order]
+        self.n_scored = int(np.count_nonzero(~np.isnan(scores)))
+        logging.info(f" Filter index built for {self.n} rows in {(time.perf_counter() - start) * 1000:.1f}ms")
+
+    def options(self, col):
+        ''' Function To Return The Sorted Distinct Values Of An Indexed Column '''
+        return self.labels[col].tolist()
+
+    def _column_bitmap(self, col, values):
+        codes = self.labels[col].get_indexer(pd.Index(values).unique())
+        codes = codes[codes >= 0]
+        if len(codes) == 0:
+            return np.zeros(self.bitmaps[col].shape[1], dtype=np.uint8)
+        return np.bitwise_or.reduce(self.bitmaps[col][codes], axis=0)
+
+    def select(self, filters = None, min_score = None):
+        ''' Function To Return The Positions Of The Rows Passing Every Filter
+        Args:
+            filters: dict of indexed column -> allowed values; empty lists are ignored
+            min_score: keep rows with score >= min_score
+        Returns:
+            int64 array of row positions, in frame order
+        '''
+        bitmap = None
+        for col, values in (filters or {}).items():
+            if not values:
+                continue
+            if col not in self.bitmaps:
+                raise ValueError(f"Unsupported filter column: {col}")
+            column_bitmap = self._column_bitmap(col, values)
+            bitmap = column_bitmap if bitmap is None else np.bitwise_and(bitmap, column_bitmap, out=bitmap)
+
+        # Rows passing the threshold are order[start:end]; end excludes the NaN scores sorted last
+        if min_score is None:
+            start, end = 0, self.n
+        else:
+            start = int(np.searchsorted(self.sorted_scores[:self.n_scored], min_score, side='left'))
+            end = self.n_scored
+
+        if bitmap is None:
+            if start == 0 and end == self.n:
+                return np.arange(self.n, dtype=np.int64)
+            return np.sort(self.order[start:end]).astype(np.int64)
+
+        mask = np.unpackbits(bitmap, count=self.n).view(bool)
+        if start or end < self.n:
+            # Clear whichever side of the threshold is smaller
+            if start + (self.n - end) <= end - start:
+                mask[self.order[:start]] = False
+                mask[self.order[end:]] = False
+            else:
+                passing = np.zeros(self.n, dtype=bool)
+                passing[self.order[start:end]] = True
+                mask &= passing
+        return np.flatnonzero(mask)
+
+    def filter(self, df, filters = None, min_score = None):
+        ''' Function To Return The Filtered Frame With A Single take() '''
+        return df.take(self.select(filters, min_score))
+
+
+def _synthetic_suppliers(n, seed = 0):
+    ''' Function To Build A Synthetic Supplier Frame With n Rows For Benchmarking '''
+    rng = np.random.default_rng(seed)
+    countries = np.array([f'Country {i}' for i in range(60)])
+    return pd.DataFrame({
+        'country': countries[rng.integers(0, len(countries), n)],
+        'region': np.array(['Africa', 'Asia', 'Europe', 'North America', 'South America', 'Oceania'])[rng.integers(0, 6, n)],
+        'product_category': np.array(['Textiles', 'Electronics', 'Food', 'Packaging', 'Chemicals'])[rng.integers(0, 5, n)],
+        'recommendation': np.array(['Preferred', 'Neutral', 'Avoid'])[rng.integers(0, 3, n)],
+        'risk_level': np.array(['Low', 'Medium', 'High'])[rng.integers(0, 3, n)],
+        SCORE_COLUMN: rng.random(n) * 100,
+    })
+
+
+def _chained_filter(df, filters, min_score):
+    ''' Function Reproducing The Original Sidebar Filtering: One isin Pass And Copy Per Column '''
+    filtered_df = df.copy()
+    for col, values in filters.items():
+        if values:
+            filtered_df = filtered_df[filtered_df[col].isin(values)]
+    return filtered_df[filtered_df[SCORE_COLUMN] >= min_score]
+
+
+def benchmark(sizes = (1_000_000,), repeats = 5):
+    ''' Function To Compare FilterIndex With The Chained isin Filtering At Several Row Counts
+    Returns:
+        list of dicts with rows and mean timings in seconds
+    '''
+    scenarios = {
+        'one country': ({'country': ['Country 3']}, 0.0),
+        'typical': ({'region': ['Africa', 'Asia'], 'product_category': ['Textiles'], 'risk_level': ['Low', 'Medium']}, 40.0),
+        'all filters': ({'country': [f'Country {i}' for i in range(20)], 'region': ['Africa', 'Asia', 'Europe'],
+                         'product_category': ['Textiles', 'Food'], 'recommendation': ['Preferred'],
+                         'risk_level': ['Low']}, 75.0),
+        'score only': ({}, 90.0),
+    }
+    results = []
+    for n in sizes:
+        df = _synthetic_suppliers(n)
+        start = time.perf_counter()
+        index = FilterIndex(df)
+        build_seconds = time.perf_counter() - start
+
+        for name, (filters, min_score) in scenarios.items():
+            start = time.perf_counter()
+            for _ in range(repeats):
+                expected = _chained_filter(df, filters, min_score)
+            chained_seconds = (time.perf_counter() - start) / repeats
+
+            start = time.perf_counter()
+            for _ in range(repeats):
+                positions = index.select(filters, min_score)
+            select_seconds = (time.perf_counter() - start) / repeats
+
+            start = time.perf_counter()
+            for _ in range(repeats):
+                filtered = index.filter(df, filters, min_score)
+            filter_seconds = (time.perf_counter() - start) / repeats
+
+            if not filtered.index.equals(expected.index):
+                raise AssertionError(f"FilterIndex disagrees with chained filtering for '{name}'")
+            results.append({'rows': n, 'scenario': name, 'matches': len(positions), 'build_seconds': build_seconds,
+                            'chained_seconds': chained_seconds, 'select_seconds': select_seconds,
+                            'filter_seconds': filter_seconds})
+            logging.info(f"{n} rows, {name}: {len(positions)} matches, chained isin {chained_seconds * 1000:.1f}ms, "
+                         f"index select {select_seconds * 1000:.1f}ms, select + take {filter_seconds * 1000:.1f}ms "
+                         f"(index built once in {build_seconds * 1000:.0f}ms)")
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark sidebar filtering')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000_000])
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+    benchmark(args.sizes, args.repeats)
@@ -0,0 +1,178 @@
+from google.cloud import bigquery
+import logging
+import os
+import sqlite3
+import threading
+import time
+from src.clients import get_provider
+
+logging.basicConfig(level = logging.INFO)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BASE_DIR)
+LOCAL_SEQUENCE_PATH = os.path.join(PROJECT_ROOT, 'cache', 'id_sequences.sqlite')
+
+SEQUENCE_TABLE = 'ecochain123.supplychain.id_sequences'
+SUPPLIER_SEQUENCE = 'supplier_id'
+SUPPLIER_PREFIX = 'SUP'
+# Ids reserved per round trip to the counter store; unused ids of a block are skipped, never reused
+DEFAULT_BLOCK_SIZE = 20
+CONFLICT_RETRIES = 5
+CONFLICT_BACKOFF_SECONDS = 0.5
+
+# Highest existing SUP#### number, read once to start a sequence that does not exist yet
+MAX_SUPPLIER_NUMBER_SQL = r"""
+    SELECT IFNULL(MAX(CAST(REGEXP_EXTRACT(supplier_id, r'SUP(\d+)') AS INT64)), 0)
+    FROM `ecochain123.supplychain.suppliers_with_images`
+"""
+
+
+class BigQueryCounterStore:
+    ''' Class To Reserve Blocks Of A Named Sequence From A BigQuery Counter Table
+
+    The table holds one (name, next_value) row per sequence. A reservation is a
+    multi-statement transaction: the row is advanced by count and the value read
+    back before commit, so concurrent reservations get disjoint ranges; one that
+    loses a write conflict is retried. A missing row is created from seed_sql.
+    '''
+    def __init__(self, client, table = SEQUENCE_TABLE, seed_sql = MAX_SUPPLIER_NUMBER_SQL,
+                 retries = CONFLICT_RETRIES, backoff = CONFLICT_BACKOFF_SECONDS):
+        self.client = client
+        self.table = table
+        self.seed_sql = seed_sql
+        self.retries = retries
+        self.backoff = backoff
+
+    def reserve(self, name, count):
+        ''' Function To Reserve count Consecutive Values
+        Returns:
+            first reserved value; the block is [first, first + count)
+        '''
+        script = f"""
+            DECLARE reserved INT64;
+            CREATE TABLE IF NOT EXISTS `{self.table}` (name STRING NOT NULL, next_value INT64 NOT NULL);
+            BEGIN TRANSACTION;
+              MERGE `{self.table}` t
+              USING (SELECT @name AS name) s
+              ON t.name = s.name
+              WHEN MATCHED THEN
+                UPDATE SET next_value = t.next_value + @count
+              WHEN NOT MATCHED THEN
+                INSERT (name, next_value) VALUES (@name, ({self.seed_sql}) + 1 + @count);
+              SET reserved = (SELECT next_value FROM `{self.table}` WHERE name = @name);
+            COMMIT TRANSACTION;
+            SELECT reserved - @count AS first_value;
+        """
+        job_config = bigquery.QueryJobConfig(query_parameters=[
+            bigquery.ScalarQueryParameter('name', 'STRING', name),
+            bigquery.ScalarQueryParameter('count', 'INT64', int(count)),
+        ])
+        for attempt in range(self.retries + 1):
+            try:
+                rows = list(self.client.query(script, job_config=job_config).result())
+                return int(rows[0]['first_value'])
+            except Exception as e:
+                # Concurrent transactions on the counter row abort all but one
+                if 'concurrent update' not in str(e).lower() or attempt == self.retries:
+                    raise
+                logging.info(f"Sequence {name} reservation conflicted, retrying (attempt {attempt + 1})")
+                time.sleep(self.backoff * 2 ** attempt)
+
+
+class SQLiteCounterStore:
+    ''' Class To Reserve Blocks Of A Named Sequence From A Local SQLite File
+
+    The local stand-in for BigQueryCounterStore: BEGIN IMMEDIATE takes the write
+    lock before reading, so processes and threads sharing the file never get
+    overlapping blocks. seed(name) gives the last used value of a new sequence.
+    '''
+    def __init__(self, path = LOCAL_SEQUENCE_PATH, seed = None, timeout = 30.0):
+        self.path = path
+        self.seed = seed
+        self.timeout = timeout
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        db = self._connect()
+        try:
+            db.execute('CREATE TABLE IF NOT EXISTS sequences (name TEXT PRIMARY KEY, next_value INTEGER NOT NULL)')
+        finally:
+            db.close()
+
+    def _connect(self):
+        # isolation_level=None leaves transaction control to the explicit BEGIN / COMMIT below
+        return sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+
+    def reserve(self, name, count):
+        ''' Function To Reserve count Consecutive Values
+        Returns:
+            first reserved value; the block is [first, first + count)
+        '''
+        db = self._connect()
+        try:
+            db.execute('BEGIN IMMEDIATE')
+            row = db.execute('SELECT next_value FROM sequences WHERE name = ?', (name,)).fetchone()
+            first = row[0] if row else (self.seed(name) if self.seed else 0) + 1
+            db.execute('INSERT OR REPLACE INTO sequences VALUES (?, ?)', (name, first + count))
+            db.execute('COMMIT')
+            return first
+        except Exception:
+            if db.in_transaction:
+                db.execute('ROLLBACK')
+            raise
+        finally:
+            db.close()
+
+
+class IdAllocator:
+    ''' Class To Hand Out Prefixed Ids From Blocks Reserved In A Counter Store
+
+    Each block costs one store round trip and is then handed out from memory,
+    so allocating an id never scans the supplier table and two workers can
+    never return the same id.
+    '''
+    def __init__(self, store, name = SUPPLIER_SEQUENCE, prefix = SUPPLIER_PREFIX, block_size = DEFAULT_BLOCK_SIZE):
+        self.store = store
+        self.name = name
+        self.prefix = prefix
+        self.block_size = block_size
+        self._next = 0
+        self._end = 0
+        self._lock = threading.Lock()
+
+    def _format(self, value):
+        return f"{self.prefix}{value}"
+
+    def next_id(self):
+        ''' Function To Return The Next Unused Id '''
+        return self.allocate(1)[0]
+
+    def allocate(self, count):
+        ''' Function To Return count Unused Ids, Reserving Further Blocks As Needed
+        Returns:
+            list of ids in increasing order
+        '''
+        ids = []
+        with self._lock:
+            while len(ids) < count:
+                if self._next >= self._end:
+                    # A large request reserves what it needs in one go
+                    size = max(self.block_size, count - len(ids))
+                    self._next = self.store.reserve(self.name, size)
+                    self._end = self._next + size
+                take = min(count - len(ids), self._end - self._next)
+                ids.extend(self._format(value) for value in range(self._next, self._next + take))
+                self._next += take
+        return ids
+
+
+_allocator = None
+_allocator_lock = threading.Lock()
+
+
+def get_id_allocator():
+    ''' Function To Return The Process-Wide Supplier Id Allocator, Backed By BigQuery '''
+    global _allocator
+    if _allocator is None:
+        with _allocator_lock:
+            if _allocator is None:
+                _allocator = IdAllocator(BigQueryCounterStore(get_provider().bigquery_client()))
+    return _allocator
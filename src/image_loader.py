@@ -1,35 +1,286 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
 import io
-from PIL import Image
+import json
+import os
+import threading
+import time
+from PIL import Image, UnidentifiedImageError
 import requests
 import logging
 
 logging.basicConfig(level = logging.INFO)
 
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BASE_DIR)
+IMAGE_CACHE_DIR = os.path.join(PROJECT_ROOT, 'cache', 'images')
+
+THUMBNAIL_SIZE = 400
+MAX_IMAGE_BYTES = 20 * 1024 * 1024
+MAX_MEMORY_BYTES = 64 * 1024 * 1024
+MAX_DISK_BYTES = 512 * 1024 * 1024
+# Cached thumbnails are served without a request for this long, then revalidated with a conditional GET
+REVALIDATE_SECONDS = 60 * 60
+REQUEST_TIMEOUT = (5, 20)
+IMAGE_WORKERS = 8
+# Prefetching gets its own small pool so it never queues ahead of the images on screen
+PREFETCH_WORKERS = 2
+
+
+def public_url(image_path):
+    ''' Function To Turn A gs://bucket/path Into Its Public HTTPS URL '''
+    if 'https' in image_path:
+        return image_path
+    bucket_name, path_to_image = image_path.replace("gs://", "").split("/", 1)
+    return f"https://storage.googleapis.com/{bucket_name}/{path_to_image}"
+
+
+def split_image_urls(image_url):
+    ''' Function To Split The Comma-Separated image_url Column Into Public URLs '''
+    if not image_url or not isinstance(image_url, str):
+        return []
+    return [public_url(url.strip()) for url in image_url.split(',') if url.strip()]
+
+
+def _make_thumbnail(content, size):
+    ''' Function To Decode An Image And Encode A Downscaled Copy, Raising UnidentifiedImageError For Non-Images '''
+    image = Image.open(io.BytesIO(content))
+    # JPEG can decode straight at a reduced scale, which is much cheaper than a full decode
+    image.draft('RGB', (size, size))
+    image.thumbnail((size, size))
+    buffer = io.BytesIO()
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image.save(buffer, format='PNG', optimize=True)
+    else:
+        image.convert('RGB').save(buffer, format='JPEG', quality=85)
+    return buffer.getvalue()
+
+
+class ImageService:
+    ''' Class To Fetch Supplier Images Once And Serve Thumbnails From A Two-Level Cache
+
+    Thumbnails are kept in a byte-bounded in-memory LRU and in a byte-bounded
+    disk cache keyed by URL, with the ETag / Last-Modified of the original so a
+    stale entry is revalidated with a conditional GET rather than downloaded
+    again. Requests share one pooled session with timeouts.
+    '''
+    def __init__(self, cache_dir = IMAGE_CACHE_DIR, thumbnail_size = THUMBNAIL_SIZE,
+                 max_memory_bytes = MAX_MEMORY_BYTES, max_disk_bytes = MAX_DISK_BYTES,
+                 revalidate_after = REVALIDATE_SECONDS, session = None, workers = IMAGE_WORKERS,
+                 prefetch_workers = PREFETCH_WORKERS):
+        self.cache_dir = cache_dir
+        self.thumbnail_size = thumbnail_size
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.revalidate_after = revalidate_after
+        if session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+            session.mount('https://', adapter)
+        self.session = session
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.RLock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='image-fetch')
+        self._prefetch_pool = ThreadPoolExecutor(max_workers=prefetch_workers, thread_name_prefix='image-prefetch')
+        self._prefetching = set()
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'revalidated': 0, 'downloads': 0}
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _paths(self, url):
+        key = hashlib.sha256(f"{url}:{self.thumbnail_size}".encode()).hexdigest()
+        base = os.path.join(self.cache_dir, key)
+        return base + '.img', base + '.json'
+
+    def _remember(self, url, entry):
+        with self._lock:
+            previous = self._memory.pop(url, None)
+            if previous is not None:
+                self._memory_bytes -= len(previous['data'])
+            self._memory[url] = entry
+            self._memory_bytes += len(entry['data'])
+            while self._memory_bytes > self.max_memory_bytes and len(self._memory) > 1:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted['data'])
+
+    def _read_disk(self, url):
+        data_path, meta_path = self._paths(url)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            with open(data_path, 'rb') as f:
+                meta['data'] = f.read()
+            # Reads refresh the modification time, which is what disk eviction orders by
+            os.utime(data_path)
+            return meta
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, url, entry):
+        data_path, meta_path = self._paths(url)
+        meta = {key: value for key, value in entry.items() if key != 'data'}
+        for path, payload, mode in ((data_path, entry['data'], 'wb'), (meta_path, json.dumps(meta), 'w')):
+            tmp_path = path + '.tmp'
+            with open(tmp_path, mode) as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+        self._evict_disk()
+
+    def _evict_disk(self):
+        ''' Function To Drop The Least Recently Used Thumbnails Once The Disk Cache Exceeds Its Budget '''
+        with self._lock:
+            files = []
+            for name in os.listdir(self.cache_dir):
+                if name.endswith('.img'):
+                    path = os.path.join(self.cache_dir, name)
+                    stat = os.stat(path)
+                    files.append((stat.st_mtime, stat.st_size, path))
+            total = sum(size for _, size, _ in files)
+            for _, size, path in sorted(files):
+                if total <= self.max_disk_bytes:
+                    break
+                for stale in (path, path[:-len('.img')] + '.json'):
+                    if os.path.exists(stale):
+                        os.remove(stale)
+                total -= size
+
+    def _download(self, url, cached = None):
+        ''' Function To GET An Image, Conditionally When A Cached Copy Exists
+        Returns:
+            cache entry dict with data, etag, last_modified and checked_at
+        '''
+        headers = {}
+        if cached is not None:
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
+
+        with self.session.get(url, headers=headers, timeout=REQUEST_TIMEOUT, stream=True) as response:
+            if response.status_code == 304 and cached is not None:
+                self.stats['revalidated'] += 1
+                return dict(cached, checked_at=time.time())
+            response.raise_for_status()
+            declared = int(response.headers.get('Content-Length') or 0)
+            if declared > MAX_IMAGE_BYTES:
+                raise ValueError(f"Image at {url} is {declared} bytes, over the {MAX_IMAGE_BYTES} limit")
+            content = bytearray()
+            for chunk in response.iter_content(64 * 1024):
+                content.extend(chunk)
+                if len(content) > MAX_IMAGE_BYTES:
+                    raise ValueError(f"Image at {url} is over the {MAX_IMAGE_BYTES} byte limit")
+            self.stats['downloads'] += 1
+            return {
+                'url': url,
+                'data': _make_thumbnail(bytes(content), self.thumbnail_size),
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'checked_at': time.time(),
+            }
+
+    def thumbnail_bytes(self, url):
+        ''' Function To Return The Encoded Thumbnail For One Image URL '''
+        url = public_url(url)
+        with self._lock:
+            entry = self._memory.get(url)
+            if entry is not None:
+                self._memory.move_to_end(url)
+                self.stats['memory_hits'] += 1
+        if entry is None:
+            entry = self._read_disk(url)
+            if entry is not None:
+                self.stats['disk_hits'] += 1
+
+        if entry is None or time.time() - entry.get('checked_at', 0) > self.revalidate_after:
+            try:
+                fresh = self._download(url, entry)
+            except requests.exceptions.RequestException:
+                if entry is None:
+                    raise
+                # Offline: a stale thumbnail is better than none
+                logging.warning(f"Could not revalidate {url}, serving cached thumbnail")
+                fresh = entry
+            if fresh is not entry:
+                self._write_disk(url, fresh)
+            entry = fresh
+        self._remember(url, entry)
+        return entry['data']
+
+    def thumbnail(self, url):
+        ''' Function To Return One Image As A Downscaled PIL Image '''
+        return Image.open(io.BytesIO(self.thumbnail_bytes(url)))
+
+    def thumbnails(self, image_url):
+        ''' Function To Return Thumbnails For Every URL In A Comma-Separated image_url, Fetched In Parallel
+        Returns:
+            list of PIL images; URLs that fail are logged and skipped
+        '''
+        urls = split_image_urls(image_url)
+        futures = [self._pool.submit(self.thumbnail, url) for url in urls]
+        images = []
+        for url, future in zip(urls, futures):
+            try:
+                images.append(future.result())
+            except Exception as e:
+                logging.error(f"Failed to load image {url}: {e}")
+        return images
+
+    def prefetch(self, image_urls):
+        ''' Function To Warm The Cache For Several image_url Values In The Background Without Waiting
+        URLs already cached or already queued are skipped, so calling this on every rerun is cheap
+        '''
+        for image_url in image_urls:
+            for url in split_image_urls(image_url):
+                with self._lock:
+                    if url in self._memory or url in self._prefetching:
+                        continue
+                    self._prefetching.add(url)
+                self._prefetch_pool.submit(self._prefetch_one, url)
+
+    def _prefetch_one(self, url):
+        try:
+            self.thumbnail_bytes(url)
+        except Exception as e:
+            logging.info(f"Prefetch of {url} failed: {e}")
+        finally:
+            with self._lock:
+                self._prefetching.discard(url)
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_image_service():
+    ''' Function To Return The Process-Wide Image Service '''
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = ImageService()
+    return _service
+
 
 def image_reader(image_path:str):
     """
     Function for converting a GCS path (gs://...) into a PIL image.
 
     Args:
-        image_path (str): Path to image (gs://bucket/file.png)
+        image_path (str): Path to image (gs://bucket/file.png), or a comma-separated
+            list of paths, in which case the first image is returned
 
     Returns:
-        PIL.Image object or None if failed
+        PIL.Image object (a cached thumbnail) or None if failed
     """
     try:
       logging.info("Converting Image In Progress")
-      if 'https' not in image_path:
-            url = image_path
-            parts  = url.replace("gs://","").split("/",1)
-            bucket_name = parts[0]
-            path_to_image = parts[1]
-
-            public_url = f"https://storage.googleapis.com/{bucket_name}/{path_to_image}"
-      else:
-            public_url = image_path
-      logging.info(f"Connecting to image URL: {public_url}")
-      response = requests.get(public_url)
-      image = Image.open(io.BytesIO(response.content))
+      urls = split_image_urls(image_path)
+      if not urls:
+            logging.error("No image URL given")
+            return None
+      logging.info(f"Connecting to image URL: {urls[0]}")
+      image = get_image_service().thumbnail(urls[0])
       logging.info("Image Retrieved Successfully")
 
       return image
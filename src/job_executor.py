@@ -0,0 +1,200 @@
+from google.cloud import bigquery
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import asyncio
+import logging
+import threading
+import time
+from src.clients import get_provider
+
+logging.basicConfig(level = logging.INFO)
+
+EXECUTOR_WORKERS = 16
+DEFAULT_TIMEOUT_SECONDS = 300
+FETCH_MODES = ('rows', 'dataframe', 'arrow', 'job')
+
+
+class QueryTimeout(TimeoutError):
+    ''' Raised When A Query Does Not Finish Within Its Timeout; The Job Is Cancelled '''
+
+
+class QueryHandle:
+    ''' Class Tracking One Submitted Query: A Future For Its Result Plus The Underlying Job
+
+    Await it from asyncio code, or call result(). cancel() cancels the BigQuery
+    job as well as the future, so an abandoned query stops running server-side.
+    '''
+    def __init__(self, query, label = None):
+        self.query = query
+        self.label = label or ' '.join(query.split())[:60]
+        self.job = None
+        self.future = None
+        self.submitted_at = time.perf_counter()
+        self.finished_at = None
+        self._cancelled = threading.Event()
+
+    def result(self, timeout = None):
+        ''' Function To Wait For The Query Result, Raising Its Error If It Failed '''
+        return self.future.result(timeout)
+
+    def done(self):
+        return self.future.done()
+
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        ''' Function To Cancel The Query, Whether Or Not It Has Started
+        Returns:
+            bool: False when the query had already finished
+        '''
+        if self.future.done():
+            return False
+        self._cancelled.set()
+        self.future.cancel()
+        if self.job is not None:
+            try:
+                self.job.cancel()
+            except Exception as e:
+                logging.warning(f"Could not cancel job for {self.label}: {e}")
+        return True
+
+    @property
+    def elapsed(self):
+        end = self.finished_at if self.finished_at is not None else time.perf_counter()
+        return end - self.submitted_at
+
+    def __await__(self):
+        return asyncio.wrap_future(self.future).__await__()
+
+
+def _job_config(parameters, job_config):
+    if job_config is not None:
+        return job_config
+    return bigquery.QueryJobConfig(query_parameters=list(parameters)) if parameters else None
+
+
+class JobExecutor:
+    ''' Class To Run BigQuery Jobs Concurrently
+
+    client.query() only starts a job; waiting on .result() straight away is what
+    serialises independent queries. submit() starts the job from a worker thread
+    and returns a QueryHandle at once, so several queries run side by side and
+    are collected with gather(). Each wait has a timeout, after which the job is
+    cancelled. script() sends dependent statements as one multi-statement job.
+    It is meant for reads: BigQuery runs at most two mutating DML statements
+    per table at once, so DML against one table is better issued in sequence.
+    '''
+    def __init__(self, client = None, max_workers = EXECUTOR_WORKERS, timeout = DEFAULT_TIMEOUT_SECONDS):
+        self._client = client
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='bigquery-job')
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = get_provider().bigquery_client()
+        return self._client
+
+    def submit(self, query, parameters = None, job_config = None, fetch = 'rows', timeout = None,
+               client = None, label = None):
+        ''' Function To Start A Query Without Waiting For It
+        Args:
+            parameters: query parameters, or a ready job_config
+            fetch: 'rows' (list of Row), 'dataframe', 'arrow' or 'job' (the finished job, e.g. for DML counts)
+            timeout: seconds to wait for the job, the executor default when None
+            client: BigQuery client to run on, the executor's when None
+        Returns:
+            QueryHandle
+        '''
+        if fetch not in FETCH_MODES:
+            raise ValueError(f"fetch must be one of {FETCH_MODES}, got {fetch}")
+        handle = QueryHandle(query, label)
+        handle.future = self._pool.submit(self._run, handle, client or self.client,
+                                          _job_config(parameters, job_config), fetch,
+                                          self.timeout if timeout is None else timeout)
+        return handle
+
+    def _run(self, handle, client, job_config, fetch, timeout):
+        try:
+            if handle.cancelled():
+                raise RuntimeError(f"Query cancelled before it started: {handle.label}")
+            handle.job = client.query(handle.query, job_config=job_config)
+            # cancel() may have come in while the job was being created, before there was a job to cancel
+            if handle.cancelled():
+                handle.job.cancel()
+                raise RuntimeError(f"Query cancelled: {handle.label}")
+            try:
+                handle.job.result(timeout=timeout)
+            except FutureTimeoutError:
+                handle.job.cancel()
+                raise QueryTimeout(f"Query timed out after {timeout}s and was cancelled: {handle.label}")
+            if fetch == 'rows':
+                return list(handle.job.result())
+            if fetch == 'dataframe':
+                return handle.job.to_dataframe()
+            if fetch == 'arrow':
+                return handle.job.to_arrow()
+            return handle.job
+        finally:
+            handle.finished_at = time.perf_counter()
+
+    def script(self, statements, parameters = None, job_config = None, fetch = 'rows', timeout = None,
+               client = None, label = None):
+        ''' Function To Run Dependent Statements As One Multi-Statement Job (One Round Trip)
+        Args:
+            statements: list of SQL statements, run in order; they share the parameters
+        Returns:
+            QueryHandle whose result is that of the last statement
+        '''
+        script = ';\n'.join(statement.strip().rstrip(';') for statement in statements) + ';'
+        return self.submit(script, parameters, job_config, fetch, timeout, client,
+                           label or f"script of {len(statements)} statements")
+
+    def gather(self, handles, timeout = None):
+        ''' Function To Wait For Several Handles And Return Their Results In Order
+        If one fails or the overall timeout passes, the others are cancelled and the error raised.
+        '''
+        handles = list(handles)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        results = []
+        try:
+            for handle in handles:
+                remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    results.append(handle.result(remaining))
+                except FutureTimeoutError:
+                    raise QueryTimeout(f"Queries did not finish within {timeout}s")
+        except BaseException:
+            for handle in handles:
+                handle.cancel()
+            raise
+        return results
+
+    def call(self, fn, *args, **kwargs):
+        ''' Function To Run Any Blocking Callable, e.g. A Snapshot Load, Alongside The Queries
+        Returns:
+            concurrent.futures.Future
+        '''
+        return self._pool.submit(fn, *args, **kwargs)
+
+    async def aquery(self, query, parameters = None, **kwargs):
+        ''' Coroutine Running One Query: await executor.aquery(...) '''
+        return await self.submit(query, parameters, **kwargs)
+
+    def shutdown(self, wait = True, cancel = False):
+        ''' Function To Stop The Worker Threads, Optionally Cancelling Queries Not Yet Started '''
+        self._pool.shutdown(wait=wait, cancel_futures=cancel)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_job_executor():
+    ''' Function To Return The Process-Wide Job Executor On The Shared BigQuery Client '''
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = JobExecutor()
+    return _executor
@@ -2,16 +2,92 @@ from src.data_loader import BigQueryCONN
 import logging
 from google.cloud import bigquery
 from src.prompt_classifier import classify_prompt
+from src.context_builder import build_context, extract_filters, CONTEXT_COLUMNS, DEFAULT_TOKEN_BUDGET
+from src.vector_index import get_vector_index, FILTER_COLUMNS
+from src.embeddings import get_embedding_service
+from src.streaming import sanitize_stream, stream_generate
+import pandas as pd
 import re
+import time
 
 logging.basicConfig(level=logging.INFO)
 
 class LMMConnectors:
     ''' Class To Handle All Core BigQuery AI Logic '''
-    def __init__(self, prompt):
+    def __init__(self, prompt, token_budget = DEFAULT_TOKEN_BUDGET):
         self.conn = BigQueryCONN()
         self.client = self.conn.bigquery_client()
         self.prompt = prompt
+        self.token_budget = token_budget
+
+    def _generate(self, request):
+        ''' Function To Run A Full Prompt Through BigQuery's AI.Generate
+        Returns:
+          AI Response
+        '''
+        query = '''
+                SELECT
+                    AI.GENERATE(
+                        @request,
+                        connection_id => 'us.test_connection',
+                        endpoint => 'gemini-2.5-flash'
+                    ).result AS response;
+                '''
+        job_config = bigquery.QueryJobConfig(
+                    query_parameters=[
+                        bigquery.ScalarQueryParameter("request", "STRING", request)
+                    ]
+                )
+        query_job = self.client.query(query, job_config=job_config)
+
+        for row in query_job.result():
+            response = row["response"]
+        clean_response = re.sub(r'[*#]+', '', response)
+
+        return clean_response.strip()
+
+    def _ai_generate_prompt(self):
+        ''' Function To Build The AI.GENERATE Prompt From The Supplier Rows Relevant To The Query '''
+        # Only rows relevant to the prompt are sent, within the token budget
+        suppliers = self.conn.bigquery_loader(columns=CONTEXT_COLUMNS)
+        context = build_context(self.prompt, suppliers, self.token_budget)
+        logging.info(f"AI.GENERATE prompt size: {len(context['context'])} chars, ~{context['approx_tokens']} tokens")
+
+        return ('You Are An EcoFriendly Supplier Recommender Assistant for ECOCHAIN AI. '
+                'Here is the supplier data relevant to the query in JSON format '
+                '(a summary of the matching suppliers, then one row per supplier ranked by relevance):\n'
+                f'{context["context"]}\n\nUser query: {self.prompt}.')
+
+    def _vector_search_prompt(self, top_k = 5):
+        ''' Function To Build The Vector Search Prompt From The Local Index
+        Returns:
+          prompt text, or None when there is no local index
+        '''
+        index = get_vector_index().sync(self.client)
+        if len(index) == 0:
+            return None
+
+        # Country / category / risk named in the prompt narrow the search
+        metadata = pd.DataFrame(index.metadata)
+        filters = {col: values for col, values in extract_filters(self.prompt, metadata).items()
+                   if col in FILTER_COLUMNS}
+        embedding = self._embed_prompt()
+        start = time.perf_counter()
+        matches = index.search(embedding, k=top_k, **filters)
+        logging.info(f"Local vector search returned {len(matches)} rows in "
+                     f"{(time.perf_counter() - start) * 1000:.2f}ms, filters {filters}")
+        if not matches and filters:
+            matches = index.search(embedding, k=top_k)
+
+        similarity = dict(matches)
+        rows = self.conn.bigquery_loader(columns=CONTEXT_COLUMNS, filters={'supplier_id': list(similarity)})
+        rows['similarity'] = rows['supplier_id'].map(similarity).round(4)
+        rows = rows.sort_values('similarity', ascending=False)
+        context = rows.to_json(orient='records', lines=True, date_format='iso')
+
+        return ("Based on these rows - preferably list out the main facts about it first then explanation "
+                "below it unless prompted otherwise, answer the user:\n"
+                f"{context}\nPROMPT: {self.prompt}")
 
     def AI_Generate(self):
         ''' Function To Connect to BigQuery's AI.Generate
@@ -20,67 +96,59 @@ class LMMConnectors:
         '''
         try:
             logging.info("Using AI.GENERATE to Answer Prompt")
+            return self._generate(self._ai_generate_prompt())
 
-            query = r"""
-                        SELECT
-                            AI.GENERATE(
-                                CONCAT(
-                                    'You Are An EcoFriendly Supplier Recommender Assistant for ECOCHAIN AI. ',
-                                    'Here is the supplier dataset in JSON format:\n',
-                                    TO_JSON_STRING(ARRAY_AGG(STRUCT(
-                                        supplier_id,
-                                        supplier_name,
-                                        country,
-                                        region,
-                                        product_category,
-                                        sub_category,
-                                        total_eco_score,
-                                        carbon_score,
-                                        water_score,
-                                        waste_score,
-                                        social_score,
-                                        certification,
-                                        partnership_status,
-                                        annual_volume,
-                                        cost_premium,
-                                        risk_level,
-                                        last_audit,
-                                        image_url,
-                                        audit_summary
-                                    ))),
-                                    '\n\nUser query: ', @prompt, '.'
-                                ),
-                                connection_id => 'us.test_connection',
-                                endpoint => 'gemini-2.5-flash'
-                            ).result AS response
-                        FROM `ecochain123.supplychain.suppliers_with_images`;
-                    """
-
-            job_config = bigquery.QueryJobConfig(
-                        query_parameters=[
-                            bigquery.ScalarQueryParameter("prompt", "STRING", self.prompt)
-                        ]
-                    )
+        except Exception as e:
+            logging.error(f"AI.GENERATE Failed to Generate Output: {e}")
+            return None
 
-            query_job = self.client.query(query, job_config=job_config)
+    def _embed_prompt(self):
+        ''' Function To Embed The Prompt With The Same Model As The Supplier Embeddings, Cached By Content '''
+        return get_embedding_service().embed_one(self.prompt)
 
-            for row in query_job.result():
-                response = row["response"]
-            clean_response = re.sub(r'[*#]+', '', response)
+    def Vector_Search(self, top_k = 5):
+        ''' Function Uses a Hybrid Approach that ensure better accuracy by searching the local vector index and feeding its results to AI.Generate
+        Returns:
+          AI Response
+        '''
+        try:
+            logging.info("Using Vector Search Hybrid Approach to answer prompt")
 
-            return clean_response.strip()
+            request = self._vector_search_prompt(top_k)
+            if request is None:
+                return self._remote_vector_search()
+            return self._generate(request)
 
         except Exception as e:
-            logging.error(f"AI.GENERATE Failed to Generate Output: {e}")
-            return None
+                    logging.error(f"Failed to Answer Prompt with Vector Search {e}")
 
-    def Vector_Search(self):
-        ''' Function Uses a Hybrid Approach that ensure better accuracy by using BigQuery Vector Search and feeding its results to AI.Generate
+    def stream(self, route):
+        ''' Function To Stream The Answer For A Route Chunk By Chunk
+        Args:
+          route: AI.GENERATE or VECTOR_SEARCH, as returned by classify_prompt
+        Yields:
+          sanitised text chunks
+        '''
+        logging.info(f"Streaming answer via {route}")
+        if route == "VECTOR_SEARCH":
+            request = self._vector_search_prompt()
+            if request is None:
+                # BigQuery VECTOR_SEARCH answers in one piece
+                response = self._remote_vector_search()
+                if response:
+                    yield response
+                return
+        else:
+            request = self._ai_generate_prompt()
+        yield from sanitize_stream(stream_generate(request))
+
+    def _remote_vector_search(self):
+        ''' Function To Answer With BigQuery VECTOR_SEARCH When No Local Index Is Available
         Returns:
           AI Response
         '''
         try:
-            logging.info("Using Vector Search Hybrid Approach to answer prompt")
+            logging.info("No local vector index, using BigQuery VECTOR_SEARCH")
 
             query = '''
                     WITH query AS (
@@ -0,0 +1,151 @@
+import joblib
+import hashlib
+import logging
+import os
+import threading
+import time
+
+logging.basicConfig(level = logging.INFO)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BASE_DIR)
+MODELS_DIR = os.path.join(PROJECT_ROOT, 'models')
+
+MODEL_VERSION = 'V1'
+MODEL_FILES = {
+    'encoder': 'Encoder_{version}.pkl',
+    'subscores': 'SubScores_{version}.pkl',
+    'ecoscore': 'Ecoscore_{version}.pkl',
+}
+
+
+def _file_checksum(path):
+    ''' Function To Compute The sha256 Checksum Of A Model File '''
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ModelRegistry:
+    ''' Class To Keep Model Artifacts Loaded In Memory Across Calls
+
+    Models are loaded lazily on first use and kept warm afterwards. Every
+    lookup stats the file; when its mtime or size changed the checksum is
+    recomputed and the model is reloaded only if the content really changed.
+    '''
+    def __init__(self, models_dir = MODELS_DIR, version = MODEL_VERSION):
+        self.models_dir = models_dir
+        self.version = version
+        self._models = {}
+        self._lock = threading.RLock()
+        self.timings = {}
+
+    def path(self, name):
+        ''' Function To Return The File Path Of A Registered Model '''
+        if name not in MODEL_FILES:
+            raise KeyError(f"Unknown model: {name}")
+        return os.path.join(self.models_dir, MODEL_FILES[name].format(version = self.version))
+
+    def _load(self, name, path, stat, checksum = None):
+        logging.info(f"Loading model {name} from {path}")
+        start = time.perf_counter()
+        model = joblib.load(path)
+        elapsed = time.perf_counter() - start
+        entry = {
+            'model': model,
+            'path': path,
+            'mtime': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'checksum': checksum or _file_checksum(path),
+            'loaded_at': time.time(),
+        }
+        self._models[name] = entry
+        timing = self.timings.setdefault(name, {'loads': 0, 'load_seconds': 0.0,
+                                                'predict_calls': 0, 'predict_seconds': 0.0})
+        timing['loads'] += 1
+        timing['load_seconds'] += elapsed
+        timing['last_load_seconds'] = elapsed
+        logging.info(f"Model {name} ({self.version}) loaded in {elapsed:.3f}s")
+        return entry
+
+    def get(self, name):
+        ''' Function To Return A Loaded Model, Reloading It If The File Changed
+        Returns:
+            model: the deserialized model object
+        '''
+        path = self.path(name)
+        with self._lock:
+            stat = os.stat(path)
+            entry = self._models.get(name)
+            if entry is None:
+                return self._load(name, path, stat)['model']
+
+            if entry['mtime'] != stat.st_mtime_ns or entry['size'] != stat.st_size:
+                checksum = _file_checksum(path)
+                if checksum != entry['checksum']:
+                    logging.info(f"Model file {path} changed, hot reloading {name}")
+                    return self._load(name, path, stat, checksum)['model']
+                entry['mtime'] = stat.st_mtime_ns
+                entry['size'] = stat.st_size
+
+            return entry['model']
+
+    def predict(self, name, X):
+        ''' Function To Run A Model's predict And Record Its Timing
+        Returns:
+            predictions
+        '''
+        model = self.get(name)
+        start = time.perf_counter()
+        predictions = model.predict(X)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            timing = self.timings[name]
+            timing['predict_calls'] += 1
+            timing['predict_seconds'] += elapsed
+            timing['last_predict_seconds'] = elapsed
+        logging.info(f"Model {name} predicted {len(predictions)} rows in {elapsed:.3f}s")
+        return predictions
+
+    def reload(self, name = None):
+        ''' Function To Force A Reload Of One Or All Loaded Models '''
+        with self._lock:
+            names = [name] if name else list(self._models)
+            for model_name in names:
+                path = self.path(model_name)
+                self._load(model_name, path, os.stat(path))
+
+    def report(self):
+        ''' Function To Report Versions, Checksums And Timings Of Loaded Models
+        Returns:
+            dict keyed by model name
+        '''
+        with self._lock:
+            return {
+                name: {
+                    'version': self.version,
+                    'path': entry['path'],
+                    'checksum': entry['checksum'],
+                    'loaded_at': entry['loaded_at'],
+                    **self.timings.get(name, {}),
+                }
+                for name, entry in self._models.items()
+            }
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    ''' Function To Return The Process-Wide Model Registry
+    The registry lives at module level so it survives Streamlit reruns.
+    '''
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ModelRegistry()
+    return _registry
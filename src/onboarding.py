@@ -0,0 +1,325 @@
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from io import BytesIO
+import copy
+import logging
+import threading
+import time
+import uuid
+from src.updates import Update
+from src.predictor import BatchPrediction
+from src.bulk_import import import_suppliers, ImportReport
+
+logging.basicConfig(level = logging.INFO)
+
+DEFAULT_RETRIES = 2
+RETRY_BACKOFF_SECONDS = 2.0
+JOB_WORKERS = 2
+STEP_WORKERS = 8
+# Finished jobs stay visible to status() for FINISHED_JOB_TTL_SECONDS, and at most
+# MAX_FINISHED_JOBS of them are kept; queued and running jobs are never dropped
+FINISHED_JOB_TTL_SECONDS = 60 * 60
+MAX_FINISHED_JOBS = 200
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+
+
+class Step:
+    ''' Class To Describe One Pipeline Step: A Callable(context) And The Steps It Waits For '''
+    def __init__(self, name, run, depends_on = (), retries = DEFAULT_RETRIES):
+        self.name = name
+        self.run = run
+        self.depends_on = tuple(depends_on)
+        self.retries = retries
+
+
+def _allocate_id(context):
+    # Kept in the context, so a retried insert reuses the same id
+    if 'supplier_id' not in context:
+        context['supplier_id'] = context['update'].next_supplier_id()
+
+
+def _insert(context):
+    context['update'].insert_supplier(context['supplier_id'])
+
+
+def _upload_images(context):
+    images = context['images']
+    # Blob names are derived from the supplier id, so a retry overwrites rather than duplicates
+    context['image_urls'] = context['update'].upload_supplier_images(images, context['supplier_id']) if images else []
+
+
+def _set_image_urls(context):
+    if context['image_urls']:
+        context['update'].set_image_urls(context['supplier_id'], context['image_urls'])
+
+
+def _embed(context):
+    context['update'].embed_supplier(context['supplier_id'])
+
+
+def _score(context):
+    scores = BatchPrediction([context['supplier_id']])
+    context['update'].update_ecoscores(scores)
+
+
+# The GCS upload only needs the id, so it runs alongside the BigQuery steps. Those all
+# write the same row and are chained, so a job never has two mutating statements in
+# flight against the table; scoring also writes the recommendation label
+ONBOARDING_STEPS = [
+    Step('allocate_id', _allocate_id),
+    Step('upload_images', _upload_images, ['allocate_id']),
+    Step('insert', _insert, ['allocate_id']),
+    Step('embed', _embed, ['insert']),
+    Step('score', _score, ['embed']),
+    Step('set_image_urls', _set_image_urls, ['upload_images', 'score']),
+]
+
+
+def _import(context):
+    import_suppliers(context['source'], update=context['update'], dry_run=context['dry_run'],
+                     report=context['report'])
+
+
+# Loading rows is not safe to repeat, so a failed import is reported rather than retried
+IMPORT_STEPS = [Step('import', _import, retries=0)]
+
+
+def _check_dag(steps):
+    ''' Function To Validate Step Names And Dependencies, Raising ValueError On Cycles Or Unknown Steps '''
+    names = [step.name for step in steps]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Duplicate step names in {names}")
+    done = set()
+    remaining = {step.name: set(step.depends_on) for step in steps}
+    for deps in remaining.values():
+        unknown = deps - set(names)
+        if unknown:
+            raise ValueError(f"Unknown dependencies {sorted(unknown)}")
+    while remaining:
+        ready = [name for name, deps in remaining.items() if deps <= done]
+        if not ready:
+            raise ValueError(f"Dependency cycle between {sorted(remaining)}")
+        for name in ready:
+            done.add(name)
+            del remaining[name]
+
+
+def _buffer_uploads(uploaded_files):
+    ''' Function To Copy Uploaded Files Into Named Buffers That Outlive The Streamlit Request '''
+    buffers = []
+    for uploaded in uploaded_files or []:
+        buffer = BytesIO(uploaded.getvalue() if hasattr(uploaded, 'getvalue') else uploaded.read())
+        buffer.name = uploaded.name
+        buffers.append(buffer)
+    return buffers
+
+
+class OnboardingJob:
+    ''' Class Holding The State Of One Onboarding Run Or Bulk Import '''
+    def __init__(self, steps, context, kind = 'onboarding'):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.steps = steps
+        self.context = context
+        self.status = QUEUED
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.step_state = {step.name: {'status': QUEUED, 'attempts': 0, 'error': None, 'seconds': None}
+                           for step in steps}
+
+    def progress(self):
+        ''' Function To Return The Fraction Of Steps That Have Finished '''
+        finished = sum(1 for state in self.step_state.values() if state['status'] in (SUCCEEDED, SKIPPED))
+        return finished / len(self.step_state) if self.step_state else 1.0
+
+
+class OnboardingEngine:
+    ''' Class To Run Supplier Onboarding As A DAG Of Steps In The Background
+
+    submit() and submit_import() return a job id straight away; each job is driven on a worker
+    thread, which starts every step whose dependencies have succeeded on a shared
+    step pool, so independent steps (image upload and embedding) overlap. Failed
+    steps are retried with backoff; steps are written to be safe to re-run. When
+    a step gives up, everything downstream of it is skipped. Finished jobs are
+    evicted after finished_ttl seconds or once more than max_finished are kept.
+    '''
+    def __init__(self, steps = None, job_workers = JOB_WORKERS, step_workers = STEP_WORKERS,
+                 backoff = RETRY_BACKOFF_SECONDS, update_factory = Update,
+                 finished_ttl = FINISHED_JOB_TTL_SECONDS, max_finished = MAX_FINISHED_JOBS):
+        self.steps = steps or ONBOARDING_STEPS
+        _check_dag(self.steps)
+        self.backoff = backoff
+        self.update_factory = update_factory
+        self.finished_ttl = finished_ttl
+        self.max_finished = max_finished
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._job_pool = ThreadPoolExecutor(max_workers=job_workers, thread_name_prefix='onboarding-job')
+        self._step_pool = ThreadPoolExecutor(max_workers=step_workers, thread_name_prefix='onboarding-step')
+
+    def submit(self, supplier):
+        ''' Function To Queue A New Supplier For Onboarding
+        Args:
+            supplier: new supplier dict as built by the Add New Supplier form
+        Returns:
+            job id
+        '''
+        supplier = dict(supplier)
+        images = _buffer_uploads(supplier.pop('uploaded_images', []))
+        context = {'supplier': supplier, 'images': images}
+        job = self._queue(OnboardingJob(self.steps, context))
+        logging.info(f"Onboarding job {job.id} queued for {supplier.get('supplier_name')}")
+        return job.id
+
+    def submit_import(self, source, dry_run = False):
+        ''' Function To Queue A Bulk Import Of A CSV Or Parquet File
+        Args:
+            source: uploaded file; its bytes are copied before returning
+            dry_run: only validate
+        Returns:
+            job id; status() carries the ImportReport, filled in as chunks finish
+        '''
+        context = {'source': _buffer_uploads([source])[0], 'dry_run': dry_run, 'report': ImportReport()}
+        if dry_run:
+            # Validation alone needs no BigQuery connection
+            context['update'] = None
+        job = self._queue(OnboardingJob(IMPORT_STEPS, context, kind='import'))
+        logging.info(f"Import job {job.id} queued for {source.name}{' (dry run)' if dry_run else ''}")
+        return job.id
+
+    def _queue(self, job):
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        self._job_pool.submit(self._run_job, job)
+        return job
+
+    def _run_step(self, job, step):
+        state = job.step_state[step.name]
+        for attempt in range(step.retries + 1):
+            with self._lock:
+                state['status'], state['attempts'] = RUNNING, attempt + 1
+            start = time.perf_counter()
+            try:
+                step.run(job.context)
+                with self._lock:
+                    state['status'], state['error'] = SUCCEEDED, None
+                    state['seconds'] = round(time.perf_counter() - start, 3)
+                return
+            except Exception as e:
+                logging.warning(f"Onboarding job {job.id} step {step.name} attempt {attempt + 1} failed: {e}")
+                with self._lock:
+                    state['error'] = str(e)
+                if attempt < step.retries:
+                    time.sleep(self.backoff * 2 ** attempt)
+        with self._lock:
+            state['status'] = FAILED
+        raise RuntimeError(f"Step {step.name} failed: {state['error']}")
+
+    def _run_job(self, job):
+        with self._lock:
+            job.status = RUNNING
+        try:
+            if 'update' not in job.context:
+                job.context['update'] = self.update_factory(job.context.get('supplier'))
+        except Exception as e:
+            self._finish(job, FAILED, f"Could not connect: {e}")
+            return
+
+        pending = {step.name: step for step in job.steps}
+        running = {}
+        failed = set()
+        while pending or running:
+            for name, step in list(pending.items()):
+                deps = set(step.depends_on)
+                if deps & failed:
+                    failed.add(name)
+                    del pending[name]
+                    with self._lock:
+                        job.step_state[name]['status'] = SKIPPED
+                elif all(job.step_state[dep]['status'] == SUCCEEDED for dep in deps):
+                    running[self._step_pool.submit(self._run_step, job, step)] = name
+                    del pending[name]
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                if future.exception() is not None:
+                    failed.add(name)
+
+        if failed:
+            errors = {name: job.step_state[name]['error'] for name in failed if job.step_state[name]['error']}
+            self._finish(job, FAILED, '; '.join(f"{name}: {error}" for name, error in errors.items()))
+        else:
+            self._finish(job, SUCCEEDED)
+
+    def _prune(self):
+        ''' Function To Evict Expired Finished Jobs, Then The Oldest Beyond max_finished; Call With _lock Held '''
+        cutoff = time.time() - self.finished_ttl
+        finished = [job for job in self._jobs.values() if job.finished_at is not None]
+        finished.sort(key=lambda job: job.finished_at)
+        excess = len(finished) - self.max_finished
+        for i, job in enumerate(finished):
+            if i < excess or job.finished_at < cutoff:
+                del self._jobs[job.id]
+
+    def _finish(self, job, status, error = None):
+        with self._lock:
+            job.status, job.error, job.finished_at = status, error, time.time()
+            # The uploaded bytes and clients are only needed by the steps
+            for key in ('images', 'source', 'update'):
+                job.context.pop(key, None)
+            self._prune()
+        took = job.finished_at - job.created_at
+        logging.info(f"{job.kind.capitalize()} job {job.id} {status} in {took:.1f}s"
+                     f" (supplier {job.context.get('supplier_id')}){': ' + error if error else ''}")
+
+    def status(self, job_id):
+        ''' Function To Report A Job's Progress
+        Returns:
+            dict with status, progress (0-1), supplier_id, error and per-step state,
+            plus the ImportReport of import jobs; None for unknown and evicted ids
+        '''
+        with self._lock:
+            self._prune()
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            return {
+                'job_id': job.id,
+                'kind': job.kind,
+                'status': job.status,
+                'progress': job.progress(),
+                'supplier_id': job.context.get('supplier_id'),
+                'supplier_name': job.context.get('supplier', {}).get('supplier_name'),
+                'report': job.context.get('report'),
+                'error': job.error,
+                'steps': copy.deepcopy(job.step_state),
+                'created_at': job.created_at,
+                'finished_at': job.finished_at,
+            }
+
+    def shutdown(self, wait = True):
+        ''' Function To Stop Accepting Jobs And Optionally Wait For Running Ones '''
+        self._job_pool.shutdown(wait=wait)
+        self._step_pool.shutdown(wait=wait)
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_onboarding_engine():
+    ''' Function To Return The Process-Wide Onboarding Engine '''
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = OnboardingEngine()
+    return _engine
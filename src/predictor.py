@@ -1,12 +1,136 @@
-import joblib
+from google.cloud import bigquery
 from src.data_loader import BigQueryCONN
+from src.model_registry import get_registry
+from src.features import FEATURE_COLUMNS, EMBEDDING_COLUMN, build_features
+from src.arrow_fetch import ArrowFetcher
+from src.job_executor import get_job_executor
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
 import logging
-import os
 
 logging.basicConfig(level = logging.INFO)
 
+SUBSCORE_COLUMNS = ['carbon_score','water_score','waste_score','social_score']
+SCORE_COLUMNS = SUBSCORE_COLUMNS + ['ecoscore']
+DEFAULT_PAGE_SIZE = 5000
+
+
+def _score_frame(df, registry):
+    ''' Function To Score One Chunk Of Suppliers With A Single predict Per Model
+    Args:
+        df: DataFrame or Arrow Table with supplier_id, FEATURE_COLUMNS and text_embedding
+    Returns:
+        dict of columns: supplier_id plus the four subscores and ecoscore
+    '''
+    encoder = registry.get('encoder')
+    X_final = build_features(df, encoder)
+    logging.info(f"Features prepared for {len(X_final)} suppliers")
+
+    subscores = registry.predict('subscores', X_final)
+    subscores_df = pd.DataFrame(subscores, columns=SUBSCORE_COLUMNS)
+    ecoscores = registry.predict('ecoscore', subscores_df)
+
+    supplier_ids = df.column('supplier_id').to_numpy() if isinstance(df, pa.Table) else df['supplier_id'].to_numpy()
+    result = {'supplier_id': np.asarray(supplier_ids, dtype=object)}
+    for i, col in enumerate(SUBSCORE_COLUMNS):
+        result[col] = np.asarray(subscores[:, i], dtype=np.float64)
+    result['ecoscore'] = np.asarray(ecoscores, dtype=np.float64)
+    return result
+
+
+def _iter_unscored_pages(client, supplier_ids, page_size):
+    ''' Function To Page Through Suppliers That Need Scoring, As Arrow Tables
+    Unscored suppliers are paged with a supplier_id keyset; an explicit id list is
+    chunked, and since those chunks are independent their queries run side by side.
+    '''
+    fetcher = ArrowFetcher(client)
+    columns = ', '.join(['supplier_id'] + FEATURE_COLUMNS + ['text_embedding'])
+
+    if supplier_ids is not None:
+        supplier_ids = [str(s) for s in supplier_ids]
+        query = f"""
+            SELECT {columns}
+            FROM `ecochain123.supplychain.suppliers_with_images`
+            WHERE supplier_id IN UNNEST(@supplier_ids)
+        """
+        executor = get_job_executor()
+        handles = [
+            executor.submit(query, [bigquery.ArrayQueryParameter("supplier_ids", "STRING",
+                                                                 supplier_ids[start:start + page_size])],
+                            fetch='job', client=client, label=f"supplier features page {start // page_size + 1}")
+            for start in range(0, len(supplier_ids), page_size)
+        ]
+        # gather cancels the other pages if one fails
+        for job in executor.gather(handles):
+            yield fetcher.read_result(job)
+        return
+
+    query = f"""
+        SELECT {columns}
+        FROM `ecochain123.supplychain.suppliers_with_images`
+        WHERE total_eco_score IS NULL AND supplier_id > @after
+        ORDER BY supplier_id
+        LIMIT @page_size
+    """
+    after = ''
+    while True:
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[
+                bigquery.ScalarQueryParameter("after", "STRING", after),
+                bigquery.ScalarQueryParameter("page_size", "INT64", page_size),
+            ]
+        )
+        table = fetcher.query(query, job_config=job_config)
+        if table.num_rows == 0:
+            return
+        yield table
+        if table.num_rows < page_size:
+            return
+        # Parallel read streams do not keep the ORDER BY, so the keyset is the page maximum
+        after = pc.max(table.column('supplier_id')).as_py()
+
+
+def BatchPrediction(supplier_ids = None, page_size = DEFAULT_PAGE_SIZE):
+    ''' Function To Predict Subscores and Ecoscore For Many Suppliers In One Pass
+    Args:
+        supplier_ids: optional list of supplier ids; every unscored supplier when None
+        page_size: rows fetched and scored per chunk
+    Returns:
+        dict of columns (supplier_id, carbon_score, water_score, waste_score,
+        social_score, ecoscore) that Update.update_ecoscores accepts directly
+    '''
+    try:
+        logging.info('Batch Prediction For Scores In Progress')
+        conn = BigQueryCONN()
+        client = conn.bigquery_client()
+        registry = get_registry()
+
+        chunks = []
+        for table in _iter_unscored_pages(client, supplier_ids, page_size):
+            # Suppliers not embedded yet come back with a null text_embedding
+            table = table.filter(table.column(EMBEDDING_COLUMN).is_valid())
+            if table.num_rows == 0:
+                continue
+            chunks.append(_score_frame(table, registry))
+            logging.info(f"Scored chunk of {table.num_rows} suppliers")
+
+        if not chunks:
+            logging.info("No new suppliers to predict.")
+            return {col: np.empty(0, dtype=object if col == 'supplier_id' else np.float64)
+                    for col in ['supplier_id'] + SCORE_COLUMNS}
+
+        result = {col: np.concatenate([chunk[col] for chunk in chunks]) for col in chunks[0]}
+        logging.info(f"EcoScores predicted for {len(result['supplier_id'])} suppliers")
+        logging.info(f"Model timings: {registry.report()}")
+        return result
+
+    except Exception as e:
+        logging.error(f"Failed to batch predict ecoscores: {e}")
+        raise
+
+
 def Prediction():
     ''' Function To Predict Subscores and Ecoscore
     Returns: Predictions
@@ -24,62 +148,21 @@ def Prediction():
                 ORDER BY supplier_id DESC
                 LIMIT 1
             """
-            df = client.query(query).to_dataframe()
-            logging.info(f"Data retrieved: {df.shape}")
+            table = ArrowFetcher(client).query(query)
+            logging.info(f"Data retrieved: {table.shape}")
 
-            if df.empty:
+            if table.num_rows == 0:
                 logging.info("No new suppliers to predict.")
                 return []
 
-            supplier_ids = df['supplier_id'].tolist()
-            supplier = df.drop(columns=[
-                'supplier_id','supplier_name','audit_summary','image_url',
-                'certification','sub_category','product_category',
-                'recommendation','carbon_score','water_score','waste_score','social_score',
-                'total_eco_score'
-            ])
-
-            # Load encoder
-            BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-            PROJECT_ROOT = os.path.dirname(BASE_DIR)
-            encoder_path = os.path.join(PROJECT_ROOT, 'models', 'Encoder_V1.pkl')
-            encoder = joblib.load(encoder_path)
-            supplier[['country','region','partnership_status','risk_level']] = encoder.transform(
-                supplier[['country','region','partnership_status','risk_level']]
-            )
-            logging.info("Data encoded successfully")
-
-
-            logging.info('Preprocessing In Progress')
-            # Preprocessing
-            supplier['last_audit'] = supplier['last_audit'].str.replace("-", "", regex=False)
-            supplier['last_audit'] = pd.to_numeric(supplier['last_audit'], errors='coerce')
-            supplier['text_embedding'] = supplier['text_embedding'].apply(lambda e: list(map(float, e)))
-            embeddings = np.vstack(supplier['text_embedding'].values).astype(np.float32)
-            supplier_num = supplier.drop(columns=['text_embedding']).reset_index(drop=True)
-            X_final = np.hstack([supplier_num.values, embeddings])
-
-
-            logging.info('Predicting Subscores')
-            subscores_model = joblib.load(os.path.join(PROJECT_ROOT, 'models', 'SubScores_V1.pkl'))
-            subscores = subscores_model.predict(X_final)
-            subscores_df = pd.DataFrame(subscores, columns=['carbon_score','water_score','waste_score','social_score'])
-            logging.info('Subscores Predicted Successfully')
-
-            logging.info('Predicting EcoScore in Progress')
-            # Predict ecoscore
-            ecoscore_model = joblib.load(os.path.join(PROJECT_ROOT, 'models', 'Ecoscore_V1.pkl'))
-            ecoscores = ecoscore_model.predict(subscores_df)
-            subscores_df['ecoscore'] = ecoscores
-            subscores_df['supplier_id'] = supplier_ids
+            # Models are kept warm in the process-wide registry
+            registry = get_registry()
+            scores = _score_frame(table, registry)
+            subscores_df = pd.DataFrame(scores)[SCORE_COLUMNS + ['supplier_id']]
             logging.info(f"EcoScores predicted:\n{subscores_df.head()}")
+            logging.info(f"Model timings: {registry.report()}")
             return subscores_df.to_dict(orient='records')
 
     except Exception as e:
             logging.error(f"Failed to predict ecoscores: {e}")
             raise
-
-
-
-
-
@@ -1,21 +1,23 @@
 from src.data_loader import BigQueryCONN
+from src.prompt_router import get_router, ROUTES
 import logging
 from google.cloud import bigquery
 
 logging.basicConfig(level=logging.INFO)
 
-def classify_prompt(user_prompt):
+def _llm_classify(user_prompt):
     """
-    Function to classify user queries.
+    Function to classify user queries with BigQuery AI.GENERATE.
+    Only used by the local router when it is not confident.
 
     Args:
         user_prompt (str): The raw user query.
 
     Returns:
-        str: One of AI.GENERATE or VECTOR_SEARCH
+        str: One of AI.GENERATE or VECTOR_SEARCH, or None if the model output is unusable
     """
     try:
-        logging.info("Classifying Prompt...")
+        logging.info("Classifying Prompt With LLM...")
 
         query = '''
                 SELECT
@@ -42,8 +44,13 @@ def classify_prompt(user_prompt):
 
         for row in query_job.result():
             logging.info(f"Classifier Response: {row['route']}")
-            prompt_class = row["route"]
-            return prompt_class
+            # The model answers in free text; keep only a recognised route keyword
+            answer = (row["route"] or "").upper()
+            for route in ROUTES:
+                if route in answer:
+                    return route
+            logging.warning(f"Unrecognised classifier output: {row['route']}")
+            return None
         else:
             logging.warning("No classification returned")
             return None
@@ -52,3 +59,24 @@ def classify_prompt(user_prompt):
         logging.error(f"Failed To Classify Query Error: {e}")
         return None
 
+def classify_prompt(user_prompt):
+    """
+    Function to classify user queries.
+
+    Routing is done locally by src.prompt_router; the LLM is only consulted
+    when the local router's confidence is low.
+
+    Args:
+        user_prompt (str): The raw user query.
+
+    Returns:
+        str: One of AI.GENERATE or VECTOR_SEARCH
+    """
+    try:
+        logging.info("Classifying Prompt...")
+        decision = get_router().route(user_prompt, fallback=_llm_classify)
+        return decision["route"]
+
+    except Exception as e:
+        logging.error(f"Failed To Classify Query Error: {e}")
+        return None
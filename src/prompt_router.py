@@ -0,0 +1,159 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BASE_DIR)
+ROUTING_LOG_PATH = os.path.join(PROJECT_ROOT, 'cache', 'routing_log.jsonl')
+
+AI_GENERATE = "AI.GENERATE"
+VECTOR_SEARCH = "VECTOR_SEARCH"
+ROUTES = (AI_GENERATE, VECTOR_SEARCH)
+
+CONFIDENCE_THRESHOLD = 0.75
+N_HASH_FEATURES = 1 << 12
+
+# Tier 1: phrases that decide the route on their own
+RULES = {
+    VECTOR_SEARCH: re.compile(
+        r"\b(similar|similarity|resembl\w*|alike|comparable to|closest|nearest|"
+        r"related to|relating to|semantic\w*|keywords?|mentions?|matching|like this|like the)\b"),
+    AI_GENERATE: re.compile(
+        r"\b(summar\w*|explain\w*|report|narrative|table|tabular|dataframe|top \d+|"
+        r"how many|count|average|mean|total|list (all|the)|rank\w*|breakdown|overview|compare)\b"),
+}
+
+# Tier 2: seed examples for the logistic model (1 = VECTOR_SEARCH)
+SEED_PROMPTS = [
+    ("Show me top 5 suppliers with best carbon scores", 0),
+    ("Compare suppliers by country performance", 0),
+    ("Show suppliers with Fair Trade certification", 0),
+    ("Show me all high-risk suppliers", 0),
+    ("List all preferred suppliers", 0),
+    ("Give me a sustainability report for Kenya", 0),
+    ("Summarize the water scores by region", 0),
+    ("Which category has the lowest average eco score", 0),
+    ("How many suppliers are under review", 0),
+    ("Explain why textile suppliers score poorly", 0),
+    ("Show a table of suppliers in Asia with their premiums", 0),
+    ("What is the total annual volume of active suppliers", 0),
+    ("Which suppliers should we avoid", 0),
+    ("Give me the best suppliers in Europe", 0),
+    ("Find suppliers similar to Green Cotton Ltd", 1),
+    ("Suppliers like the organic coffee producers in Brazil", 1),
+    ("Find suppliers whose audits mention child labour", 1),
+    ("Which suppliers are related to solar panels", 1),
+    ("Search for suppliers dealing with recycled plastics", 1),
+    ("Find companies comparable to our best textile partner", 1),
+    ("Suppliers with audit findings about deforestation", 1),
+    ("Who produces something close to bamboo packaging", 1),
+    ("Find me suppliers matching renewable energy components", 1),
+    ("Look for suppliers with wastewater treatment issues", 1),
+    ("Any suppliers resembling the Fair Trade cocoa farms", 1),
+    ("Which suppliers talk about carbon capture in their audits", 1),
+]
+
+
+def _tokens(prompt):
+    words = re.findall(r"[a-z0-9]+", prompt.lower())
+    return words + [f"{a}_{b}" for a, b in zip(words, words[1:])]
+
+
+def _features(prompt):
+    ''' Function To Hash Unigrams And Bigrams Into A Fixed-Size Feature Vector '''
+    x = np.zeros(N_HASH_FEATURES, dtype=np.float32)
+    for token in _tokens(prompt):
+        index = int.from_bytes(hashlib.md5(token.encode()).digest()[:4], 'little') % N_HASH_FEATURES
+        x[index] += 1.0
+    norm = np.linalg.norm(x)
+    return x / norm if norm else x
+
+
+class PromptRouter:
+    ''' Class To Route Assistant Prompts Locally Between AI.GENERATE And VECTOR_SEARCH
+
+    A keyword/regex tier answers unambiguous prompts; a small logistic model over
+    hashed word features handles the rest. When neither is confident enough the
+    optional fallback (the LLM classifier) decides. Every decision is appended to
+    a JSONL log for offline evaluation.
+    '''
+    def __init__(self, threshold = CONFIDENCE_THRESHOLD, log_path = ROUTING_LOG_PATH):
+        self.threshold = threshold
+        self.log_path = log_path
+        self._lock = threading.Lock()
+        self.weights, self.bias = self._fit(SEED_PROMPTS)
+
+    @staticmethod
+    def _fit(examples, epochs = 500, learning_rate = 2.0, l2 = 1e-4):
+        ''' Function To Fit The Logistic Model With Batch Gradient Descent '''
+        X = np.vstack([_features(prompt) for prompt, _ in examples])
+        y = np.array([label for _, label in examples], dtype=np.float32)
+        w = np.zeros(X.shape[1], dtype=np.float32)
+        b = 0.0
+        for _ in range(epochs):
+            p = 1.0 / (1.0 + np.exp(-(X @ w + b)))
+            error = p - y
+            w -= learning_rate * (X.T @ error / len(y) + l2 * w)
+            b -= learning_rate * float(error.mean())
+        return w, b
+
+    def _log(self, decision):
+        try:
+            with self._lock:
+                os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+                with open(self.log_path, 'a') as f:
+                    f.write(json.dumps(decision) + '\n')
+        except OSError as e:
+            logging.warning(f"Failed to log routing decision: {e}")
+
+    def route(self, prompt, fallback = None):
+        ''' Function To Route A Prompt
+        Args:
+            prompt (str): The raw user query.
+            fallback: optional callable(prompt) -> route, used when confidence is low
+        Returns:
+            dict with route, confidence, tier and latency_ms
+        '''
+        start = time.perf_counter()
+        text = prompt.lower()
+        fired = [route for route, pattern in RULES.items() if pattern.search(text)]
+
+        if len(fired) == 1:
+            route, confidence, tier = fired[0], 0.95, 'rules'
+        else:
+            p = float(1.0 / (1.0 + np.exp(-(_features(prompt) @ self.weights + self.bias))))
+            route = VECTOR_SEARCH if p >= 0.5 else AI_GENERATE
+            confidence, tier = max(p, 1.0 - p), 'model'
+
+        latency_ms = (time.perf_counter() - start) * 1000
+        if confidence < self.threshold and fallback is not None:
+            llm_route = fallback(prompt)
+            if llm_route in ROUTES:
+                route, tier = llm_route, 'llm'
+
+        decision = {'prompt': prompt, 'route': route, 'confidence': round(confidence, 4),
+                    'tier': tier, 'latency_ms': round(latency_ms, 3), 'timestamp': time.time()}
+        logging.info(f"Routed prompt to {route} via {tier} (confidence {confidence:.2f})")
+        self._log(decision)
+        return decision
+
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def get_router():
+    ''' Function To Return The Process-Wide Prompt Router '''
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = PromptRouter()
+    return _router
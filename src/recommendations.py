@@ -0,0 +1,48 @@
+from google.cloud import bigquery
+import numpy as np
+
+PREFERRED = 'Preferred'
+NEUTRAL = 'Neutral'
+AVOID = 'Avoid'
+
+# Above PREFERRED_ABOVE is Preferred, from AVOID_BELOW up to PREFERRED_ABOVE Neutral, below AVOID_BELOW Avoid
+PREFERRED_ABOVE = 80.0
+AVOID_BELOW = 50.0
+
+
+def _check_thresholds(preferred_above, avoid_below):
+    if avoid_below > preferred_above:
+        raise ValueError(f"avoid_below ({avoid_below}) must not exceed preferred_above ({preferred_above})")
+
+
+def recommendation_labels(scores, preferred_above = PREFERRED_ABOVE, avoid_below = AVOID_BELOW):
+    ''' Function To Bin Eco Scores Into Recommendation Labels In One Pass
+    Args:
+        scores: array-like of total eco scores
+    Returns:
+        object array of Preferred / Neutral / Avoid, None where the score is missing
+    '''
+    _check_thresholds(preferred_above, avoid_below)
+    scores = np.asarray(scores, dtype=np.float64)
+    labels = np.full(scores.shape, None, dtype=object)
+    # NaN fails every comparison, so missing scores stay unlabelled
+    labels[scores < avoid_below] = AVOID
+    labels[scores >= avoid_below] = NEUTRAL
+    labels[scores > preferred_above] = PREFERRED
+    return labels
+
+
+def label_case_sql(score = 'total_eco_score'):
+    ''' Function To Return The SQL CASE Expression Matching recommendation_labels, Using threshold_parameters() '''
+    return (f"CASE WHEN {score} > @preferred_above THEN '{PREFERRED}' "
+            f"WHEN {score} >= @avoid_below THEN '{NEUTRAL}' "
+            f"WHEN {score} < @avoid_below THEN '{AVOID}' END")
+
+
+def threshold_parameters(preferred_above = PREFERRED_ABOVE, avoid_below = AVOID_BELOW):
+    ''' Function To Return The Query Parameters Used By label_case_sql '''
+    _check_thresholds(preferred_above, avoid_below)
+    return [
+        bigquery.ScalarQueryParameter('preferred_above', 'FLOAT64', float(preferred_above)),
+        bigquery.ScalarQueryParameter('avoid_below', 'FLOAT64', float(avoid_below)),
+    ]
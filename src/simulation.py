@@ -0,0 +1,155 @@
+import itertools
+import logging
+import time
+import numpy as np
+import pandas as pd
+from src.model_registry import get_registry
+from src.predictor import SUBSCORE_COLUMNS
+
+logging.basicConfig(level = logging.INFO)
+
+MAX_SCORE = 100.0
+# Rows per ecoscore predict call, bounding the memory of one (suppliers x scenarios) batch
+PREDICT_CHUNK_ROWS = 1_000_000
+
+
+def scenario_grid(carbon = (0,), water = (0,), waste = (0,), social = (0,)):
+    ''' Function To Build Every Combination Of Per-Subscore Improvements
+    Args:
+        carbon, water, waste, social: improvement percentages to try for each subscore
+    Returns:
+        (scenarios, 4) float64 array of improvement percentages in SUBSCORE_COLUMNS order
+    '''
+    return np.array(list(itertools.product(carbon, water, waste, social)), dtype=np.float64)
+
+
+def uniform_scenarios(levels):
+    ''' Function To Build Scenarios Improving All Four Subscores By The Same Percentage '''
+    levels = np.asarray(levels, dtype=np.float64)
+    return np.repeat(levels[:, None], len(SUBSCORE_COLUMNS), axis=1)
+
+
+class SimulationResult:
+    ''' Class Holding A Suppliers x Scenarios Simulation
+
+    subscores is (suppliers, scenarios, 4) and ecoscore (suppliers, scenarios);
+    baseline is the ecoscore of the unchanged subscores, scored the same way, so
+    delta() isolates the effect of the improvements.
+    '''
+    def __init__(self, supplier_ids, scenarios, subscores, ecoscore, baseline, scored_by):
+        self.supplier_ids = supplier_ids
+        self.scenarios = scenarios
+        self.subscores = subscores
+        self.ecoscore = ecoscore
+        self.baseline = baseline
+        self.scored_by = scored_by
+
+    @property
+    def shape(self):
+        return self.ecoscore.shape
+
+    def delta(self):
+        ''' Function To Return The (suppliers, scenarios) Ecoscore Change Against The Baseline '''
+        return self.ecoscore - self.baseline[:, None]
+
+    def best_scenario(self):
+        ''' Function To Return, Per Supplier, The Index Of The Scenario With The Highest Ecoscore '''
+        return np.argmax(self.ecoscore, axis=1)
+
+    def summary(self, threshold = None):
+        ''' Function To Aggregate Each Scenario Across The Portfolio
+        Returns:
+            DataFrame with one row per scenario: the improvements, mean ecoscore,
+            mean change and, when threshold is given, how many suppliers reach it;
+            empty, with the same columns, when no supplier had all four subscores
+        '''
+        columns = [f'{col}_improvement' for col in SUBSCORE_COLUMNS] + ['mean_ecoscore', 'mean_delta']
+        if threshold is not None:
+            columns.append('suppliers_at_threshold')
+        if not len(self.ecoscore):
+            return pd.DataFrame(columns=columns)
+        summary = pd.DataFrame(self.scenarios, columns=columns[:len(SUBSCORE_COLUMNS)])
+        summary['mean_ecoscore'] = self.ecoscore.mean(axis=0)
+        summary['mean_delta'] = self.delta().mean(axis=0)
+        if threshold is not None:
+            summary['suppliers_at_threshold'] = (self.ecoscore >= threshold).sum(axis=0)
+        return summary
+
+    def to_frame(self):
+        ''' Function To Flatten The Result Into One Row Per (supplier, scenario) '''
+        n, s = self.shape
+        frame = pd.DataFrame({'supplier_id': np.repeat(np.asarray(self.supplier_ids, dtype=object), s),
+                              'scenario': np.tile(np.arange(s), n)})
+        for i, col in enumerate(SUBSCORE_COLUMNS):
+            frame[col] = self.subscores[:, :, i].ravel()
+        frame['ecoscore'] = self.ecoscore.ravel()
+        frame['delta'] = self.delta().ravel()
+        return frame
+
+
+class SimulationEngine:
+    ''' Class To Run What-If Improvements Over Many Suppliers And Scenarios At Once
+
+    Improvements are applied as one broadcast, (suppliers, 1, 4) * (1, scenarios, 4)
+    clipped at 100, and the whole grid is scored by the registry's ecoscore model
+    in a few large predict calls rather than once per supplier and slider move.
+    '''
+    def __init__(self, registry = None, model = 'ecoscore', chunk_rows = PREDICT_CHUNK_ROWS):
+        self.registry = registry or get_registry()
+        self.model = model
+        self.chunk_rows = chunk_rows
+
+    @staticmethod
+    def project(base, improvements):
+        ''' Function To Apply Percentage Improvements To Subscores
+        Args:
+            base: (suppliers, 4) current subscores
+            improvements: (scenarios, 4) improvement percentages
+        Returns:
+            (suppliers, scenarios, 4) float64 projected subscores, capped at MAX_SCORE
+        '''
+        base = np.asarray(base, dtype=np.float64)
+        factors = 1.0 + np.asarray(improvements, dtype=np.float64) / 100.0
+        return np.minimum(base[:, None, :] * factors[None, :, :], MAX_SCORE)
+
+    def score(self, subscores):
+        ''' Function To Score (rows, 4) Subscores With The Ecoscore Model In Chunks '''
+        scores = np.empty(len(subscores), dtype=np.float64)
+        for start in range(0, len(subscores), self.chunk_rows):
+            chunk = pd.DataFrame(subscores[start:start + self.chunk_rows], columns=SUBSCORE_COLUMNS)
+            scores[start:start + len(chunk)] = self.registry.predict(self.model, chunk)
+        return scores
+
+    def run(self, suppliers, improvements, use_model = True):
+        ''' Function To Simulate Every Scenario For Every Supplier
+        Args:
+            suppliers: DataFrame with supplier_id and the four subscores
+            improvements: (scenarios, 4) percentages, e.g. from scenario_grid()
+            use_model: score with the ecoscore model; False averages the subscores instead
+        Returns:
+            SimulationResult; suppliers with a missing subscore are dropped
+        '''
+        missing = [col for col in SUBSCORE_COLUMNS if col not in suppliers.columns]
+        if missing:
+            raise ValueError(f"Missing subscore columns: {missing}")
+        improvements = np.atleast_2d(np.asarray(improvements, dtype=np.float64))
+        if improvements.shape[1] != len(SUBSCORE_COLUMNS):
+            raise ValueError(f"Improvements must have {len(SUBSCORE_COLUMNS)} columns, got {improvements.shape[1]}")
+
+        start = time.perf_counter()
+        base = suppliers[SUBSCORE_COLUMNS].to_numpy(dtype=np.float64)
+        complete = ~np.isnan(base).any(axis=1)
+        base = base[complete]
+        supplier_ids = suppliers['supplier_id'].to_numpy()[complete] if 'supplier_id' in suppliers.columns \
+            else np.flatnonzero(complete)
+        projected = self.project(base, improvements)
+        n, s = projected.shape[:2]
+
+        # The unchanged subscores go through the same predict call, as the baseline
+        rows = np.concatenate([base, projected.reshape(n * s, len(SUBSCORE_COLUMNS))])
+        scores = self.score(rows) if use_model else rows.mean(axis=1)
+        result = SimulationResult(supplier_ids, improvements, projected, scores[n:].reshape(n, s), scores[:n],
+                                  self.model if use_model else 'mean')
+        logging.info(f"Simulated {n} suppliers x {s} scenarios ({len(rows)} rows) with {result.scored_by} "
+                     f"in {(time.perf_counter() - start) * 1000:.1f}ms")
+        return result
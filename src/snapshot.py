@@ -0,0 +1,211 @@
+from datetime import datetime, timezone
+import json
+import logging
+import os
+import threading
+import time
+import pyarrow as pa
+import pyarrow.compute as pc
+from src.arrow_fetch import ArrowFetcher, normalize_embeddings, SUPPLIER_TABLE
+
+logging.basicConfig(level = logging.INFO)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BASE_DIR)
+SNAPSHOT_DIR = os.path.join(PROJECT_ROOT, 'cache')
+SNAPSHOT_PATH = os.path.join(SNAPSHOT_DIR, 'suppliers_with_images.arrow')
+
+# After the TTL the snapshot pulls changed rows; after FULL_REFRESH_SECONDS it is rebuilt
+SNAPSHOT_TTL_SECONDS = 15 * 60
+FULL_REFRESH_SECONDS = 24 * 60 * 60
+UPDATED_AT_COLUMN = 'updated_at'
+# updated_at is taken when a DML statement starts, not when it commits, so refreshes
+# re-read this far behind the newest stamp they have seen
+UPDATED_AT_OVERLAP_SECONDS = 10 * 60
+
+
+def updated_at_watermark(table):
+    ''' Function To Return The Newest updated_at In A Table As Epoch Seconds, Or None '''
+    if UPDATED_AT_COLUMN not in table.column_names:
+        return None
+    newest = pc.max(table.column(UPDATED_AT_COLUMN)).as_py()
+    if newest is None:
+        return None
+    return (newest if newest.tzinfo else newest.replace(tzinfo=timezone.utc)).timestamp()
+
+
+def rows_updated_since(table, seconds):
+    ''' Function To Return The Rows Of A Table Whose updated_at Is Past Epoch Seconds '''
+    column = table.column(UPDATED_AT_COLUMN)
+    since = datetime.fromtimestamp(seconds, timezone.utc)
+    if column.type.tz is None:
+        since = since.replace(tzinfo=None)
+    return table.filter(pc.fill_null(pc.greater(column, pa.scalar(since, type=column.type)), False))
+
+
+def _timestamp_literal(seconds):
+    ''' Function To Format Epoch Seconds As A UTC TIMESTAMP Literal For A Row Restriction '''
+    return f"TIMESTAMP '{datetime.fromtimestamp(seconds, timezone.utc).isoformat(sep=' ')}'"
+
+
+class SupplierSnapshot:
+    ''' Class To Keep A Local Arrow IPC Snapshot Of suppliers_with_images
+
+    The table is written to disk and memory-mapped on read, so a cold start does
+    not re-download every row and embedding. Refreshes are incremental: rows whose
+    updated_at is past the newest one in the snapshot are re-fetched, whatever
+    their supplier_id. invalidate() only touches a stale marker file, so writers
+    in other processes never rewrite the meta file.
+    Rows are read as Arrow through the Storage Read API (src.arrow_fetch), with
+    text_embedding stored as fixed_size_list<float32>.
+    '''
+    def __init__(self, path = SNAPSHOT_PATH, ttl = SNAPSHOT_TTL_SECONDS, full_refresh = FULL_REFRESH_SECONDS,
+                 fetcher = None):
+        self.path = path
+        self.fetcher = fetcher
+        self.meta_path = path + '.json'
+        self.stale_path = path + '.stale'
+        self.ttl = ttl
+        self.full_refresh = full_refresh
+        self._lock = threading.RLock()
+
+    def _read_meta(self):
+        try:
+            with open(self.meta_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, meta):
+        tmp_path = self.meta_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self.meta_path)
+
+    def _read_table(self):
+        ''' Function To Memory-Map The Snapshot File As An Arrow Table '''
+        source = pa.memory_map(self.path, 'r')
+        return pa.ipc.open_file(source).read_all()
+
+    def _write_table(self, table, meta):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, self.path)
+
+        meta['updated_at_watermark'] = updated_at_watermark(table)
+        meta['version'] = meta.get('version', 0) + 1
+        self._write_meta(meta)
+
+    def _fetcher(self, client):
+        return self.fetcher or ArrowFetcher(client)
+
+    def _fetch_all(self, client):
+        logging.info(" Building supplier snapshot from BigQuery")
+        # The table is read directly in parallel streams; no query job is needed
+        # Taken before the read, so an invalidate() that lands during it triggers another refresh
+        started = time.time()
+        table = self._fetcher(client).read_table(SUPPLIER_TABLE)
+        # The version carries on across rebuilds, so consumers keyed on it never see an old number again
+        previous = self._read_meta() or {}
+        self._write_table(table, {'built_at': started, 'refreshed_at': started,
+                                  'version': previous.get('version', 0)})
+        logging.info(f" Supplier snapshot written with {table.num_rows} rows")
+
+    def _fetch_incremental(self, client, meta):
+        if meta.get('updated_at_watermark') is None:
+            # No updated_at stamps to read changes by (yet), so only a rebuild picks them up
+            self._fetch_all(client)
+            return
+        started = time.time()
+        since = meta['updated_at_watermark'] - UPDATED_AT_OVERLAP_SECONDS
+        restriction = f"{UPDATED_AT_COLUMN} > {_timestamp_literal(since)}"
+        fresh = self._fetcher(client).read_table(SUPPLIER_TABLE, row_restriction=restriction)
+
+        # Snapshots written before embeddings were stored as fixed-size lists are converted on the way
+        table = normalize_embeddings(self._read_table())
+        replaced = fresh.column('supplier_id').combine_chunks().cast(pa.string())
+        kept = table.filter(pc.invert(pc.is_in(table.column('supplier_id'), value_set=replaced)))
+        merged = pa.concat_tables([kept, fresh.select(kept.column_names)], promote_options='permissive')
+
+        meta['refreshed_at'] = started
+        self._write_table(merged, meta)
+        logging.info(f" Supplier snapshot refreshed: {fresh.num_rows} rows fetched, {merged.num_rows} total")
+
+    def _stale_since(self):
+        ''' Function To Return When invalidate() Last Marked The Snapshot Stale, 0 When Never '''
+        try:
+            return os.path.getmtime(self.stale_path)
+        except OSError:
+            return 0
+
+    def load(self, client):
+        ''' Function To Return The Supplier Table, Refreshing The Snapshot When Needed
+        Returns:
+            table: pyarrow.Table backed by the memory-mapped snapshot
+        '''
+        with self._lock:
+            meta = self._read_meta()
+            if meta is None or not os.path.exists(self.path) \
+                    or time.time() - meta.get('built_at', 0) > self.full_refresh:
+                self._fetch_all(client)
+            elif self._stale_since() >= meta.get('refreshed_at', 0) \
+                    or time.time() - meta.get('refreshed_at', 0) > self.ttl:
+                self._fetch_incremental(client, meta)
+            return self._read_table()
+
+    def build_id(self):
+        ''' Function To Return An Id Of The Last Full Rebuild; Incremental Refreshes Keep It '''
+        meta = self._read_meta()
+        return meta.get('built_at', 0) if meta else 0
+
+    def version(self):
+        ''' Function To Return The Snapshot Version, Bumped On Every Write And Never Reused '''
+        meta = self._read_meta()
+        return meta.get('version', 0) if meta else 0
+
+    def invalidate(self, supplier_ids = None):
+        ''' Function To Mark The Snapshot Stale So The Next load() Re-Fetches Changed Rows
+        Args:
+            supplier_ids: ids whose rows changed, only logged since rows are found by updated_at;
+                None drops the whole snapshot
+        '''
+        with self._lock:
+            if supplier_ids is None:
+                if os.path.exists(self.path):
+                    os.remove(self.path)
+                meta = self._read_meta()
+                if meta is not None:
+                    # The meta file is kept for its version counter
+                    meta['built_at'] = 0
+                    self._write_meta(meta)
+                logging.info(" Supplier snapshot dropped")
+                return
+            os.makedirs(os.path.dirname(self.stale_path), exist_ok=True)
+            with open(self.stale_path, 'a'):
+                os.utime(self.stale_path)
+            logging.info(f" Supplier snapshot marked stale for {len(supplier_ids)} suppliers")
+
+    def expire(self):
+        ''' Function To Force An Incremental Refresh On The Next load() '''
+        with self._lock:
+            meta = self._read_meta()
+            if meta is not None:
+                meta['refreshed_at'] = 0
+                self._write_meta(meta)
+
+
+_snapshot = None
+_snapshot_lock = threading.Lock()
+
+
+def get_snapshot():
+    ''' Function To Return The Process-Wide Supplier Snapshot '''
+    global _snapshot
+    if _snapshot is None:
+        with _snapshot_lock:
+            if _snapshot is None:
+                _snapshot = SupplierSnapshot()
+    return _snapshot
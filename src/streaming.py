@@ -0,0 +1,88 @@
+import json
+import logging
+import re
+import time
+import src.config
+from src.clients import get_provider
+
+logging.basicConfig(level = logging.INFO)
+
+VERTEX_LOCATION = 'us-central1'
+VERTEX_MODEL = 'gemini-2.5-flash'
+STREAM_TIMEOUT_SECONDS = 120
+
+MARKDOWN_PATTERN = re.compile(r'[*#]+')
+
+
+def sanitize_stream(chunks):
+    ''' Function To Apply The Assistant's Markdown Clean-Up To A Stream Of Text Chunks
+
+    Equivalent to re.sub(r'[*#]+', '', text).strip() on the joined text: the
+    pattern only removes single characters, so each chunk is cleaned on its own,
+    leading whitespace is dropped and trailing whitespace is held back until more
+    text arrives.
+    '''
+    started = False
+    held = ''
+    for chunk in chunks:
+        text = MARKDOWN_PATTERN.sub('', chunk)
+        if not started:
+            text = text.lstrip()
+            if not text:
+                continue
+            started = True
+        stripped = text.rstrip()
+        if stripped:
+            yield held + stripped
+            held = text[len(stripped):]
+        else:
+            held += text
+
+
+class StreamTimer:
+    ''' Class To Time A Chunk Stream: Time To First Chunk And Total Latency In Seconds '''
+    def __init__(self, label = 'stream'):
+        self.label = label
+        self.ttft = None
+        self.total = None
+        self.chunks = 0
+
+    def wrap(self, chunks):
+        start = time.perf_counter()
+        try:
+            for chunk in chunks:
+                if self.ttft is None:
+                    self.ttft = time.perf_counter() - start
+                self.chunks += 1
+                yield chunk
+        finally:
+            self.total = time.perf_counter() - start
+            ttft = f"{self.ttft:.2f}s" if self.ttft is not None else "n/a"
+            logging.info(f"{self.label}: first chunk after {ttft}, {self.chunks} chunks in {self.total:.2f}s")
+
+
+def stream_generate(prompt, model = VERTEX_MODEL, location = VERTEX_LOCATION, session = None):
+    ''' Function To Stream A Gemini Response Through Vertex AI streamGenerateContent
+    Args:
+        prompt (str): the full prompt text
+        session: authorized requests session, the shared provider's one by default
+    Yields:
+        text chunks as the model produces them
+    '''
+    session = session or get_provider().session('vertex')
+    url = (f"https://{location}-aiplatform.googleapis.com/v1/projects/{src.config.project_id}"
+           f"/locations/{location}/publishers/google/models/{model}:streamGenerateContent?alt=sse")
+    body = {'contents': [{'role': 'user', 'parts': [{'text': prompt}]}]}
+
+    with session.post(url, json=body, stream=True, timeout=STREAM_TIMEOUT_SECONDS) as response:
+        response.raise_for_status()
+        # Server-sent events: one JSON GenerateContentResponse per "data:" line. The lines are
+        # decoded as UTF-8 here, since requests would guess ISO-8859-1 for text/event-stream
+        for line in response.iter_lines():
+            if not line or not line.startswith(b'data:'):
+                continue
+            event = json.loads(line[len(b'data:'):].decode('utf-8'))
+            for candidate in event.get('candidates', []):
+                for part in candidate.get('content', {}).get('parts', []):
+                    if part.get('text'):
+                        yield part['text']
@@ -1,48 +1,353 @@
 from google.cloud import bigquery
 import logging
 from src.data_loader import BigQueryCONN
-from io import BytesIO
+from src.snapshot import get_snapshot
+from src.answer_cache import get_answer_cache
+from src.vector_index import get_vector_index, FILTER_COLUMNS
+from src.embeddings import get_embedding_service, supplier_text, SUPPLIER_TEXT_COLUMNS
+from src.id_allocator import get_id_allocator
+from src.recommendations import (recommendation_labels, label_case_sql, threshold_parameters,
+                                 PREFERRED_ABOVE, AVOID_BELOW)
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO, SEEK_END
+import base64
+import hashlib
 from PIL import Image
 import numpy as np
+import pandas as pd
+import threading
 
 logging.basicConfig(level = logging.INFO)
 
 
+SCORE_MERGE_CHUNK_SIZE = 10000
+# Each row carries a 384-float embedding, so embedding MERGEs stage fewer rows
+EMBEDDING_MERGE_CHUNK_SIZE = 500
+
+IMAGE_UPLOAD_WORKERS = 8
+# Above RESUMABLE_THRESHOLD images are sent as resumable uploads in RESUMABLE_CHUNK_SIZE
+# pieces (GCS needs chunks in multiples of 256 KiB)
+RESUMABLE_THRESHOLD = 8 * 1024 * 1024
+RESUMABLE_CHUNK_SIZE = 32 * 256 * 1024
+HASH_READ_SIZE = 1024 * 1024
+
+# Leading bytes of each accepted image format -> content type
+IMAGE_SIGNATURES = {
+    'jpeg': 'image/jpeg',
+    'png': 'image/png',
+    'gif': 'image/gif',
+    'webp': 'image/webp',
+}
+
+SUPPLIER_TABLE = 'ecochain123.supplychain.suppliers_with_images'
+# Columns written when new suppliers are loaded in bulk, typed as insert_supplier binds them
+LOAD_SCHEMA = [
+    bigquery.SchemaField('supplier_id', 'STRING'),
+    bigquery.SchemaField('supplier_name', 'STRING'),
+    bigquery.SchemaField('country', 'STRING'),
+    bigquery.SchemaField('region', 'STRING'),
+    bigquery.SchemaField('product_category', 'STRING'),
+    bigquery.SchemaField('sub_category', 'STRING'),
+    bigquery.SchemaField('certification', 'STRING'),
+    bigquery.SchemaField('partnership_status', 'STRING'),
+    bigquery.SchemaField('annual_volume', 'INT64'),
+    bigquery.SchemaField('cost_premium', 'FLOAT64'),
+    bigquery.SchemaField('risk_level', 'STRING'),
+    bigquery.SchemaField('last_audit', 'STRING'),
+    bigquery.SchemaField('audit_summary', 'STRING'),
+    bigquery.SchemaField('image_url', 'STRING'),
+    bigquery.SchemaField('updated_at', 'TIMESTAMP'),
+]
+
+# Every writer stamps updated_at, which the snapshot's incremental refresh reads rows by
+UPDATED_AT_DDL = f"ALTER TABLE `{SUPPLIER_TABLE}` ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP"
+_updated_at_projects = set()
+_updated_at_lock = threading.Lock()
+
+# Score output name -> column in suppliers_with_images
+SCORE_TARGET_COLUMNS = {
+    'carbon_score': 'carbon_score',
+    'water_score': 'water_score',
+    'waste_score': 'waste_score',
+    'social_score': 'social_score',
+    'ecoscore': 'total_eco_score',
+}
+
+
+def ensure_updated_at(client):
+    ''' Function To Add The updated_at Column To The Supplier Table, Once Per Process And Project '''
+    project = getattr(client, 'project', None)
+    if project in _updated_at_projects:
+        return
+    with _updated_at_lock:
+        if project not in _updated_at_projects:
+            client.query(UPDATED_AT_DDL).result()
+            _updated_at_projects.add(project)
+
+
+def _score_frame(ecoscores):
+    ''' Function To Normalise Score Records Or A Dict Of Columns Into One Frame, Last Write Per Supplier Wins '''
+    frame = pd.DataFrame(ecoscores)
+    if frame.empty:
+        return frame
+    frame['supplier_id'] = frame['supplier_id'].astype(str)
+    return frame.drop_duplicates(subset='supplier_id', keep='last').reset_index(drop=True)
+
+
+def sniff_image(header):
+    ''' Function To Identify An Image Format From Its First Bytes Without Decoding It
+    Returns: key of IMAGE_SIGNATURES, or None when the header is not recognised
+    '''
+    if header.startswith(b'\xff\xd8\xff'):
+        return 'jpeg'
+    if header.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    if header[:6] in (b'GIF87a', b'GIF89a'):
+        return 'gif'
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+def md5_base64(file_obj):
+    ''' Function To Hash A File From The Start As GCS Reports It In Blob.md5_hash, Leaving It Rewound '''
+    digest = hashlib.md5()
+    file_obj.seek(0)
+    for block in iter(lambda: file_obj.read(HASH_READ_SIZE), b''):
+        digest.update(block)
+    file_obj.seek(0)
+    return base64.b64encode(digest.digest()).decode()
+
+
+def thumbnail_blob_name(blob_name):
+    ''' Function To Return Where The Thumbnail Of An Uploaded Image Is Stored '''
+    return f"thumbnails/{blob_name.rsplit('.', 1)[0]}.jpg"
+
+
 class Update:
     ''' Class to handle all Updates to BigQuery '''
-    def __init__(self,new_supplier_info):
-        self.conn = BigQueryCONN()
-        self.client = self.conn.bigquery_client()
-        self.bucket = self.conn.gcs_client()
+    def __init__(self,new_supplier_info = None, client = None, bucket = None, embeddings = None, id_allocator = None):
+        if client is None:
+            self.conn = BigQueryCONN()
+            self.client = self.conn.bigquery_client()
+            self.bucket = self.conn.gcs_client() if bucket is None else bucket
+        else:
+            # Injected clients, e.g. tests.fakes.FakeBigQueryClient for local runs
+            self.client = client
+            self.bucket = bucket
         self.new_supplier = new_supplier_info
+        # EmbeddingService; src.embeddings.HashEmbeddingBackend gives an offline one
+        self._embeddings = embeddings
+        # IdAllocator; IdAllocator(SQLiteCounterStore()) gives a local one
+        self._id_allocator = id_allocator
+
+    @property
+    def embeddings(self):
+        if self._embeddings is None:
+            self._embeddings = get_embedding_service()
+        return self._embeddings
+
+    @property
+    def id_allocator(self):
+        if self._id_allocator is None:
+            self._id_allocator = get_id_allocator()
+        return self._id_allocator
+
+    def _invalidate_caches(self, supplier_ids):
+        ''' Function To Tell Local Caches Which Suppliers Changed '''
+        try:
+            get_snapshot().invalidate(supplier_ids)
+            get_answer_cache().invalidate()
+        except Exception as e:
+            logging.warning(f'Failed to invalidate supplier caches: {e}')
+
+    def _upload_image(self, img_file, blob_name, thumbnail_size = None):
+        ''' Function To Upload One Image And Optionally Its Thumbnail, Returning The Public URL
+        An object already holding the same bytes (by MD5) is not uploaded again.
+        '''
+        img_file.seek(0)
+        image_format = sniff_image(img_file.read(16))
+        img_file.seek(0, SEEK_END)
+        size = img_file.tell()
+        img_file.seek(0)
+
+        if image_format is None:
+            # Unrecognised header: let PIL decide and re-encode, as before
+            img = Image.open(img_file)
+            buffer = BytesIO()
+            img.save(buffer, format=img.format if img.format else "JPEG")
+            size = buffer.tell()
+            buffer.seek(0)
+            source, content_type = buffer, Image.MIME.get(img.format, "image/jpeg")
+        else:
+            # A known image header: upload the original bytes untouched
+            source, content_type = img_file, IMAGE_SIGNATURES[image_format]
+
+        # A retried or repeated onboarding re-sends the same files under the same names
+        existing = self.bucket.get_blob(blob_name)
+        if existing is not None and existing.md5_hash == md5_base64(source) \
+                and (not thumbnail_size or self.bucket.get_blob(thumbnail_blob_name(blob_name)) is not None):
+            logging.info(f"Image {blob_name} unchanged, upload skipped")
+            return existing.public_url
+
+        # Large files go up as chunked resumable uploads, small ones in a single request
+        chunk_size = RESUMABLE_CHUNK_SIZE if size > RESUMABLE_THRESHOLD else None
+        blob = self.bucket.blob(blob_name, chunk_size=chunk_size)
+        blob.upload_from_file(source, size=size, content_type=content_type)
+        blob.make_public()
+
+        if thumbnail_size:
+            source.seek(0)
+            thumbnail = Image.open(source)
+            thumbnail.thumbnail((thumbnail_size, thumbnail_size))
+            buffer = BytesIO()
+            thumbnail.convert("RGB").save(buffer, format="JPEG", quality=85)
+            buffer.seek(0)
+            thumb_blob = self.bucket.blob(thumbnail_blob_name(blob_name))
+            thumb_blob.upload_from_file(buffer, size=buffer.getbuffer().nbytes, content_type="image/jpeg")
+            thumb_blob.make_public()
+
+        return blob.public_url
 
-    def upload_supplier_images(self, uploaded_images, supplier_id):
+    def upload_supplier_images(self, uploaded_images, supplier_id, thumbnail_size = None,
+                               max_workers = IMAGE_UPLOAD_WORKERS):
         """
         Uploads supplier images to GCS and returns public URLs.
+        Images are uploaded concurrently; files with a recognised image header are
+        streamed as-is, and thumbnail_size (pixels) also uploads a JPEG thumbnail
+        of each image under thumbnails/.
         """
-        bucket = self.bucket
-        image_urls = []
-
+        jobs = []
         for idx, img_file in enumerate(uploaded_images):
-            img = Image.open(img_file)
-
             # Generate filename (supplier_id + index)
             file_ext = img_file.name.split(".")[-1].lower()
-            blob_name = f"{supplier_id}_{idx+1}.{file_ext}"
+            jobs.append((img_file, f"{supplier_id}_{idx+1}.{file_ext}"))
+        if not jobs:
+            return []
 
-            # Save image to buffer for upload
-            buffer = BytesIO()
-            img.save(buffer, format=img.format if img.format else "JPEG")
-            buffer.seek(0)
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(jobs))) as pool:
+            futures = [pool.submit(self._upload_image, img_file, blob_name, thumbnail_size)
+                       for img_file, blob_name in jobs]
+            image_urls = [future.result() for future in futures]
 
-            # Upload to GCS
-            blob = bucket.blob(blob_name)
-            blob.upload_from_file(buffer, content_type=f"image/{file_ext}")
-            blob.make_public()
+        logging.info(f"Uploaded {len(image_urls)} images for supplier {supplier_id}")
+        return image_urls
 
-            image_urls.append(blob.public_url)
+    def next_supplier_id(self):
+        ''' Function To Return The Next Free SUP#### Id
+        Ids come from blocks reserved in the sequence table, so no table scan is
+        needed and concurrent workers never receive the same id.
+        '''
+        return self.id_allocator.next_id()
+
+    def insert_supplier(self, supplier_id, image_url = None):
+        ''' Function To Insert The New Supplier Row Under supplier_id
+        Idempotent: re-running it for an id that already exists inserts nothing.
+        Returns: number of rows inserted
+        '''
+        query = """
+            INSERT INTO `ecochain123.supplychain.suppliers_with_images` (
+                supplier_id,
+                supplier_name,
+                country,
+                region,
+                product_category,
+                sub_category,
+                certification,
+                partnership_status,
+                annual_volume,
+                cost_premium,
+                risk_level,
+                last_audit,
+                audit_summary,
+                image_url,
+                updated_at
+            )
+            SELECT
+                @supplier_id, @supplier_name, @country, @region,
+                @product_category, @sub_category, @certification,
+                @partnership_status, @annual_volume, @cost_premium,
+                @risk_level, @last_audit, @audit_summary, @image_url,
+                CURRENT_TIMESTAMP()
+            FROM UNNEST([1])
+            WHERE NOT EXISTS (
+                SELECT 1 FROM `ecochain123.supplychain.suppliers_with_images`
+                WHERE supplier_id = @supplier_id
+            )
+        """
 
-        return image_urls
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[
+                bigquery.ScalarQueryParameter("supplier_id", "STRING", supplier_id),
+                bigquery.ScalarQueryParameter("supplier_name", "STRING", self.new_supplier["supplier_name"]),
+                bigquery.ScalarQueryParameter("country", "STRING", self.new_supplier["country"]),
+                bigquery.ScalarQueryParameter("region", "STRING", self.new_supplier["region"]),
+                bigquery.ScalarQueryParameter("product_category", "STRING", self.new_supplier["product_category"]),
+                bigquery.ScalarQueryParameter("sub_category", "STRING", self.new_supplier["sub_category"]),
+                bigquery.ScalarQueryParameter("certification", "STRING", self.new_supplier["certification"]),
+                bigquery.ScalarQueryParameter("partnership_status", "STRING", self.new_supplier["partnership_status"]),
+                bigquery.ScalarQueryParameter("annual_volume", "INT64", self.new_supplier["annual_volume"]),
+                bigquery.ScalarQueryParameter("cost_premium", "FLOAT64", self.new_supplier["cost_premium"]),
+                bigquery.ScalarQueryParameter("risk_level", "STRING", self.new_supplier["risk_level"]),
+                bigquery.ScalarQueryParameter("last_audit", "STRING", self.new_supplier["last_audit"]),
+                bigquery.ScalarQueryParameter("audit_summary", "STRING", self.new_supplier["audit_summary"]),
+                bigquery.ScalarQueryParameter("image_url", "STRING", image_url)
+            ]
+        )
+
+        ensure_updated_at(self.client)
+        insert_job = self.client.query(query, job_config=job_config)
+        insert_job.result()
+        inserted = insert_job.num_dml_affected_rows or 0
+
+        logging.info(f"✅ Supplier {supplier_id} added successfully." if inserted
+                     else f"Supplier {supplier_id} already present, nothing inserted.")
+        self._invalidate_caches([supplier_id])
+        return inserted
+
+    def load_suppliers(self, suppliers):
+        """
+        Append many new supplier rows with a single load job.
+        suppliers: DataFrame with supplier_id and the LOAD_SCHEMA columns
+        Unlike streaming inserts, load-job rows can be MERGEd into straight away,
+        so embedding and scoring can follow immediately.
+        Returns: number of rows loaded
+        """
+        if len(suppliers) == 0:
+            return 0
+        frame = suppliers.reindex(columns=[field.name for field in LOAD_SCHEMA])
+        frame['updated_at'] = pd.Timestamp.now(tz='UTC')
+        ensure_updated_at(self.client)
+        job_config = bigquery.LoadJobConfig(
+            schema=LOAD_SCHEMA,
+            write_disposition=bigquery.WriteDisposition.WRITE_APPEND,
+        )
+        load_job = self.client.load_table_from_dataframe(
+            frame, SUPPLIER_TABLE, job_config=job_config
+        )
+        load_job.result()
+        loaded = getattr(load_job, 'output_rows', None) or len(frame)
+        logging.info(f"Loaded {loaded} suppliers in one load job")
+        self._invalidate_caches(frame['supplier_id'].tolist())
+        return loaded
+
+    def set_image_urls(self, supplier_id, image_urls):
+        ''' Function To Store The Uploaded Image URLs Of A Supplier As A Comma-Separated String '''
+        query = """
+            UPDATE `ecochain123.supplychain.suppliers_with_images`
+            SET image_url = @image_url,
+                updated_at = CURRENT_TIMESTAMP()
+            WHERE supplier_id = @supplier_id
+        """
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[
+                bigquery.ScalarQueryParameter("supplier_id", "STRING", supplier_id),
+                bigquery.ScalarQueryParameter("image_url", "STRING", ",".join(image_urls) if image_urls else None),
+            ]
+        )
+        ensure_updated_at(self.client)
+        self.client.query(query, job_config=job_config).result()
+        self._invalidate_caches([supplier_id])
 
     def supplier_update(self):
         ''' Insert new supplier, handle images dynamically '''
@@ -50,15 +355,7 @@ class Update:
             logging.info('Adding New Supplier...')
 
             # Get next supplier_id
-            query_id = """
-                SELECT
-                  CONCAT('SUP', CAST(
-                    IFNULL(MAX(CAST(REGEXP_EXTRACT(supplier_id, r'SUP(\\d+)') AS INT64)), 0) + 1 AS STRING)
-                  ) AS new_supplier_id
-                FROM `ecochain123.supplychain.suppliers_with_images`
-            """
-            query_job = self.client.query(query_id).result()
-            new_supplier_id = [row["new_supplier_id"] for row in query_job][0]
+            new_supplier_id = self.next_supplier_id()
 
             # --- Handle Images if available ---
             uploaded_images = self.new_supplier.get("uploaded_images", [])
@@ -69,54 +366,7 @@ class Update:
                 image_urls_str = None  # no images
 
             # --- Insert Supplier ---
-            query = f"""
-                INSERT INTO `ecochain123.supplychain.suppliers_with_images` (
-                    supplier_id,
-                    supplier_name,
-                    country,
-                    region,
-                    product_category,
-                    sub_category,
-                    certification,
-                    partnership_status,
-                    annual_volume,
-                    cost_premium,
-                    risk_level,
-                    last_audit,
-                    audit_summary,
-                    image_url
-                )
-                VALUES (
-                    @supplier_id, @supplier_name, @country, @region,
-                    @product_category, @sub_category, @certification,
-                    @partnership_status, @annual_volume, @cost_premium,
-                    @risk_level, @last_audit, @audit_summary, @image_url
-                )
-            """
-
-            job_config = bigquery.QueryJobConfig(
-                query_parameters=[
-                    bigquery.ScalarQueryParameter("supplier_id", "STRING", new_supplier_id),
-                    bigquery.ScalarQueryParameter("supplier_name", "STRING", self.new_supplier["supplier_name"]),
-                    bigquery.ScalarQueryParameter("country", "STRING", self.new_supplier["country"]),
-                    bigquery.ScalarQueryParameter("region", "STRING", self.new_supplier["region"]),
-                    bigquery.ScalarQueryParameter("product_category", "STRING", self.new_supplier["product_category"]),
-                    bigquery.ScalarQueryParameter("sub_category", "STRING", self.new_supplier["sub_category"]),
-                    bigquery.ScalarQueryParameter("certification", "STRING", self.new_supplier["certification"]),
-                    bigquery.ScalarQueryParameter("partnership_status", "STRING", self.new_supplier["partnership_status"]),
-                    bigquery.ScalarQueryParameter("annual_volume", "INT64", self.new_supplier["annual_volume"]),
-                    bigquery.ScalarQueryParameter("cost_premium", "FLOAT64", self.new_supplier["cost_premium"]),
-                    bigquery.ScalarQueryParameter("risk_level", "STRING", self.new_supplier["risk_level"]),
-                    bigquery.ScalarQueryParameter("last_audit", "STRING", self.new_supplier["last_audit"]),
-                    bigquery.ScalarQueryParameter("audit_summary", "STRING", self.new_supplier["audit_summary"]),
-                    bigquery.ScalarQueryParameter("image_url", "STRING", image_urls_str)
-                ]
-            )
-
-            insert_job = self.client.query(query, job_config=job_config)
-            insert_job.result()
-
-            logging.info(f"✅ Supplier {new_supplier_id} added successfully.")
+            self.insert_supplier(new_supplier_id, image_urls_str)
             return new_supplier_id
 
         except Exception as e:
@@ -127,149 +377,221 @@ class Update:
     def embed_supplier(self, supplier_id):
         ''' Function to Create embeddings for new supplier'''
         try:
-            logging.info('Embedding New Supplier In Progress...')
             logging.info(f'Embedding New Supplier {supplier_id} In Progress...')
+            self.embed_suppliers([supplier_id])
+        except Exception as e:
+                logging.error(f'Failed to Add text embedding of supplier {supplier_id} - {e}')
+                raise
 
-            query_1 = f'''
-                CREATE OR REPLACE TABLE `ecochain123.supplychain.suppliers_embeddings` AS
-                SELECT
-                    supplier_id,
-                    ml_generate_embedding_result AS text_embedding
-                FROM ML.GENERATE_EMBEDDING(
-                    MODEL `ecochain123.supplychain.embedding_model`,
-                    (
-                        SELECT
-                            supplier_id,
-                            CONCAT(
-                                "Category: ", product_category, "; ",
-                                "Sub-category: ", sub_category, "; ",
-                                "Certification: ", certification, "; ",
-                                "Audit: ", audit_summary
-                            ) AS content
-                        FROM `ecochain123.supplychain.suppliers_with_images`
-                        WHERE supplier_id = @supplier_id
-                    ),
-                    STRUCT(TRUE AS flatten_json_output, 384 AS output_dimensionality)
-                );
-                '''
-            query_2 = '''
-                UPDATE `ecochain123.supplychain.suppliers_with_images` AS t
-                SET text_embedding = s.text_embedding
-                FROM `ecochain123.supplychain.suppliers_embeddings` AS s
-                WHERE t.supplier_id = s.supplier_id
-                AND t.supplier_id = @supplier_id
-                '''
-            job_config = bigquery.QueryJobConfig(
-                    query_parameters=[
-                        bigquery.ScalarQueryParameter("supplier_id", "STRING", supplier_id),
-                    ]
+    def embed_suppliers(self, supplier_ids, chunk_size = EMBEDDING_MERGE_CHUNK_SIZE):
+        """
+        Embed many suppliers and write their text_embedding back.
+        Texts go through the embedding service (cached, batched) and each chunk of
+        embeddings is written with a single MERGE over an array of structs.
+        Returns: number of rows affected
+        """
+        supplier_ids = [str(s) for s in supplier_ids if s]
+        if not supplier_ids:
+            return 0
+
+        columns = ', '.join(dict.fromkeys(['supplier_id'] + SUPPLIER_TEXT_COLUMNS + FILTER_COLUMNS))
+        query = f'''
+            SELECT {columns}
+            FROM `ecochain123.supplychain.suppliers_with_images`
+            WHERE supplier_id IN UNNEST(@supplier_ids)
+            '''
+        job_config = bigquery.QueryJobConfig(
+                query_parameters=[bigquery.ArrayQueryParameter("supplier_ids", "STRING", supplier_ids)]
+            )
+        suppliers = self.client.query(query, job_config=job_config).to_dataframe()
+        if suppliers.empty:
+            logging.warning(f'No suppliers found to embed for {len(supplier_ids)} ids')
+            return 0
+
+        vectors = self.embeddings.embed([supplier_text(row) for _, row in suppliers.iterrows()])
+        logging.info(f'Created {len(vectors)} embeddings, Adding to database')
+
+        merge = '''
+            MERGE `ecochain123.supplychain.suppliers_with_images` AS t
+            USING UNNEST(@embeddings) AS s
+            ON t.supplier_id = s.supplier_id
+            WHEN MATCHED THEN UPDATE SET
+                    text_embedding = s.text_embedding,
+                    updated_at = CURRENT_TIMESTAMP()
+            '''
+        ensure_updated_at(self.client)
+        affected = 0
+        # One MERGE at a time: BigQuery runs at most two mutating DML statements per table concurrently
+        for start in range(0, len(suppliers), chunk_size):
+            rows = [
+                bigquery.StructQueryParameter(
+                    None,
+                    bigquery.ScalarQueryParameter("supplier_id", "STRING", supplier_id),
+                    bigquery.ArrayQueryParameter("text_embedding", "FLOAT64", vector.astype(np.float64).tolist()),
                 )
+                for supplier_id, vector in zip(suppliers['supplier_id'].iloc[start:start + chunk_size],
+                                               vectors[start:start + chunk_size])
+            ]
+            job_config = bigquery.QueryJobConfig(
+                query_parameters=[bigquery.ArrayQueryParameter("embeddings", "STRUCT", rows)]
+            )
+            query_job = self.client.query(merge, job_config=job_config)
+            query_job.result()
+            affected += query_job.num_dml_affected_rows or 0
+        logging.info(f'Embeddings Successfully Added, {affected} rows affected')
 
-            query_job_1 = self.client.query(query_1, job_config=job_config)
-            query_job_1.result()
-            logging.info('Created embedding successfully, Adding to database')
-
-            query_job_2 = self.client.query(query_2, job_config=job_config)
-            query_job_2.result()
-            logging.info('Embeddings Successfully Added')
+        self._invalidate_caches(suppliers['supplier_id'].tolist())
+        self._index_suppliers(suppliers, vectors)
+        return affected
 
+    def _index_suppliers(self, suppliers, vectors):
+        ''' Function To Add Freshly Embedded Suppliers To The Local Vector Index '''
+        try:
+            index = get_vector_index()
+            index.upsert(suppliers['supplier_id'].tolist(), vectors,
+                         {col: suppliers[col].tolist() for col in FILTER_COLUMNS if col in suppliers})
+            index.save()
         except Exception as e:
-                logging.error(f'Failed to Add text embedding of supplier {supplier_id} - {e}')
-                raise
+            logging.warning(f'Failed to add {len(suppliers)} suppliers to the vector index: {e}')
 
-    def update_ecoscores(self, ecoscores_list):
+    def update_ecoscores(self, ecoscores_list, chunk_size = SCORE_MERGE_CHUNK_SIZE,
+                         preferred_above = PREFERRED_ABOVE, avoid_below = AVOID_BELOW):
         """
         Update ecoscores in BigQuery for multiple suppliers.
-        ecoscores_list: list of dicts, each dict contains predicted scores + supplier_id
+        ecoscores_list: list of dicts, each dict contains predicted scores + supplier_id,
+        or the dict of columns returned by BatchPrediction
+        chunk_size: records staged per MERGE statement
+        preferred_above, avoid_below: recommendation thresholds on the ecoscore
+
+        Each chunk is staged as parallel array parameters and applied with a single
+        MERGE, so the number of DML jobs no longer grows with the number of suppliers.
+        Chunks are merged one after another, as concurrent DML on one table conflicts.
+        The recommendation label is binned from the ecoscore and written by the same MERGE.
+        Returns: number of rows affected
         """
-        if not ecoscores_list:
+        scores = _score_frame(ecoscores_list)
+        if scores.empty:
             logging.info("No ecoscores to update.")
-            return
+            return 0
+        # Arrays cannot hold NULL, so a missing label is staged as '' and turned back into NULL below
+        labels = recommendation_labels(scores['ecoscore'], preferred_above, avoid_below)
+        scores['recommendation'] = np.where(pd.isna(labels), '', labels)
+
+        set_clause = ",\n                    ".join(
+            [f"{target} = s.{source}" for source, target in SCORE_TARGET_COLUMNS.items()]
+            + ["recommendation = s.recommendation", "updated_at = CURRENT_TIMESTAMP()"]
+        )
+        select_clause = ",\n                    ".join(
+            [f"@{source}[OFFSET(i)] AS {source}" for source in SCORE_TARGET_COLUMNS]
+            + ["NULLIF(@recommendation[OFFSET(i)], '') AS recommendation"]
+        )
+        query = f"""
+            MERGE `ecochain123.supplychain.suppliers_with_images` AS t
+            USING (
+                SELECT
+                    supplier_id,
+                    {select_clause}
+                FROM UNNEST(@supplier_id) AS supplier_id WITH OFFSET AS i
+            ) AS s
+            ON t.supplier_id = s.supplier_id
+            WHEN MATCHED THEN UPDATE SET
+                    {set_clause}
+        """
 
         try:
-            logging.info("Updating ecoscores in BigQuery...")
-            for record in ecoscores_list:
-                query = """
-                    UPDATE `ecochain123.supplychain.suppliers_with_images`
-                    SET
-                        carbon_score = @carbon_score,
-                        water_score = @water_score,
-                        waste_score = @waste_score,
-                        social_score = @social_score,
-                        total_eco_score = @ecoscore
-                    WHERE supplier_id = @supplier_id
-                """
-                job_config = bigquery.QueryJobConfig(
-                    query_parameters=[
-                        bigquery.ScalarQueryParameter("carbon_score", "FLOAT64", float(record["carbon_score"])),
-                        bigquery.ScalarQueryParameter("water_score", "FLOAT64", float(record["water_score"])),
-                        bigquery.ScalarQueryParameter("waste_score", "FLOAT64", float(record["waste_score"])),
-                        bigquery.ScalarQueryParameter("social_score", "FLOAT64", float(record["social_score"])),
-                        bigquery.ScalarQueryParameter("ecoscore", "FLOAT64", float(record["ecoscore"])),
-                        bigquery.ScalarQueryParameter("supplier_id", "STRING", str(record["supplier_id"]))
-                    ]
-                )
-                query_job = self.client.query(query, job_config=job_config)
+            logging.info(f"Updating ecoscores in BigQuery for {len(scores)} suppliers...")
+            ensure_updated_at(self.client)
+            affected = statements = 0
+            for start in range(0, len(scores), chunk_size):
+                chunk = scores.iloc[start:start + chunk_size]
+                parameters = [bigquery.ArrayQueryParameter("supplier_id", "STRING", chunk['supplier_id'].tolist())]
+                for source in SCORE_TARGET_COLUMNS:
+                    parameters.append(bigquery.ArrayQueryParameter(
+                        source, "FLOAT64", chunk[source].astype(np.float64).tolist()
+                    ))
+                parameters.append(bigquery.ArrayQueryParameter(
+                    "recommendation", "STRING", chunk['recommendation'].tolist()
+                ))
+                query_job = self.client.query(query, job_config=bigquery.QueryJobConfig(query_parameters=parameters))
                 query_job.result()
-                logging.info(f"Updated supplier successfully: {record['supplier_id']}")
+                affected += query_job.num_dml_affected_rows or 0
+                statements += 1
+            logging.info(f"Merged ecoscores for {len(scores)} suppliers in {statements} statements")
+
+            logging.info(f"Ecoscores updated, {affected} rows affected")
+            self._invalidate_caches(scores['supplier_id'].tolist())
+            return affected
 
         except Exception as e:
             logging.error(f"Failed to update ecoscores: {e}")
             raise
 
 
-    def update_recommendations(self,supplier_id):
-        '''Function to add recommendations for new suppliers '''
+    def update_recommendations(self, supplier_ids = None, preferred_above = PREFERRED_ABOVE,
+                               avoid_below = AVOID_BELOW, relabel = False):
+        """
+        Label scored suppliers Preferred / Neutral / Avoid from their total_eco_score.
+        update_ecoscores already writes labels with the scores; this backfills rows
+        scored elsewhere, or relabels everyone after a threshold change.
+        supplier_ids: one id, a list of ids, or None for every supplier
+        relabel: also overwrite existing labels, not only missing ones
+        Returns: number of rows labelled
+        """
+        if isinstance(supplier_ids, str):
+            supplier_ids = [supplier_ids]
+        query = f"""
+            UPDATE `ecochain123.supplychain.suppliers_with_images`
+            SET recommendation = {label_case_sql('total_eco_score')},
+                updated_at = CURRENT_TIMESTAMP()
+            WHERE total_eco_score IS NOT NULL
+              AND (@relabel OR recommendation IS NULL)
+              AND (@all_suppliers OR supplier_id IN UNNEST(@supplier_ids))
+        """
+        job_config = bigquery.QueryJobConfig(
+                query_parameters=threshold_parameters(preferred_above, avoid_below) + [
+                    bigquery.ScalarQueryParameter("relabel", "BOOL", relabel),
+                    bigquery.ScalarQueryParameter("all_suppliers", "BOOL", supplier_ids is None),
+                    bigquery.ArrayQueryParameter("supplier_ids", "STRING", [str(s) for s in supplier_ids or []]),
+                ]
+            )
         try:
-            query_1 = '''
-                    CREATE OR REPLACE TABLE `ecochain123.supplychain.recommendation` AS
-                            SELECT
-                            supplier_id,
-                            total_eco_score,
-                            recommendation
-                            FROM
-                            AI.GENERATE_TABLE(
-                                MODEL `ecochain123.supplychain.gemini_model`,
-                                (
-                                SELECT
-                                    supplier_id,
-                                    total_eco_score,
-                                    CONCAT(
-                                    "Using the following keywords (Preferred, Neutral, or Avoid) categorise this score. ",
-                                    "If above 80, it is Preferred; ",
-                                    "If between 50 and 80, it is Neutral; ",
-                                    "If below 50, it is Avoid. ",
-                                    "Score: ", CAST(total_eco_score AS STRING)
-                                    ) AS prompt
-                                FROM
-                                    `ecochain123.supplychain.suppliers_with_images`
-                                WHERE supplier_id = @supplier_id AND recommendation IS NULL
-                                ),
-                                STRUCT("recommendation STRING" AS output_schema)
-                            );
-                            '''
-            query_2 = '''
-                    UPDATE `ecochain123.supplychain.suppliers_with_images` t
-                    SET t.recommendation = s.recommendation
-                    FROM `ecochain123.supplychain.recommendation` s
-                    WHERE t.supplier_id = s.supplier_id;
-                                '''
-            job_config = bigquery.QueryJobConfig(
-                    query_parameters=[
-                        bigquery.ScalarQueryParameter("supplier_id", "STRING", supplier_id),
-                    ]
-                )
-            query_job_1 = self.client.query(query_1, job_config = job_config)
-            query_job_1.result()
-            logging.info('Created Recommendation successfully, Adding to database')
-            query_job_2 = self.client.query(query_2)
-            query_job_2.result()
-            logging.info('recommendation Successfully Added')
+            ensure_updated_at(self.client)
+            query_job = self.client.query(query, job_config = job_config)
+            query_job.result()
+            labelled = query_job.num_dml_affected_rows or 0
+            logging.info(f'Recommendations labelled for {labelled} suppliers')
+            self._invalidate_caches(supplier_ids)
+            return labelled
 
         except Exception as e:
                 logging.error(f'Failed to Add Recommendation of new supplier {e}')
                 raise
 
-
-
-
+    def recommendation_rationales(self, supplier_ids):
+        """
+        Optional LLM explanation of each supplier's recommendation; the label itself
+        never depends on it. One AI.GENERATE query covers every supplier.
+        Returns: dict of supplier_id -> rationale text
+        """
+        query = """
+            SELECT
+                supplier_id,
+                AI.GENERATE(
+                    CONCAT(
+                        "In two sentences, explain to a sourcing manager why this supplier is rated ",
+                        recommendation, ". Total eco score: ", CAST(total_eco_score AS STRING),
+                        "; carbon ", CAST(carbon_score AS STRING), ", water ", CAST(water_score AS STRING),
+                        ", waste ", CAST(waste_score AS STRING), ", social ", CAST(social_score AS STRING),
+                        ". Audit summary: ", IFNULL(audit_summary, "none")
+                    ),
+                    connection_id => 'us.test_connection',
+                    endpoint => 'gemini-2.5-flash'
+                ).result AS rationale
+            FROM `ecochain123.supplychain.suppliers_with_images`
+            WHERE supplier_id IN UNNEST(@supplier_ids) AND recommendation IS NOT NULL
+        """
+        job_config = bigquery.QueryJobConfig(
+                query_parameters=[bigquery.ArrayQueryParameter("supplier_ids", "STRING", [str(s) for s in supplier_ids])]
+            )
+        rows = self.client.query(query, job_config = job_config).result()
+        return {row['supplier_id']: row['rationale'] for row in rows}
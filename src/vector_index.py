@@ -0,0 +1,298 @@
+import io
+import logging
+import os
+import threading
+import time
+import numpy as np
+from src.features import EMBEDDING_COLUMN, EMBEDDING_DIM, embedding_matrix
+from src.snapshot import (get_snapshot, rows_updated_since, updated_at_watermark,
+                          UPDATED_AT_COLUMN, UPDATED_AT_OVERLAP_SECONDS)
+
+logging.basicConfig(level = logging.INFO)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BASE_DIR)
+VECTOR_INDEX_PATH = os.path.join(PROJECT_ROOT, 'cache', 'vector_index.npz')
+
+# Columns that search() can filter on
+FILTER_COLUMNS = ['country', 'product_category', 'risk_level']
+
+# Below IVF_MIN_ROWS an exact scan is already sub-millisecond; above it rows are
+# partitioned into about sqrt(n) lists and only the nprobe closest lists are scanned
+IVF_MIN_ROWS = 50_000
+DEFAULT_NPROBE = 8
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE = 100_000
+
+
+def _normalize(matrix):
+    ''' Function To Scale Rows To Unit Length So A Dot Product Is Cosine Similarity '''
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+    return matrix
+
+
+def _kmeans(vectors, n_lists, iterations = KMEANS_ITERATIONS, seed = 0):
+    ''' Function To Fit Spherical k-means Centroids On A Sample Of Unit Vectors '''
+    rng = np.random.default_rng(seed)
+    sample = vectors[rng.choice(len(vectors), min(len(vectors), KMEANS_SAMPLE), replace=False)]
+    centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, sample)
+        empty = ~sums.any(axis=1)
+        sums[empty] = centroids[empty]
+        centroids = _normalize(sums)
+    return centroids
+
+
+class VectorIndex:
+    ''' Class To Search Supplier text_embedding Vectors In Process
+
+    Embeddings are kept as one L2-normalised float32 matrix so similarity is a
+    single matrix-vector product, with country / category / risk stored alongside
+    for filtered top-k. Large tables are partitioned IVF-style. The index is
+    rebuilt when the supplier snapshot is rebuilt; incremental snapshot refreshes
+    and upsert() update it in place. It is persisted to an .npz file.
+    '''
+    def __init__(self, path = VECTOR_INDEX_PATH, dim = EMBEDDING_DIM, nprobe = DEFAULT_NPROBE):
+        self.path = path
+        self.dim = dim
+        self.nprobe = nprobe
+        self._lock = threading.RLock()
+        self.snapshot_version = -1
+        self.snapshot_build = -1
+        # Newest updated_at the index has taken in, as epoch seconds
+        self.updated_at_watermark = None
+        self._reset()
+
+    def _reset(self):
+        self.ids = np.empty(0, dtype=str)
+        self.vectors = np.empty((0, self.dim), dtype=np.float32)
+        self.metadata = {col: np.empty(0, dtype=str) for col in FILTER_COLUMNS}
+        self.centroids = None
+        self.assignment = np.empty(0, dtype=np.int32)
+        self._positions = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _reindex(self):
+        self._positions = {supplier_id: i for i, supplier_id in enumerate(self.ids.tolist())}
+
+    def _assign(self, vectors):
+        if self.centroids is None:
+            return np.zeros(len(vectors), dtype=np.int32)
+        return np.argmax(vectors @ self.centroids.T, axis=1).astype(np.int32)
+
+    def build(self, table, snapshot_version = -1, snapshot_build = -1):
+        ''' Function To Build The Index From A Supplier Arrow Table
+        Args:
+            table: pyarrow.Table with supplier_id, text_embedding and FILTER_COLUMNS
+            snapshot_version, snapshot_build: version and build id of the snapshot the table came from
+        '''
+        watermark = updated_at_watermark(table)
+        start = time.perf_counter()
+        table = table.filter(table.column(EMBEDDING_COLUMN).is_valid())
+        vectors = _normalize(embedding_matrix(table.column(EMBEDDING_COLUMN), self.dim, np.float32))
+
+        with self._lock:
+            self.ids = np.asarray(table.column('supplier_id').to_pylist(), dtype=str)
+            self.vectors = vectors
+            self.metadata = {col: np.asarray(table.column(col).fill_null('').to_pylist(), dtype=str)
+                             if col in table.column_names else np.full(len(self.ids), '', dtype=str)
+                             for col in FILTER_COLUMNS}
+            if len(vectors) >= IVF_MIN_ROWS:
+                # Centroids are kept across rebuilds so a refresh only re-assigns rows
+                if self.centroids is None:
+                    self.centroids = _kmeans(vectors, int(np.sqrt(len(vectors))))
+            else:
+                self.centroids = None
+            self.assignment = self._assign(vectors)
+            self.snapshot_version = snapshot_version
+            self.snapshot_build = snapshot_build
+            self.updated_at_watermark = watermark
+            self._reindex()
+        logging.info(f" Vector index built with {len(self.ids)} rows in {time.perf_counter() - start:.2f}s")
+
+    def sync(self, client):
+        ''' Function To Bring The Index Up To The Supplier Snapshot
+        A rebuilt snapshot rebuilds the index; an incremental refresh only upserts
+        the rows whose updated_at is newer than what the index has taken in.
+        '''
+        snapshot = get_snapshot()
+        table = snapshot.load(client)
+        version, build = snapshot.version(), snapshot.build_id()
+        with self._lock:
+            if version == self.snapshot_version:
+                return self
+            if build != self.snapshot_build or self.updated_at_watermark is None \
+                    or UPDATED_AT_COLUMN not in table.column_names:
+                self.build(table, version, build)
+            else:
+                # Same overlap as the snapshot's own refresh, as updated_at is not commit order
+                changed = rows_updated_since(table, self.updated_at_watermark - UPDATED_AT_OVERLAP_SECONDS)
+                changed = changed.filter(changed.column(EMBEDDING_COLUMN).is_valid())
+                self.upsert(changed.column('supplier_id').to_pylist(),
+                            embedding_matrix(changed.column(EMBEDDING_COLUMN), self.dim, np.float32),
+                            {col: changed.column(col).to_pylist() for col in FILTER_COLUMNS
+                             if col in changed.column_names})
+                self.snapshot_version = version
+                self.updated_at_watermark = max(self.updated_at_watermark, updated_at_watermark(table) or 0)
+                logging.info(f" Vector index updated with {changed.num_rows} changed rows")
+            self.save()
+        return self
+
+    @staticmethod
+    def _fit(array, values):
+        ''' Function To Widen A Fixed-Width String Array So values Can Be Written Into It '''
+        return array.astype(values.dtype) if values.dtype.itemsize > array.dtype.itemsize else array
+
+    def upsert(self, supplier_ids, embeddings, metadata = None):
+        ''' Function To Add Or Replace Supplier Vectors In Place
+        New rows are appended with one concatenate per array, so a batch costs
+        one copy of the index rather than one per supplier.
+        Args:
+            supplier_ids: supplier ids; the last of repeated ids wins
+            embeddings: (len(supplier_ids), dim) vectors
+            metadata: FILTER_COLUMNS -> one value per id; missing columns keep
+                existing values and are blank for new rows
+        '''
+        ids = np.asarray([str(s) for s in supplier_ids], dtype=str)
+        if len(ids) == 0:
+            return
+        vectors = _normalize(np.array(embeddings, dtype=np.float32).reshape(len(ids), self.dim))
+        metadata = {col: np.asarray([str(value or '') for value in values], dtype=str)
+                    for col, values in (metadata or {}).items() if col in FILTER_COLUMNS}
+        _, last = np.unique(ids[::-1], return_index=True)
+        keep = np.sort(len(ids) - 1 - last)
+        ids, vectors = ids[keep], vectors[keep]
+        metadata = {col: values[keep] for col, values in metadata.items()}
+
+        with self._lock:
+            assignment = self._assign(vectors)
+            positions = np.fromiter((self._positions.get(s, -1) for s in ids.tolist()), dtype=np.int64, count=len(ids))
+            existing = positions >= 0
+            if existing.any():
+                self.vectors[positions[existing]] = vectors[existing]
+                self.assignment[positions[existing]] = assignment[existing]
+                for col, values in metadata.items():
+                    self.metadata[col] = self._fit(self.metadata[col], values)
+                    self.metadata[col][positions[existing]] = values[existing]
+            added = ~existing
+            if added.any():
+                start = len(self.ids)
+                self.ids = np.concatenate([self.ids, ids[added]])
+                self.vectors = np.concatenate([self.vectors, vectors[added]])
+                self.assignment = np.concatenate([self.assignment, assignment[added]])
+                for col in FILTER_COLUMNS:
+                    values = metadata[col][added] if col in metadata else np.full(int(added.sum()), '', dtype=str)
+                    self.metadata[col] = np.concatenate([self.metadata[col], values])
+                self._positions.update(zip(ids[added].tolist(), range(start, len(self.ids))))
+
+    def _candidates(self, query, filters):
+        ''' Function To Return The Row Positions To Score, Or None For Every Row '''
+        if self.centroids is None and all(values is None for values in filters.values()):
+            return None
+        mask = np.ones(len(self.ids), dtype=bool)
+        for col, values in filters.items():
+            if values is None:
+                continue
+            if col not in self.metadata:
+                raise ValueError(f"Unsupported vector index filter: {col}")
+            values = [values] if isinstance(values, str) else list(values)
+            mask &= np.isin(self.metadata[col], values)
+        if self.centroids is not None:
+            lists = np.argsort(self.centroids @ query)[::-1][:self.nprobe]
+            probed = mask & np.isin(self.assignment, lists)
+            # A narrow filter may leave the probed lists empty; scan every match instead
+            if probed.any():
+                mask = probed
+        return np.flatnonzero(mask)
+
+    def search(self, query, k = 5, **filters):
+        ''' Function To Return The k Most Similar Suppliers
+        Args:
+            query: dim-length query embedding
+            k: number of results
+            filters: country / product_category / risk_level, each a value or list of values
+        Returns:
+            list of (supplier_id, cosine similarity), most similar first
+        '''
+        query = _normalize(np.asarray(query, dtype=np.float32).reshape(self.dim))
+        with self._lock:
+            candidates = self._candidates(query, filters)
+            if candidates is None:
+                candidates = np.arange(len(self.ids))
+                scores = self.vectors @ query
+            else:
+                scores = self.vectors[candidates] @ query
+            if len(candidates) == 0:
+                return []
+            k = min(k, len(candidates))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(str(self.ids[candidates[i]]), float(scores[i])) for i in top]
+
+    def save(self):
+        ''' Function To Persist The Index Atomically '''
+        with self._lock:
+            buffer = io.BytesIO()
+            np.savez(buffer, ids=self.ids, vectors=self.vectors, assignment=self.assignment,
+                     centroids=self.centroids if self.centroids is not None else np.empty((0, self.dim), np.float32),
+                     snapshot_version=np.int64(self.snapshot_version),
+                     snapshot_build=np.float64(self.snapshot_build),
+                     updated_at_watermark=np.float64(np.nan if self.updated_at_watermark is None
+                                                     else self.updated_at_watermark),
+                     **{f'meta_{col}': values for col, values in self.metadata.items()})
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(buffer.getvalue())
+            os.replace(tmp_path, self.path)
+
+    def load(self):
+        ''' Function To Load A Persisted Index
+        Returns:
+            bool: whether an index was loaded
+        '''
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                if data['vectors'].shape[1] != self.dim:
+                    logging.warning(f"Ignoring vector index with dimension {data['vectors'].shape[1]}")
+                    return False
+                with self._lock:
+                    self.ids = data['ids']
+                    self.vectors = data['vectors']
+                    self.assignment = data['assignment']
+                    self.centroids = data['centroids'] if len(data['centroids']) else None
+                    self.snapshot_version = int(data['snapshot_version'])
+                    # Indexes saved before builds were tracked are rebuilt on the next sync
+                    self.snapshot_build = float(data['snapshot_build']) if 'snapshot_build' in data.files else -1
+                    watermark = float(data['updated_at_watermark']) if 'updated_at_watermark' in data.files else np.nan
+                    self.updated_at_watermark = None if np.isnan(watermark) else watermark
+                    self.metadata = {col: data[f'meta_{col}'] for col in FILTER_COLUMNS}
+                    self._reindex()
+            logging.info(f" Vector index loaded with {len(self.ids)} rows")
+            return True
+        except (OSError, KeyError, ValueError) as e:
+            logging.info(f" No usable vector index at {self.path}: {e}")
+            return False
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_vector_index():
+    ''' Function To Return The Process-Wide Vector Index, Loaded From Disk When Present '''
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                index = VectorIndex()
+                index.load()
+                _index = index
+    return _index
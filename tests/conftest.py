@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.answer_cache import AnswerCache
+from src.arrow_fetch import ArrowFetcher
+from src.snapshot import SupplierSnapshot
+from tests.fakes import FakeBigQueryClient, FakeBigQueryReadClient
+
+
+def supplier_table(n):
+    ''' Function To Build An In-Memory suppliers_with_images Table With n Unscored Suppliers '''
+    return pd.DataFrame({
+        'supplier_id': [f"SUP{i}" for i in range(1, n + 1)],
+        'supplier_name': [f"Supplier {i}" for i in range(1, n + 1)],
+        'country': 'Kenya',
+        'product_category': 'Textiles',
+        'risk_level': 'Low',
+        'carbon_score': np.nan,
+        'water_score': np.nan,
+        'waste_score': np.nan,
+        'social_score': np.nan,
+        'total_eco_score': np.nan,
+        'recommendation': None,
+    })
+
+
+def make_snapshot(tmp_path, client):
+    ''' Function To Build A Snapshot Under tmp_path That Reads client's Tables Through A Fake Read Client '''
+    read_client = FakeBigQueryReadClient(client)
+    snapshot = SupplierSnapshot(path=str(tmp_path / 'suppliers.arrow'), fetcher=ArrowFetcher(client, read_client))
+    return snapshot, read_client
+
+
+@pytest.fixture
+def local_caches(tmp_path, monkeypatch):
+    ''' Points the snapshot and answer cache Update invalidates at files under tmp_path '''
+    snapshot = SupplierSnapshot(path=str(tmp_path / 'suppliers.arrow'))
+    answers = AnswerCache(path=str(tmp_path / 'answers.sqlite'))
+    monkeypatch.setattr('src.updates.get_snapshot', lambda: snapshot)
+    monkeypatch.setattr('src.updates.get_answer_cache', lambda: answers)
+    return snapshot
+
+
+@pytest.fixture
+def client():
+    return FakeBigQueryClient({'suppliers_with_images': supplier_table(5)})
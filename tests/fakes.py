@@ -0,0 +1,425 @@
+'''
+In-memory stand-ins for the Google Cloud clients, so the update and scoring
+paths can be exercised locally without BigQuery or GCS access.
+'''
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from io import BytesIO
+import base64
+import hashlib
+from types import SimpleNamespace
+import re
+import threading
+import time
+import pandas as pd
+import pyarrow as pa
+
+
+def _table_name(query):
+    ''' Function To Return The Short Name Of The First Table Referenced In A Query '''
+    match = re.search(r'`[\w-]+\.[\w-]+\.(\w+)`', query)
+    return match.group(1) if match else None
+
+
+_SCALAR_TYPES = {'INT64': int, 'INTEGER': int, 'FLOAT64': float, 'FLOAT': float, 'NUMERIC': float,
+                 'BOOL': lambda value: value == 'true', 'BOOLEAN': lambda value: value == 'true'}
+
+
+def _param_value(parameter_type, parameter_value):
+    ''' Function To Decode One Parameter From Its API Representation Into Plain Python Values '''
+    if parameter_value is None:
+        return None
+    if 'arrayType' in parameter_type:
+        return [_param_value(parameter_type['arrayType'], value)
+                for value in parameter_value.get('arrayValues', [])]
+    if 'structTypes' in parameter_type:
+        fields = parameter_value.get('structValues', {})
+        return {field['name']: _param_value(field['type'], fields.get(field['name']))
+                for field in parameter_type['structTypes']}
+    value = parameter_value.get('value')
+    return None if value is None else _SCALAR_TYPES.get(parameter_type['type'], str)(value)
+
+
+def _query_params(job_config):
+    ''' Function To Flatten Query Parameters Into A name -> value dict
+    Reads the config's API representation directly; rebuilding parameter objects
+    through job_config.query_parameters is slow for large arrays of structs.
+    '''
+    if job_config is None:
+        return {}
+    parameters = job_config._properties.get('query', {}).get('queryParameters', [])
+    return {param['name']: _param_value(param['parameterType'], param.get('parameterValue')) for param in parameters}
+
+
+class FakeQueryJob:
+    ''' Class Mimicking The Parts Of bigquery.QueryJob The App Uses
+
+    A job "runs" for latency seconds from when the client started it, so jobs
+    started together overlap as they would in BigQuery. result() honours its
+    timeout (raising concurrent.futures.TimeoutError) and cancel().
+    '''
+    def __init__(self, rows = None, num_dml_affected_rows = None, latency = 0.0):
+        self.rows = rows if rows is not None else []
+        self.num_dml_affected_rows = num_dml_affected_rows
+        self.latency = latency
+        self.started_at = time.monotonic()
+        self.child_jobs = []
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def result(self, timeout = None):
+        remaining = self.started_at + self.latency - time.monotonic()
+        if remaining > 0:
+            if timeout is not None and timeout < remaining:
+                self._cancelled.wait(timeout)
+                if not self.cancelled:
+                    raise FutureTimeoutError(f"Job did not finish within {timeout}s")
+            else:
+                self._cancelled.wait(remaining)
+        if self.cancelled:
+            raise RuntimeError("Job execution was cancelled")
+        return iter(self.rows)
+
+    def to_dataframe(self):
+        self.result()
+        return pd.DataFrame(self.rows)
+
+    def to_arrow(self):
+        self.result()
+        rows = self.rows
+        return rows if isinstance(rows, pa.Table) else pa.Table.from_pandas(pd.DataFrame(rows), preserve_index=False)
+
+    def cancel(self):
+        self._cancelled.set()
+        return True
+
+
+class FakeBigQueryClient:
+    ''' Class Standing In For bigquery.Client
+
+    tables holds DataFrames keyed by short table name. Every query is recorded
+    in jobs; handlers registered with on() decide what a query returns. MERGE
+    statements that stage array parameters (as Update.update_ecoscores does)
+    or an array of structs (as Update.embed_suppliers does) are applied to the
+    in-memory table out of the box (col = CURRENT_TIMESTAMP() included), as
+    are SELECTs of listed columns by supplier_id IN UNNEST(@...) and
+    load_table_from_dataframe appends.
+    '''
+    def __init__(self, tables = None, latency = 0.0, project = 'ecochain123'):
+        self.tables = tables if tables is not None else {}
+        self.latency = latency
+        self.project = project
+        self.jobs = []
+        self._handlers = [(re.compile(r'^\s*MERGE\b.*UNNEST\(@supplier_id\)', re.S), _merge_array_params),
+                          (re.compile(r'^\s*MERGE\b.*USING\s+UNNEST\(@\w+\)\s+AS\s+s\b', re.S), _merge_struct_rows),
+                          (re.compile(r'^\s*SELECT\s+[\w\s,]+\s+FROM\s+`[^`]+`\s+WHERE\s+supplier_id\s+IN\s+UNNEST\(@\w+\)\s*$',
+                                      re.S), _select_by_ids)]
+        self._lock = threading.Lock()
+
+    def on(self, pattern, handler):
+        ''' Function To Register A Handler(client, query, params) Returning A FakeQueryJob '''
+        self._handlers.insert(0, (re.compile(pattern, re.S | re.I), handler))
+
+    def query(self, query, job_config = None, **kwargs):
+        params = _query_params(job_config)
+        # A multi-statement script is one job whose result is its last statement's
+        statements = [statement for statement in re.split(r';\s*(?:\n|$)', query) if statement.strip()] or [query]
+        with self._lock:
+            self.jobs.append((query, params))
+            children = [self._run_statement(statement, params) for statement in statements]
+        job = children[-1]
+        if len(children) > 1:
+            job.child_jobs = children
+        job.latency = job.latency or self.latency
+        job.started_at = time.monotonic()
+        return job
+
+    def _run_statement(self, statement, params):
+        for pattern, handler in self._handlers:
+            if pattern.search(statement):
+                return handler(self, statement, params)
+        return FakeQueryJob()
+
+    def load_table_from_dataframe(self, dataframe, destination, job_config = None, **kwargs):
+        ''' Function To Append A DataFrame To An In-Memory Table, As A Load Job Would '''
+        name = str(destination).split('.')[-1].strip('`')
+        with self._lock:
+            self.jobs.append((f'LOAD {destination}', {'rows': len(dataframe)}))
+            existing = self.tables.get(name)
+            self.tables[name] = dataframe.copy() if existing is None else \
+                pd.concat([existing, dataframe], ignore_index=True)
+        job = FakeQueryJob(latency=self.latency)
+        job.output_rows = len(dataframe)
+        return job
+
+
+def _stamp_current_timestamp(table, matched, query):
+    ''' Function To Apply "col = CURRENT_TIMESTAMP()" Assignments Of A DML Statement To The Matched Rows '''
+    for target in re.findall(r'(\w+)\s*=\s*CURRENT_TIMESTAMP\(\)', query):
+        if target not in table.columns:
+            table[target] = pd.Series(pd.NaT, index=table.index, dtype='datetime64[ns, UTC]')
+        table.loc[matched, target] = pd.Timestamp.now(tz='UTC')
+
+
+def _merge_array_params(client, query, params):
+    ''' Handler Applying "MERGE ... USING UNNEST(@supplier_id) ... SET col = s.param" To An In-Memory Table '''
+    table = client.tables.get(_table_name(query))
+    if table is None:
+        return FakeQueryJob(num_dml_affected_rows=0)
+
+    assignments = [(target, source) for target, source in re.findall(r'(\w+)\s*=\s*s\.(\w+)', query)
+                   if source != 'supplier_id']
+    staged = pd.DataFrame({source: params[source] for _, source in assignments})
+    staged['supplier_id'] = params['supplier_id']
+    staged = staged.set_index('supplier_id')
+
+    matched = table['supplier_id'].isin(staged.index)
+    rows = table.loc[matched, 'supplier_id']
+    for target, source in assignments:
+        table.loc[matched, target] = staged.loc[rows, source].to_numpy()
+    _stamp_current_timestamp(table, matched, query)
+    return FakeQueryJob(num_dml_affected_rows=int(matched.sum()))
+
+
+def _select_by_ids(client, query, params):
+    ''' Handler Returning "SELECT a, b FROM table WHERE supplier_id IN UNNEST(@ids)" From An In-Memory Table '''
+    table = client.tables.get(_table_name(query))
+    columns = list(dict.fromkeys(col.strip() for col in re.search(r'SELECT\s+(.*?)\s+FROM', query, re.S).group(1).split(',')))
+    name = re.search(r'UNNEST\(@(\w+)\)', query).group(1)
+    if table is None:
+        return FakeQueryJob()
+    rows = table[table['supplier_id'].isin(params[name])]
+    return FakeQueryJob(rows=rows.reindex(columns=columns).to_dict(orient='records'))
+
+
+def _merge_struct_rows(client, query, params):
+    ''' Handler Applying "MERGE ... USING UNNEST(@rows) AS s ... SET col = s.field" To An In-Memory Table '''
+    table = client.tables.get(_table_name(query))
+    name = re.search(r'USING\s+UNNEST\(@(\w+)\)', query).group(1)
+    if table is None:
+        return FakeQueryJob(num_dml_affected_rows=0)
+
+    staged = {row['supplier_id']: row for row in params[name]}
+    assignments = re.findall(r'(\w+)\s*=\s*s\.(\w+)', query)
+    matched = table['supplier_id'].isin(list(staged))
+    for target, source in assignments:
+        if source == 'supplier_id':
+            continue
+        if target not in table.columns:
+            table[target] = None
+        column = table[target].astype(object)
+        for position in table.index[matched]:
+            column.at[position] = staged[table.at[position, 'supplier_id']][source]
+        table[target] = column
+    _stamp_current_timestamp(table, matched, query)
+    return FakeQueryJob(num_dml_affected_rows=int(matched.sum()))
+
+
+_CONDITION = re.compile(
+    r"^\s*(?P<column>\w+)\s+(?:(?P<null>IS\s+(?:NOT\s+)?NULL)|(?P<op><=|>=|!=|<>|=|<|>)\s*(?P<literal>.+?)"
+    r"|IN\s*\((?P<values>.*)\))\s*$", re.I | re.S)
+_COMPARE = {'=': 'eq', '!=': 'ne', '<>': 'ne', '<': 'lt', '<=': 'le', '>': 'gt', '>=': 'ge'}
+
+
+def _literal(text):
+    ''' Function To Parse A SQL Literal: a number, 'string' or TIMESTAMP 'value' '''
+    text = text.strip()
+    match = re.fullmatch(r"(?:(TIMESTAMP|DATE)\s+)?'(.*)'", text, re.I | re.S)
+    if match:
+        kind, value = match.groups()
+        return pd.Timestamp(value) if kind else value
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def _restriction_mask(frame, restriction):
+    ''' Function To Evaluate A Storage API Row Restriction Against A DataFrame
+    Supports conditions joined by AND: col IS [NOT] NULL, col <op> literal and col IN (literals).
+    '''
+    mask = pd.Series(True, index=frame.index)
+    for condition in re.split(r'\s+AND\s+', restriction.strip(), flags=re.I):
+        match = _CONDITION.match(condition)
+        if match is None:
+            raise ValueError(f"Unsupported row restriction: {condition}")
+        column = frame[match['column']]
+        if match['null']:
+            condition_mask = column.isna()
+            if 'NOT' in match['null'].upper():
+                condition_mask = ~condition_mask
+        elif match['values'] is not None:
+            condition_mask = column.isin([_literal(value) for value in match['values'].split(',')])
+        else:
+            literal = _literal(match['literal'])
+            if isinstance(literal, pd.Timestamp):
+                column = pd.to_datetime(column, utc=True)
+                literal = literal.tz_localize('UTC') if literal.tzinfo is None else literal.tz_convert('UTC')
+            condition_mask = getattr(column, _COMPARE[match['op']])(literal).fillna(False)
+        mask &= condition_mask.astype(bool)
+    return mask
+
+
+class _FakeReadPage:
+    def __init__(self, batch):
+        self._batch = batch
+
+    def to_arrow(self):
+        return self._batch
+
+
+class _FakeReadRows:
+    def __init__(self, batches):
+        self.pages = [_FakeReadPage(batch) for batch in batches]
+
+
+class _FakeReadStream:
+    def __init__(self, batches):
+        self._batches = batches
+
+    def rows(self, read_session = None):
+        return _FakeReadRows(self._batches)
+
+
+class FakeBigQueryReadClient:
+    ''' Class Standing In For bigquery_storage.BigQueryReadClient
+
+    Serves the in-memory tables of a FakeBigQueryClient: a read session splits the
+    selected columns into up to max_stream_count streams of batch_rows batches.
+    Row restrictions are evaluated for the subset _restriction_mask understands.
+    sessions counts the sessions created and restrictions keeps their row restrictions.
+    '''
+    def __init__(self, bigquery_client, batch_rows = 1024):
+        self.bigquery_client = bigquery_client
+        self.batch_rows = batch_rows
+        self.sessions = 0
+        self.restrictions = []
+        self._streams = {}
+        self._lock = threading.Lock()
+
+    def create_read_session(self, parent = None, read_session = None, max_stream_count = 1, **kwargs):
+        name = read_session.table.rsplit('/', 1)[-1]
+        frame = self.bigquery_client.tables[name]
+        columns = list(read_session.read_options.selected_fields) or list(frame.columns)
+        # Column types are inferred from the whole table, as a real table has a schema even when nothing matches
+        table = pa.Table.from_pandas(frame[columns], preserve_index=False)
+        restriction = read_session.read_options.row_restriction
+        if restriction:
+            table = table.filter(pa.array(_restriction_mask(frame, restriction).to_numpy()))
+        batches = table.to_batches(max_chunksize=self.batch_rows)
+        count = max(1, min(max_stream_count or 1, len(batches)))
+
+        with self._lock:
+            self.sessions += 1
+            self.restrictions.append(restriction or None)
+            session_name = f"{parent}/locations/us/sessions/{self.sessions}"
+            streams = []
+            for i in range(count):
+                stream_name = f"{session_name}/streams/{i}"
+                self._streams[stream_name] = batches[i::count]
+                streams.append(SimpleNamespace(name=stream_name))
+        return SimpleNamespace(name=session_name, streams=streams,
+                               arrow_schema=SimpleNamespace(serialized_schema=table.schema.serialize().to_pybytes()))
+
+    def read_rows(self, name, offset = 0, **kwargs):
+        with self._lock:
+            return _FakeReadStream(self._streams[name])
+
+
+class FakeBlob:
+    ''' Class Mimicking The Parts Of storage.Blob The App Uses '''
+    def __init__(self, bucket, name, chunk_size = None):
+        self.bucket = bucket
+        self.name = name
+        self.chunk_size = chunk_size
+        self.data = None
+        self.content_type = None
+        self.public = False
+        self.resumable = False
+        self.chunks = 0
+
+    @property
+    def public_url(self):
+        return f"https://storage.googleapis.com/{self.bucket.name}/{self.name}"
+
+    @property
+    def md5_hash(self):
+        if self.data is None:
+            return None
+        return base64.b64encode(hashlib.md5(self.data).digest()).decode()
+
+    def upload_from_file(self, file_obj, rewind = False, size = None, content_type = None, **kwargs):
+        self.bucket._begin()
+        try:
+            self._upload(file_obj, rewind, size, content_type)
+        except Exception:
+            self.bucket._store(None)
+            raise
+        self.bucket._store(self)
+
+    def _upload(self, file_obj, rewind, size, content_type):
+        if rewind:
+            file_obj.seek(0)
+        if self.bucket.latency:
+            time.sleep(self.bucket.latency)
+        # A chunk_size makes the real client send a resumable upload in chunk_size pieces
+        self.resumable = self.chunk_size is not None
+        if self.resumable:
+            parts = []
+            while True:
+                part = file_obj.read(self.chunk_size)
+                if not part:
+                    break
+                parts.append(part)
+            data = b''.join(parts)
+            self.chunks = len(parts)
+        else:
+            data = file_obj.read() if size is None else file_obj.read(size)
+            self.chunks = 1
+        self.data, self.content_type = data, content_type
+
+    def upload_from_string(self, data, content_type = None, **kwargs):
+        self.upload_from_file(BytesIO(data.encode() if isinstance(data, str) else data), content_type=content_type)
+
+    def download_as_bytes(self, **kwargs):
+        return self.bucket.blobs[self.name].data
+
+    def make_public(self, **kwargs):
+        self.public = True
+
+
+class FakeBucket:
+    ''' Class Standing In For storage.Bucket
+
+    Uploaded blobs are kept in blobs by name; uploads counts every upload and
+    max_concurrent records the most uploads seen in flight at once.
+    '''
+    def __init__(self, name = 'fake-bucket', latency = 0.0):
+        self.name = name
+        self.latency = latency
+        self.blobs = {}
+        self.uploads = 0
+        self.max_concurrent = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def blob(self, blob_name, chunk_size = None, **kwargs):
+        return FakeBlob(self, blob_name, chunk_size)
+
+    def get_blob(self, blob_name, **kwargs):
+        return self.blobs.get(blob_name)
+
+    def _begin(self):
+        with self._lock:
+            self._in_flight += 1
+            self.max_concurrent = max(self.max_concurrent, self._in_flight)
+
+    def _store(self, blob):
+        with self._lock:
+            self._in_flight -= 1
+            if blob is not None:
+                self.blobs[blob.name] = blob
+                self.uploads += 1
+
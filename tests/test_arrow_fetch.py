@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+from src.arrow_fetch import ArrowFetcher, fixed_size_embeddings
+from tests.fakes import FakeBigQueryClient, FakeBigQueryReadClient
+
+TABLE = 'ecochain123.supplychain.suppliers_with_images'
+
+
+@pytest.fixture
+def fetcher():
+    rng = np.random.default_rng(0)
+    n = 40
+    frame = pd.DataFrame({
+        'supplier_id': [f"SUP{i}" for i in range(n)],
+        'total_eco_score': np.arange(n, dtype=np.float64),
+        'risk_level': ['Low', 'High'] * (n // 2),
+        # Every fifth supplier has no embedding yet, which BigQuery returns as an empty list
+        'text_embedding': [[] if i % 5 == 0 else rng.standard_normal(384).tolist() for i in range(n)],
+    })
+    client = FakeBigQueryClient({'suppliers_with_images': frame})
+    return ArrowFetcher(client, FakeBigQueryReadClient(client, batch_rows=7), max_streams=3)
+
+
+def test_read_table_reads_every_stream_as_fixed_size_float32(fetcher):
+    table = fetcher.read_table(TABLE)
+    assert table.num_rows == 40
+    assert table.schema.field('text_embedding').type == pa.list_(pa.float32(), 384)
+    assert table.column('text_embedding').null_count == 8
+    assert sorted(table.column('supplier_id').to_pylist()) == sorted(f"SUP{i}" for i in range(40))
+
+
+def test_read_table_applies_row_restriction_and_projection(fetcher):
+    table = fetcher.read_table(TABLE, columns=['supplier_id'],
+                               row_restriction="total_eco_score >= 30 AND risk_level = 'High'")
+    assert table.column_names == ['supplier_id']
+    assert sorted(table.column('supplier_id').to_pylist()) == [f"SUP{i}" for i in (31, 33, 35, 37, 39)]
+
+
+def test_read_table_keeps_schema_when_nothing_matches(fetcher):
+    table = fetcher.read_table(TABLE, row_restriction="total_eco_score > 100")
+    assert table.num_rows == 0
+    assert table.schema.field('text_embedding').type == pa.list_(pa.float32(), 384)
+
+
+def test_fixed_size_embeddings_rejects_wrong_dimension():
+    with pytest.raises(ValueError):
+        fixed_size_embeddings(pa.array([[1.0, 2.0]]), dim=384)
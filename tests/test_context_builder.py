@@ -0,0 +1,41 @@
+import pandas as pd
+from src.context_builder import build_context, extract_filters, _sort_key
+
+
+def suppliers():
+    return pd.DataFrame({
+        'supplier_id': ['SUP1', 'SUP2', 'SUP3'],
+        'supplier_name': ['Acme', 'Bolt', 'Cedar'],
+        'country': ['Kenya', 'Peru', 'Kenya'],
+        'product_category': ['Textiles', 'Energy', 'Energy'],
+        'risk_level': ['Low', 'High', 'Medium'],
+        'recommendation': ['Avoid', 'Preferred', 'Neutral'],
+        'total_eco_score': [30.0, 90.0, 60.0],
+        'water_score': [10.0, 20.0, 30.0],
+    })
+
+
+def test_unmatched_filters_give_an_empty_selection_that_says_so():
+    context = build_context("Preferred suppliers in Kenya", suppliers())
+    assert context['filters'] == {'country': ['Kenya'], 'recommendation': ['Preferred']}
+    assert context['rows_matched'] == context['rows_included'] == 0
+    assert context['context'].startswith('No suppliers match the query')
+    assert 'SUP2' not in context['context']
+
+
+def test_prompt_without_filters_uses_every_row():
+    context = build_context("Which suppliers score best?", suppliers())
+    assert context['rows_matched'] == 3
+
+
+def test_risk_levels_only_match_next_to_the_word_risk():
+    assert 'risk_level' not in extract_filters("low carbon suppliers", suppliers())
+    assert extract_filters("low-risk suppliers in Peru", suppliers())['risk_level'] == ['Low']
+    assert extract_filters("suppliers with risk level: high", suppliers())['risk_level'] == ['High']
+    assert extract_filters("medium risk energy", suppliers())['risk_level'] == ['Medium']
+
+
+def test_score_keywords_match_whole_words():
+    assert _sort_key("best wastewater treatment")[0] == 'total_eco_score'
+    assert _sort_key("lowest water use")[0] == 'water_score'
+    assert _sort_key("lowest water use")[1] is True
@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import OrdinalEncoder
+from src.features import ENCODED_COLUMNS, FEATURE_COLUMNS, _legacy_features, _synthetic_table, build_features
+
+
+def fitted_encoder():
+    encoder = OrdinalEncoder()
+    encoder.fit(pd.DataFrame({
+        'country': ['Kenya', 'Peru', 'India'],
+        'region': ['Africa', 'South America', 'Asia'],
+        'partnership_status': ['Active', 'Pending', 'Active'],
+        'risk_level': ['Low', 'Medium', 'High'],
+    })[ENCODED_COLUMNS])
+    return encoder
+
+
+def test_last_audit_keeps_every_digit():
+    encoder = fitted_encoder()
+    table = _synthetic_table(3, encoder).to_pandas()
+    table['last_audit'] = ['2024-01-15', '2023-12-31', '2019-07-01']
+
+    X = build_features(table, encoder)
+
+    assert X.dtype == np.float64
+    assert X[:, FEATURE_COLUMNS.index('last_audit')].tolist() == [20240115, 20231231, 20190701]
+
+
+def test_arrow_frame_and_legacy_paths_agree():
+    encoder = fitted_encoder()
+    table = _synthetic_table(200, encoder)
+    df = table.to_pandas()
+
+    X = build_features(table, encoder)
+
+    np.testing.assert_array_equal(build_features(df, encoder), X)
+    np.testing.assert_array_equal(_legacy_features(df, encoder).astype(np.float64), X)
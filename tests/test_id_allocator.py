@@ -0,0 +1,65 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import pytest
+from src.id_allocator import IdAllocator, SQLiteCounterStore
+
+
+class RecordingStore(SQLiteCounterStore):
+    ''' SQLiteCounterStore that keeps every block it reserved as (first, count) '''
+    def __init__(self, path, **kwargs):
+        super().__init__(path, **kwargs)
+        self.blocks = []
+
+    def reserve(self, name, count):
+        first = super().reserve(name, count)
+        self.blocks.append((first, count))
+        return first
+
+
+def assert_disjoint(blocks):
+    blocks = sorted(blocks)
+    for (first, count), (next_first, _) in zip(blocks, blocks[1:]):
+        assert first + count <= next_first, f"block at {first} overlaps the one at {next_first}"
+
+
+def allocate_in_process(path, threads, ids_per_thread, block_size):
+    ''' Allocates from several threads sharing one allocator, returning the ids and reserved blocks '''
+    store = RecordingStore(path)
+    allocator = IdAllocator(store, block_size=block_size)
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        chunks = list(pool.map(lambda _: [allocator.next_id() for _ in range(ids_per_thread)], range(threads)))
+    return [supplier_id for chunk in chunks for supplier_id in chunk], store.blocks
+
+
+def test_threads_sharing_an_allocator_get_unique_ids(tmp_path):
+    ids, blocks = allocate_in_process(str(tmp_path / 'sequences.sqlite'), threads=8, ids_per_thread=200, block_size=7)
+    assert len(ids) == len(set(ids)) == 1600
+    assert_disjoint(blocks)
+
+
+def test_processes_sharing_a_store_get_unique_ids_from_disjoint_blocks(tmp_path):
+    path = str(tmp_path / 'sequences.sqlite')
+    SQLiteCounterStore(path)
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(allocate_in_process, [path] * 6, [2] * 6, [150] * 6, [7] * 6))
+
+    ids = [supplier_id for worker_ids, _ in results for supplier_id in worker_ids]
+    assert len(ids) == len(set(ids)) == 6 * 2 * 150
+    assert_disjoint([block for _, blocks in results for block in blocks])
+    # Every id comes from a block its own process reserved
+    for worker_ids, blocks in results:
+        values = {int(supplier_id[3:]) for supplier_id in worker_ids}
+        assert all(any(first <= value < first + count for first, count in blocks) for value in values)
+
+
+def test_new_sequence_starts_after_the_seed(tmp_path):
+    store = SQLiteCounterStore(str(tmp_path / 'sequences.sqlite'), seed=lambda name: 41)
+    allocator = IdAllocator(store, block_size=3)
+    assert allocator.allocate(5) == ['SUP42', 'SUP43', 'SUP44', 'SUP45', 'SUP46']
+    assert allocator.next_id() == 'SUP47'
+
+
+@pytest.mark.parametrize('count', [1, 7, 30])
+def test_large_requests_reserve_one_block(tmp_path, count):
+    store = RecordingStore(str(tmp_path / 'sequences.sqlite'))
+    IdAllocator(store, block_size=7).allocate(count)
+    assert len(store.blocks) == 1
@@ -0,0 +1,73 @@
+from io import BytesIO
+import threading
+from PIL import Image
+from src.image_loader import ImageService
+
+
+def jpeg():
+    buffer = BytesIO()
+    Image.new('RGB', (32, 32), 'green').save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+
+class GatedResponse:
+    def __init__(self, content):
+        self.status_code = 200
+        self.headers = {}
+        self.content = content
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        yield self.content
+
+
+class GatedSession:
+    ''' Session Whose GETs Block Until gate Is Set, Counting Requests Per URL '''
+    def __init__(self):
+        self.gate = threading.Event()
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def get(self, url, **kwargs):
+        with self._lock:
+            self.requests.append(url)
+        self.gate.wait(5)
+        return GatedResponse(jpeg())
+
+
+def test_repeated_prefetch_queues_each_url_once(tmp_path):
+    session = GatedSession()
+    service = ImageService(cache_dir=str(tmp_path), session=session)
+    urls = ['https://example.com/a.jpg, https://example.com/b.jpg', 'https://example.com/c.jpg']
+
+    # Every rerun asks for the same neighbours while the first downloads are still running
+    for _ in range(5):
+        service.prefetch(urls)
+    session.gate.set()
+    service._prefetch_pool.shutdown(wait=True)
+
+    assert sorted(session.requests) == ['https://example.com/a.jpg', 'https://example.com/b.jpg', 'https://example.com/c.jpg']
+    assert service._prefetching == set()
+
+
+def test_thumbnails_are_not_queued_behind_prefetches(tmp_path):
+    session = GatedSession()
+    service = ImageService(cache_dir=str(tmp_path), session=session, workers=2, prefetch_workers=1)
+    service.prefetch([f"https://example.com/next{i}.jpg" for i in range(4)])
+
+    shown = threading.Thread(target=lambda: service.thumbnails('https://example.com/selected.jpg'))
+    shown.start()
+    shown.join(0.5)
+
+    # The selected image was requested while every prefetch was still blocked
+    assert 'https://example.com/selected.jpg' in session.requests
+    session.gate.set()
+    shown.join(5)
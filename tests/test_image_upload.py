@@ -0,0 +1,70 @@
+from io import BytesIO
+from PIL import Image
+from src.updates import Update, RESUMABLE_CHUNK_SIZE, RESUMABLE_THRESHOLD
+from tests.fakes import FakeBucket
+
+
+def png(color, size = (64, 48)):
+    buffer = BytesIO()
+    Image.new('RGB', size, color).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def upload(name, data):
+    file = BytesIO(data)
+    file.name = name
+    return file
+
+
+def test_images_upload_in_parallel_and_keep_their_order(client):
+    bucket = FakeBucket(latency=0.05)
+    images = [upload(f"photo{i}.png", png((i * 40, 0, 0))) for i in range(6)]
+
+    urls = Update(client=client, bucket=bucket).upload_supplier_images(images, 'SUP7', max_workers=4)
+
+    assert urls == [f"https://storage.googleapis.com/fake-bucket/SUP7_{i}.png" for i in range(1, 7)]
+    assert bucket.uploads == 6
+    assert 1 < bucket.max_concurrent <= 4
+    assert all(blob.public and blob.content_type == 'image/png' for blob in bucket.blobs.values())
+    assert bucket.blobs['SUP7_3.png'].data == images[2].getvalue()
+
+
+def test_unchanged_images_are_not_uploaded_again(client):
+    bucket = FakeBucket()
+    update = Update(client=client, bucket=bucket)
+    first, second = png('red'), png('blue')
+    update.upload_supplier_images([upload('a.png', first), upload('b.png', second)], 'SUP7', thumbnail_size=16)
+    assert bucket.uploads == 4
+
+    urls = update.upload_supplier_images([upload('a.png', first), upload('b.png', png('green'))], 'SUP7',
+                                         thumbnail_size=16)
+
+    # Only the changed image and its thumbnail go up again
+    assert bucket.uploads == 6
+    assert urls[0] == 'https://storage.googleapis.com/fake-bucket/SUP7_1.png'
+    assert bucket.blobs['SUP7_2.png'].data == png('green')
+
+
+def test_missing_thumbnail_is_uploaded_even_when_the_image_is_unchanged(client):
+    bucket = FakeBucket()
+    update = Update(client=client, bucket=bucket)
+    update.upload_supplier_images([upload('a.png', png('red'))], 'SUP7')
+    update.upload_supplier_images([upload('a.png', png('red'))], 'SUP7', thumbnail_size=16)
+    assert 'thumbnails/SUP7_1.jpg' in bucket.blobs
+
+
+def test_large_images_go_up_as_resumable_chunked_uploads(client):
+    bucket = FakeBucket()
+    # Only the header is sniffed, so padding a PNG header makes a large "image" cheaply
+    large = b'\x89PNG\r\n\x1a\n' + bytes(RESUMABLE_THRESHOLD + RESUMABLE_CHUNK_SIZE // 2)
+    small = png('red')
+
+    Update(client=client, bucket=bucket).upload_supplier_images(
+        [upload('big.png', large), upload('small.png', small)], 'SUP7')
+
+    big, little = bucket.blobs['SUP7_1.png'], bucket.blobs['SUP7_2.png']
+    assert big.resumable and big.chunk_size == RESUMABLE_CHUNK_SIZE
+    assert big.chunks == -(-len(large) // RESUMABLE_CHUNK_SIZE)
+    assert big.data == large
+    assert RESUMABLE_CHUNK_SIZE % (256 * 1024) == 0
+    assert not little.resumable and little.chunks == 1 and little.data == small
@@ -0,0 +1,99 @@
+import asyncio
+import threading
+import time
+import numpy as np
+import pytest
+from src.job_executor import JobExecutor, QueryTimeout
+from src.predictor import _iter_unscored_pages
+from tests.conftest import supplier_table
+from tests.fakes import FakeBigQueryClient, FakeQueryJob
+
+LATENCY = 0.3
+
+
+@pytest.fixture
+def executor():
+    executor = JobExecutor(FakeBigQueryClient(latency=LATENCY), max_workers=8, timeout=5)
+    yield executor
+    executor.shutdown(cancel=True)
+
+
+def test_independent_jobs_overlap(executor):
+    start = time.perf_counter()
+    results = executor.gather([executor.submit(f"SELECT {i}") for i in range(8)])
+    elapsed = time.perf_counter() - start
+
+    assert results == [[]] * 8
+    assert LATENCY <= elapsed < 2 * LATENCY
+
+
+def test_timeout_raises_and_cancels_the_job(executor):
+    handle = executor.submit("SELECT 1", timeout=0.05)
+    with pytest.raises(QueryTimeout):
+        handle.result()
+    assert handle.job.cancelled
+
+
+def test_gather_cancels_the_siblings_of_a_failed_query(executor):
+    def fail(client, query, params):
+        raise RuntimeError("Syntax error")
+    executor.client.on(r'\bBROKEN\b', fail)
+    slow = [executor.submit("SELECT 1", timeout=10) for _ in range(3)]
+    # Let the slow jobs start so there is a BigQuery job to cancel
+    time.sleep(0.05)
+
+    start = time.perf_counter()
+    with pytest.raises(RuntimeError, match="Syntax error"):
+        executor.gather([executor.submit("SELECT BROKEN")] + slow)
+    assert time.perf_counter() - start < LATENCY
+    assert all(handle.job.cancelled for handle in slow)
+
+
+def test_script_is_one_job(executor):
+    handle = executor.script(["CREATE TEMP TABLE t AS SELECT 1 AS x", "SELECT x FROM t"], fetch='job')
+    job = handle.result()
+    assert len(executor.client.jobs) == 1
+    assert len(job.child_jobs) == 2
+
+
+def test_cancel_while_the_job_is_being_created_cancels_the_job(executor):
+    creating, release = threading.Event(), threading.Event()
+    jobs = []
+
+    class SlowToStartClient:
+        def query(self, query, job_config = None):
+            creating.set()
+            release.wait(5)
+            jobs.append(FakeQueryJob(latency=10))
+            return jobs[-1]
+
+    handle = executor.submit("SELECT 1", client=SlowToStartClient())
+    creating.wait(5)
+    assert handle.cancel()
+    release.set()
+
+    with pytest.raises(Exception):
+        handle.result(timeout=5)
+    assert jobs[0].cancelled
+
+
+def test_handles_can_be_awaited(executor):
+    async def run():
+        return await asyncio.gather(executor.aquery("SELECT 1"), executor.aquery("SELECT 2"))
+    start = time.perf_counter()
+    assert asyncio.run(run()) == [[], []]
+    assert time.perf_counter() - start < 2 * LATENCY
+
+
+def test_supplier_id_pages_are_fetched_side_by_side():
+    table = supplier_table(6).assign(region='Africa', partnership_status='Active', annual_volume=100,
+                                     cost_premium=5.0, last_audit='2024-01-15',
+                                     text_embedding=[np.ones(384).tolist()] * 6)
+    client = FakeBigQueryClient({'suppliers_with_images': table}, latency=LATENCY)
+
+    start = time.perf_counter()
+    pages = list(_iter_unscored_pages(client, [f"SUP{i}" for i in range(1, 7)], page_size=2))
+
+    assert time.perf_counter() - start < 2 * LATENCY
+    assert [page.column('supplier_id').to_pylist() for page in pages] == [['SUP1', 'SUP2'], ['SUP3', 'SUP4'],
+                                                                           ['SUP5', 'SUP6']]
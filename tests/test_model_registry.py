@@ -0,0 +1,19 @@
+import os
+import joblib
+from src.model_registry import ModelRegistry
+
+
+def test_load_seconds_accumulate_across_reloads(tmp_path):
+    registry = ModelRegistry(models_dir=str(tmp_path), version='T')
+    path = registry.path('encoder')
+    joblib.dump({'version': 1}, path)
+    assert registry.get('encoder') == {'version': 1}
+    first = registry.timings['encoder']['load_seconds']
+
+    joblib.dump({'version': 2, 'padding': 'x' * 100}, path)
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1_000_000))
+    assert registry.get('encoder') == {'version': 2, 'padding': 'x' * 100}
+
+    timing = registry.timings['encoder']
+    assert timing['loads'] == 2
+    assert timing['load_seconds'] == first + timing['last_load_seconds']
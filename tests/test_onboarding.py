@@ -0,0 +1,129 @@
+from io import BytesIO
+import threading
+import time
+import pytest
+import src.onboarding
+from src.onboarding import OnboardingEngine, Step, SUCCEEDED
+
+
+def engine(**kwargs):
+    steps = [Step('noop', lambda context: None)]
+    return OnboardingEngine(steps=steps, update_factory=lambda supplier: None, backoff=0, **kwargs)
+
+
+def wait_for(engine, job_id, timeout = 5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = engine.status(job_id)
+        if status is None or status['finished_at'] is not None:
+            return status
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_finished_jobs_are_evicted_after_the_ttl():
+    onboarding = engine(finished_ttl=0.2)
+    job_id = onboarding.submit({'supplier_name': 'Acme'})
+    assert wait_for(onboarding, job_id)['status'] == SUCCEEDED
+    time.sleep(0.3)
+    assert onboarding.status(job_id) is None
+    onboarding.shutdown()
+
+
+def test_only_the_newest_finished_jobs_are_kept():
+    onboarding = engine(max_finished=3)
+    job_ids = []
+    for i in range(6):
+        job_ids.append(onboarding.submit({'supplier_name': f"Supplier {i}"}))
+        wait_for(onboarding, job_ids[-1])
+    assert [onboarding.status(job_id) is not None for job_id in job_ids] == [False] * 3 + [True] * 3
+    assert len(onboarding._jobs) == 3
+    onboarding.shutdown()
+
+
+def test_running_jobs_are_never_evicted():
+    release = threading.Event()
+    onboarding = OnboardingEngine(steps=[Step('block', lambda context: release.wait(5))],
+                                  update_factory=lambda supplier: None, max_finished=0, finished_ttl=0)
+    job_id = onboarding.submit({'supplier_name': 'Acme'})
+    onboarding.submit({'supplier_name': 'Other'})
+    time.sleep(0.1)
+    assert onboarding.status(job_id)['status'] == 'running'
+    release.set()
+    onboarding.shutdown()
+    assert onboarding.status(job_id) is None
+
+
+class RecordingUpdate:
+    ''' Update Stand-In That Records How Many Row-Mutating Statements Overlap '''
+    def __init__(self):
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def _mutate(self, name):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(0.05)
+        with self._lock:
+            self.in_flight -= 1
+            self.calls.append(name)
+
+    def next_supplier_id(self):
+        return 'SUP9'
+
+    def upload_supplier_images(self, images, supplier_id):
+        time.sleep(0.05)
+        return [f"https://storage.googleapis.com/fake-bucket/{supplier_id}_1.png"]
+
+    def insert_supplier(self, supplier_id):
+        self._mutate('insert')
+
+    def embed_supplier(self, supplier_id):
+        self._mutate('embed')
+
+    def update_ecoscores(self, scores):
+        self._mutate('score')
+
+    def set_image_urls(self, supplier_id, urls):
+        self._mutate('set_image_urls')
+
+
+def test_onboarding_never_has_two_row_mutations_in_flight(monkeypatch):
+    monkeypatch.setattr(src.onboarding, 'BatchPrediction', lambda supplier_ids: supplier_ids)
+    update = RecordingUpdate()
+    onboarding = OnboardingEngine(update_factory=lambda supplier: update, backoff=0)
+    image = BytesIO(b'png')
+    image.name = 'photo.png'
+    job_id = onboarding.submit({'supplier_name': 'Acme', 'uploaded_images': [image]})
+
+    assert wait_for(onboarding, job_id)['status'] == SUCCEEDED
+    assert update.max_in_flight == 1
+    assert update.calls == ['insert', 'embed', 'score', 'set_image_urls']
+    onboarding.shutdown()
+
+
+def csv_upload(rows):
+    header = ('supplier_name,country,region,product_category,sub_category,certification,partnership_status,'
+              'annual_volume,cost_premium,risk_level,audit_summary\n')
+    file = BytesIO((header + ''.join(rows)).encode())
+    file.name = 'suppliers.csv'
+    return file
+
+
+def test_bulk_import_runs_in_the_background_and_reports_progress():
+    onboarding = OnboardingEngine(update_factory=lambda supplier: pytest.fail('a dry run needs no client'))
+    upload = csv_upload(['Acme,Kenya,Africa,Textiles,Cotton,ISO 14001,Active,100,5,Low,ok\n',
+                         'Bad,Kenya,Mars,Textiles,Cotton,ISO 14001,Active,100,5,Low,ok\n'])
+    job_id = onboarding.submit_import(upload, dry_run=True)
+    # The upload is copied, so the request's file can go away
+    upload.close()
+
+    status = wait_for(onboarding, job_id)
+    assert status['kind'] == 'import' and status['status'] == SUCCEEDED
+    summary = status['report'].summary()
+    assert (summary['rows'], summary['rejected'], summary['loaded']) == (2, 1, 0)
+    assert status['report'].errors['column'].tolist() == ['region']
+    onboarding.shutdown()
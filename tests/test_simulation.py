@@ -0,0 +1,28 @@
+import warnings
+import numpy as np
+import pandas as pd
+from src.simulation import SimulationEngine, uniform_scenarios
+
+
+def test_summary_is_empty_when_no_supplier_has_every_subscore():
+    suppliers = pd.DataFrame({'supplier_id': ['SUP1', 'SUP2'], 'carbon_score': [50.0, np.nan],
+                              'water_score': [np.nan, 60.0], 'waste_score': 70.0, 'social_score': 80.0})
+    result = SimulationEngine(registry=object()).run(suppliers, uniform_scenarios([0, 10]), use_model=False)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        summary = result.summary(threshold=80)
+
+    assert summary.empty
+    assert list(summary.columns) == ['carbon_score_improvement', 'water_score_improvement', 'waste_score_improvement',
+                                     'social_score_improvement', 'mean_ecoscore', 'mean_delta', 'suppliers_at_threshold']
+
+
+def test_summary_averages_each_scenario():
+    suppliers = pd.DataFrame({'supplier_id': ['SUP1', 'SUP2'], 'carbon_score': [40.0, 90.0],
+                              'water_score': [40.0, 90.0], 'waste_score': [40.0, 90.0], 'social_score': [40.0, 90.0]})
+    summary = SimulationEngine(registry=object()).run(suppliers, uniform_scenarios([0, 25]), use_model=False).summary(50)
+
+    assert summary['mean_ecoscore'].tolist() == [65.0, 75.0]
+    assert summary['mean_delta'].tolist() == [0.0, 10.0]
+    assert summary['suppliers_at_threshold'].tolist() == [1, 2]
@@ -0,0 +1,65 @@
+import pandas as pd
+from src.updates import Update
+from tests.conftest import make_snapshot, supplier_table
+from tests.fakes import FakeBigQueryClient
+
+
+def scores(supplier_id, value):
+    return {'supplier_id': [supplier_id], 'carbon_score': [value], 'water_score': [value],
+            'waste_score': [value], 'social_score': [value], 'ecoscore': [value]}
+
+
+def test_version_keeps_increasing_across_full_rebuilds(tmp_path):
+    client = FakeBigQueryClient({'suppliers_with_images': supplier_table(5)})
+    snapshot, _ = make_snapshot(tmp_path, client)
+    assert snapshot.load(client).num_rows == 5
+    first = snapshot.version()
+
+    client.tables['suppliers_with_images'] = supplier_table(3)
+    snapshot.invalidate(None)
+    assert snapshot.load(client).num_rows == 3
+    assert snapshot.version() > first
+
+    # A rebuild past full_refresh must not restart the counter either
+    snapshot.full_refresh = -1
+    snapshot.load(client)
+    assert snapshot.version() > first + 1
+
+
+def test_refresh_reads_only_rows_changed_since_the_watermark(tmp_path):
+    client = FakeBigQueryClient({'suppliers_with_images': supplier_table(4).assign(
+        updated_at=pd.Timestamp('2026-01-01', tz='UTC'))})
+    snapshot, read_client = make_snapshot(tmp_path, client)
+    snapshot.load(client)
+    built_at = snapshot._read_meta()['built_at']
+
+    client.tables['suppliers_with_images'].loc[2, ['risk_level', 'updated_at']] = \
+        ['High', pd.Timestamp('2026-01-02', tz='UTC')]
+    snapshot.invalidate(['SUP3'])
+    table = snapshot.load(client).to_pandas().set_index('supplier_id')
+
+    assert table.loc['SUP3', 'risk_level'] == 'High'
+    assert len(table) == 4
+    assert snapshot._read_meta()['built_at'] == built_at
+    assert read_client.restrictions[-1].startswith("updated_at > TIMESTAMP '2025-12-31 23:50:00")
+
+
+def test_refresh_finds_updates_and_inserts_whatever_their_supplier_id(tmp_path, monkeypatch):
+    client = FakeBigQueryClient({'suppliers_with_images': supplier_table(5)})
+    snapshot, _ = make_snapshot(tmp_path, client)
+    monkeypatch.setattr('src.updates.get_snapshot', lambda: snapshot)
+    update = Update(client=client)
+    update.update_ecoscores(scores('SUP1', 10.0))
+    snapshot.load(client)
+    built_at = snapshot._read_meta()['built_at']
+
+    # An id from another worker's block can sort below everything already in the snapshot
+    update.load_suppliers(supplier_table(1).assign(supplier_id='SUP0'))
+    update.update_ecoscores(scores('SUP3', 90.0))
+    table = snapshot.load(client).to_pandas().set_index('supplier_id')
+
+    assert snapshot._read_meta()['built_at'] == built_at
+    assert len(table) == 6
+    assert table.loc['SUP0', 'supplier_name'] == 'Supplier 1'
+    assert table.loc['SUP3', 'recommendation'] == 'Preferred'
+    assert table.loc['SUP1', 'total_eco_score'] == 10.0
@@ -0,0 +1,33 @@
+from io import BytesIO
+import json
+import requests
+from src.streaming import stream_generate
+
+
+def sse_response(texts):
+    ''' Function To Build A Real requests Response Carrying An Undeclared-Charset Event Stream '''
+    events = [{'candidates': [{'content': {'parts': [{'text': text}]}}]} for text in texts]
+    body = ''.join(f"data: {json.dumps(event, ensure_ascii=False)}\r\n\r\n" for event in events)
+    response = requests.models.Response()
+    response.status_code = 200
+    response.headers['Content-Type'] = 'text/event-stream'
+    response.raw = BytesIO(body.encode('utf-8'))
+    # What the transport adapter sets: ISO-8859-1, since text/* declares no charset
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    return response
+
+
+class FakeSession:
+    def __init__(self, response):
+        self.response = response
+
+    def post(self, url, **kwargs):
+        return self.response
+
+
+def test_stream_generate_decodes_utf8_events():
+    texts = ['Café suppliers in São Paulo ', 'cut CO₂ by 12%', ' — see 東京 too']
+
+    chunks = list(stream_generate('prompt', session=FakeSession(sse_response(texts))))
+
+    assert chunks == texts
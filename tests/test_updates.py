@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+from src.updates import Update
+
+
+def scores(supplier_ids, ecoscores):
+    return {
+        'supplier_id': np.array(supplier_ids, dtype=object),
+        'carbon_score': np.full(len(ecoscores), 60.0),
+        'water_score': np.full(len(ecoscores), 70.0),
+        'waste_score': np.full(len(ecoscores), 80.0),
+        'social_score': np.full(len(ecoscores), 90.0),
+        'ecoscore': np.array(ecoscores, dtype=np.float64),
+    }
+
+
+def merges(client):
+    return [query for query, _ in client.jobs if query.lstrip().startswith('MERGE')]
+
+
+def test_update_ecoscores_merges_scores_and_labels(client, local_caches):
+    update = Update(client=client)
+    affected = update.update_ecoscores(scores(['SUP1', 'SUP2', 'SUP3', 'SUP4'], [85.0, 80.0, 50.0, 12.5]),
+                                       chunk_size=3)
+
+    assert affected == 4
+    assert len(merges(client)) == 2
+    table = client.tables['suppliers_with_images'].set_index('supplier_id')
+    assert table.loc[['SUP1', 'SUP2', 'SUP3', 'SUP4'], 'total_eco_score'].tolist() == [85.0, 80.0, 50.0, 12.5]
+    assert table.loc[['SUP1', 'SUP4'], 'carbon_score'].tolist() == [60.0, 60.0]
+    assert table.loc[['SUP1', 'SUP4'], 'social_score'].tolist() == [90.0, 90.0]
+    # Above 80 is Preferred, 50 to 80 inclusive Neutral, below 50 Avoid
+    assert table.loc[['SUP1', 'SUP2', 'SUP3', 'SUP4'], 'recommendation'].tolist() == \
+        ['Preferred', 'Neutral', 'Neutral', 'Avoid']
+    # Suppliers missing from the scores are left alone
+    assert np.isnan(table.loc['SUP5', 'total_eco_score'])
+    assert table.loc['SUP5', 'recommendation'] is None
+
+
+def test_update_ecoscores_accepts_records_and_keeps_last_write(client, local_caches):
+    update = Update(client=client)
+    records = [
+        {'supplier_id': 'SUP2', 'carbon_score': 1.0, 'water_score': 1.0, 'waste_score': 1.0,
+         'social_score': 1.0, 'ecoscore': 10.0},
+        {'supplier_id': 'SUP2', 'carbon_score': 2.0, 'water_score': 2.0, 'waste_score': 2.0,
+         'social_score': 2.0, 'ecoscore': 95.0},
+    ]
+    assert update.update_ecoscores(records) == 1
+    assert len(merges(client)) == 1
+    row = client.tables['suppliers_with_images'].set_index('supplier_id').loc['SUP2']
+    assert (row['total_eco_score'], row['carbon_score'], row['recommendation']) == (95.0, 2.0, 'Preferred')
+
+
+def test_update_ecoscores_without_scores_runs_no_job(client, local_caches):
+    assert Update(client=client).update_ecoscores([]) == 0
+    assert client.jobs == []
+
+
+def test_update_ecoscores_rejects_inverted_thresholds(client, local_caches):
+    with pytest.raises(ValueError):
+        Update(client=client).update_ecoscores(scores(['SUP1'], [70.0]), preferred_above=40, avoid_below=60)
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.vector_index import VectorIndex
+from tests.conftest import make_snapshot, supplier_table
+from tests.fakes import FakeBigQueryClient
+
+DIM = 384
+
+
+def unit(i):
+    vector = np.zeros(DIM, dtype=np.float32)
+    vector[i] = 1.0
+    return vector
+
+
+@pytest.fixture
+def index(tmp_path):
+    return VectorIndex(path=str(tmp_path / 'index.npz'))
+
+
+def test_batch_upsert_appends_and_replaces(index):
+    index.upsert(['SUP1', 'SUP2'], [unit(1), unit(2)], {'country': ['Kenya', 'Peru']})
+    index.upsert(['SUP2', 'SUP3', 'SUP3'], [unit(5), unit(7), unit(3)],
+                 {'country': ['Bangladesh', 'Chile', 'Chile'], 'risk_level': ['High', None, 'Low']})
+
+    assert len(index) == 3
+    assert index.search(unit(5), k=1) == [('SUP2', pytest.approx(1.0))]
+    # The last of repeated ids wins
+    assert index.search(unit(3), k=1)[0][0] == 'SUP3'
+    assert index.search(unit(7), k=1)[0][1] == pytest.approx(0.0)
+    # A replaced value longer than any stored one is not truncated
+    assert index.search(unit(5), k=3, country='Bangladesh')[0][0] == 'SUP2'
+    assert index.search(unit(1), k=3, risk_level='Low')[0][0] == 'SUP3'
+    assert [supplier_id for supplier_id, _ in index.search(unit(1), k=3, country='Kenya')] == ['SUP1']
+
+
+def test_upsert_survives_save_and_load(index, tmp_path):
+    index.upsert(['SUP1', 'SUP2'], [unit(1), unit(2)], {'country': ['Kenya', 'Peru']})
+    index.save()
+    loaded = VectorIndex(path=index.path)
+    assert loaded.load()
+    loaded.upsert(['SUP3'], [unit(3)])
+    assert [supplier_id for supplier_id, _ in loaded.search(unit(3), k=3)][0] == 'SUP3'
+
+
+def embedded_table(n, updated_at):
+    return supplier_table(n).assign(text_embedding=[unit(i).tolist() for i in range(1, n + 1)],
+                                    updated_at=pd.Timestamp(updated_at, tz='UTC'))
+
+
+def test_sync_rebuilds_only_when_the_snapshot_is_rebuilt(tmp_path, monkeypatch, index):
+    client = FakeBigQueryClient({'suppliers_with_images': embedded_table(4, '2026-01-01')})
+    snapshot, _ = make_snapshot(tmp_path, client)
+    monkeypatch.setattr('src.vector_index.get_snapshot', lambda: snapshot)
+    builds = []
+    build = index.build
+    monkeypatch.setattr(index, 'build', lambda *args: builds.append(args[1:]) or build(*args))
+
+    index.sync(client)
+    assert len(builds) == 1 and len(index) == 4
+
+    # An incremental refresh: one changed embedding and one supplier added, found by updated_at
+    table = client.tables['suppliers_with_images']
+    table.at[1, 'text_embedding'] = unit(9).tolist()
+    table.at[1, 'updated_at'] = pd.Timestamp('2026-01-02', tz='UTC')
+    client.tables['suppliers_with_images'] = pd.concat(
+        [table, embedded_table(5, '2026-01-02').iloc[[4]]], ignore_index=True)
+    snapshot.invalidate(['SUP2', 'SUP5'])
+    index.sync(client)
+
+    assert len(builds) == 1
+    assert len(index) == 5
+    assert index.snapshot_version == snapshot.version()
+    assert index.search(unit(9), k=1)[0][0] == 'SUP2'
+    assert index.search(unit(5), k=1)[0][0] == 'SUP5'
+
+    snapshot.invalidate(None)
+    index.sync(client)
+    assert len(builds) == 2